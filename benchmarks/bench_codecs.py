@@ -0,0 +1,73 @@
+# Codec benchmark: encoder CPU per camera for the codecs in the local OpenCV build
+# Usage: python benchmarks/bench_codecs.py [frames] [fps]
+import sys
+import os
+import time
+import tempfile
+
+import cv2
+import numpy as np
+
+# (label, fourcc, container); H.264 goes by several fourccs depending on the build
+CODECS = (("MJPG", "MJPG", ".avi"),
+          ("XVID", "XVID", ".avi"),
+          ("H264", "avc1", ".mp4"),
+          ("H264", "H264", ".mp4"),
+          ("H264", "X264", ".mkv"))
+RESOLUTIONS = ((640, 480), (1280, 720), (1920, 1080))
+
+def make_frames(size, count):
+    # Static noisy background with a moving block, roughly like a camera scene
+    w, h = size
+    rng = np.random.default_rng(0)
+    background = cv2.GaussianBlur(rng.integers(0, 256, (h, w, 3), dtype=np.uint8), (9, 9), 0)
+    frames = []
+    for n in range(count):
+        frame = background.copy()
+        x = (n * 8) % max(1, w - w // 8)
+        cv2.rectangle(frame, (x, h // 3), (x + w // 8, h // 3 + h // 6), (0, 0, 255), -1)
+        frames.append(frame)
+    return frames
+
+def bench(fourcc, extension, size, frames, fps):
+    path = os.path.join(tempfile.mkdtemp(), "bench" + extension)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc), fps, size)
+    if not writer.isOpened():
+        return None
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    for frame in frames:
+        writer.write(frame)
+    writer.release()
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    size_bytes = os.path.getsize(path)
+    os.remove(path)
+    os.rmdir(os.path.dirname(path))
+    return cpu / len(frames), wall / len(frames), size_bytes / len(frames)
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    fps = float(sys.argv[2]) if len(sys.argv) > 2 else 20.0
+    
+    # CPU % is of one core for one camera recording at fps; MB/min is the disk write rate
+    print(f"{'codec':>5} {'fourcc':>6} {'resolution':>10} {'cpu ms/frame':>13} {'cpu %/camera':>13} "
+          f"{'MB/min':>7}")
+    for size in RESOLUTIONS:
+        frames = make_frames(size, count)
+        tested = set()
+        for label, fourcc, extension in CODECS:
+            if label in tested:
+                continue
+            result = bench(fourcc, extension, size, frames, fps)
+            if result is None:
+                continue
+            tested.add(label)
+            cpu, _, frame_bytes = result
+            print(f"{label:>5} {fourcc:>6} {size[0]:>5}x{size[1]:<4} {cpu * 1000:>13.2f} "
+                  f"{cpu * fps * 100:>12.1f}% {frame_bytes * fps * 60 / 1e6:>7.1f}")
+        for label in sorted({label for label, _, _ in CODECS} - tested):
+            print(f"{label:>5} {'-':>6} {size[0]:>5}x{size[1]:<4} {'unavailable':>13}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# End-to-end load benchmark: synthetic cameras through capture, tile rendering, recording and the DB
+# Usage: python benchmarks/bench_load.py [seconds] [WIDTHxHEIGHT@FPS] [camera counts...] > results.json
+import sys
+import os
+import json
+import math
+import time
+import shutil
+import resource
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtWidgets import QApplication, QWidget, QGridLayout
+
+import demo2
+from demo2 import RecorderService, CameraWidget, SyntheticCapture, telemetry
+
+CAMERA_COUNTS = (1, 4, 16, 64)
+WINDOW_SIZE = (1280, 720)
+RENDER_INTERVAL = 0.03  # the GUI's live update timer
+STARTUP_TIMEOUT = 10.0
+LATENCY_STAGES = ('wait', 'read', 'overlay', 'fanout', 'sub_scale', 'scale', 'display_latency', 'encode', 'encode_latency', 'db_commit')
+
+def rss_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def build_grid(service, count):
+    container = QWidget()
+    layout = QGridLayout()
+    container.setLayout(layout)
+    cols = math.ceil(math.sqrt(count))
+    widgets = []
+    for i in range(count):
+        widget = CameraWidget(i)
+        widget.setMinimumSize(1, 1)
+        layout.addWidget(widget, i // cols, i % cols)
+        service.live_feed(i).subscribe(widget.prepare_frame)
+        widgets.append(widget)
+    container.resize(*WINDOW_SIZE)
+    container.show()
+    QApplication.processEvents()
+    return container, widgets
+
+def counters(service):
+    stats = service.stats()['cameras']
+    return {'captured': [camera['captured'] for camera in stats],
+            'read_failures': sum(camera['read_failures'] for camera in stats),
+            'recorder_dropped': sum(camera['recorder_dropped'] for camera in stats)}
+
+def run(app, count, seconds, mode):
+    service = RecorderService()
+    service.camera_count = count
+    service.camera_sources = {i: f"{SyntheticCapture.SCHEME}{mode};seed={i}" for i in range(count)}
+    service.frame_bus = False
+    service.recording_duration = seconds / 3 / 60  # a few segments per run, so the DB path is exercised
+    telemetry.reset()
+    service.start()
+    container, widgets = build_grid(service, count)
+
+    # Every camera live before measuring
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline and any(c['state'] != 'live' for c in service.stats()['cameras']):
+        time.sleep(0.05)
+
+    start = counters(service)
+    rss_start = rss_bytes()
+    peak_rss = rss_start
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    next_render = wall_start
+    while time.perf_counter() - wall_start < seconds:
+        for widget in widgets:
+            widget.render()
+        app.processEvents()
+        peak_rss = max(peak_rss, rss_bytes())
+        next_render += RENDER_INTERVAL
+        time.sleep(max(0.0, next_render - time.perf_counter()))
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    end = counters(service)
+    skipped = sum(t.capture.frames_skipped for t in service.capture_threads if t.capture is not None)
+
+    fps = [(e - s) / wall for s, e in zip(start['captured'], end['captured'])]
+    latency = {}
+    for stage in LATENCY_STAGES:
+        summary = telemetry.summary(stage)
+        if summary is not None:
+            latency[stage] = {p: round(summary[p] * 1000, 2) for p in ('p50', 'p95', 'p99')}
+    queue_depth = telemetry.summary('queue_depth')
+
+    container.close()
+    service.stop()
+    segments = demo2.recordings_db.query("SELECT COUNT(*) FROM recordings WHERE camera_id < ?", (count,), one=True)[0]
+    return {'cameras': count,
+            'source': mode,
+            'seconds': round(wall, 2),
+            'fps_per_camera': round(sum(fps) / count, 2),
+            'fps_min': round(min(fps), 2),
+            'dropped': {name: end[name] - start[name]
+                        for name in ('read_failures', 'recorder_dropped')},
+            'source_skipped': skipped,
+            'cpu_percent_per_camera': round(100 * cpu / wall / count, 2),
+            'rss_mb': round(rss_bytes() / 2 ** 20, 1),
+            'peak_rss_mb': round(peak_rss / 2 ** 20, 1),
+            'rss_growth_mb': round((peak_rss - rss_start) / 2 ** 20, 1),
+            'latency_ms': latency,
+            'encoder_queue_depth': None if queue_depth is None else
+                {p: queue_depth[p] for p in ('p50', 'p95', 'p99')},
+            'segments_recorded': segments}
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 20
+    mode = sys.argv[2] if len(sys.argv) > 2 else "640x480@15"
+    counts = [int(n) for n in sys.argv[3:]] or CAMERA_COUNTS
+
+    # Recordings and databases go to a scratch directory
+    workdir = tempfile.mkdtemp(prefix="bench_load_")
+    os.chdir(workdir)
+    demo2.init_databases()
+    app = QApplication(sys.argv[:1])
+    results = []
+    try:
+        for count in counts:
+            print(f"{count} cameras...", file=sys.stderr)
+            results.append(run(app, count, seconds, mode))
+    finally:
+        demo2.close_databases()
+        os.chdir('/')
+        shutil.rmtree(workdir, ignore_errors=True)
+    print(json.dumps({'opencv': demo2.cv2.__version__, 'cpu_count': os.cpu_count(), 'results': results}, indent=2))
+
+if __name__ == "__main__":
+    main()
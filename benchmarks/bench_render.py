@@ -0,0 +1,89 @@
+# Render micro-benchmark: ms per tile per frame for 1080p input at 4/9/16 tiles
+# Usage: python benchmarks/bench_render.py [frames]
+import sys
+import os
+import math
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import cv2
+import numpy as np
+from PyQt5.QtWidgets import QApplication, QWidget, QGridLayout
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QImage, QPixmap
+
+from demo2 import CameraWidget
+
+WINDOW_SIZE = (1280, 720)
+TILE_COUNTS = (4, 9, 16)
+
+# Previous render path, kept here for comparison
+def legacy_update_frame(widget, frame):
+    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    h, w, ch = frame.shape
+    q_img = QImage(frame.data, w, h, ch * w, QImage.Format_RGB888)
+    widget.setPixmap(QPixmap.fromImage(q_img).scaled(
+        widget.width(), widget.height(), Qt.KeepAspectRatio))
+
+# New render path, split the way the application runs it
+def fast_prepare_frame(widget, frame):
+    widget.prepare_frame(frame)  # capture thread
+
+def fast_render_frame(widget, frame):
+    widget.render()  # GUI thread
+
+def build_grid(tile_count):
+    container = QWidget()
+    layout = QGridLayout()
+    container.setLayout(layout)
+    cols = math.ceil(math.sqrt(tile_count))
+    widgets = []
+    for i in range(tile_count):
+        widget = CameraWidget(i)
+        widget.setMinimumSize(1, 1)
+        layout.addWidget(widget, i // cols, i % cols)
+        widgets.append(widget)
+    container.resize(*WINDOW_SIZE)
+    container.show()
+    QApplication.processEvents()
+    return container, widgets
+
+def run(widgets, frames, iterations, gui_step, capture_step=None):
+    capture_time = 0.0
+    gui_time = 0.0
+    for n in range(iterations):
+        frame = frames[n % len(frames)]
+        for widget in widgets:
+            if capture_step is not None:
+                start = time.perf_counter()
+                capture_step(widget, frame)
+                capture_time += time.perf_counter() - start
+            start = time.perf_counter()
+            gui_step(widget, frame)
+            widget.repaint()
+            gui_time += time.perf_counter() - start
+    samples = iterations * len(widgets)
+    return capture_time * 1000 / samples, gui_time * 1000 / samples
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    app = QApplication(sys.argv)
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 256, (1080, 1920, 3), dtype=np.uint8) for _ in range(4)]
+    
+    # Milliseconds per tile per frame; "capture" is work moved off the GUI thread
+    print(f"{'tiles':>5} {'legacy gui':>11} {'fast capture':>13} {'fast gui':>9} {'gui speedup':>12}")
+    for tile_count in TILE_COUNTS:
+        container, widgets = build_grid(tile_count)
+        _, legacy_gui = run(widgets, frames, iterations, legacy_update_frame)
+        for widget in widgets:
+            widget.clear()
+        fast_capture, fast_gui = run(widgets, frames, iterations, fast_render_frame, fast_prepare_frame)
+        print(f"{tile_count:>5} {legacy_gui:>11.2f} {fast_capture:>13.2f} {fast_gui:>9.2f} "
+              f"{legacy_gui / fast_gui:>11.1f}x")
+        container.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# Cold start benchmark: time to login window, main window and first live frame, in fresh processes
+# Usage: python benchmarks/bench_startup.py [runs] [cameras] [WIDTHxHEIGHT@FPS]
+import sys
+import os
+import json
+import time
+import shutil
+import tempfile
+import statistics
+import subprocess
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+TIME_TO_FIRST_FRAME_TARGET = 1.5  # seconds from process start, synthetic cameras
+TIMEOUT = 30.0
+MARKS = ('imported', 'login_shown', 'main_shown', 'first_frame', 'all_frames')
+
+# Runs in the child process: the GUI startup path, logged in as soon as the login window is up
+def child(cameras, mode):
+    marks = {}
+    sys.path.insert(0, ROOT)
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    import demo2
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import QTimer
+    marks['imported'] = time.monotonic()
+
+    app = QApplication(sys.argv[:1])
+    app.setStyle('Fusion')
+    service = demo2.RecorderService()
+    service.camera_count = cameras
+    service.camera_sources = {i: f"{demo2.SyntheticCapture.SCHEME}{mode};seed={i}" for i in range(cameras)}
+    window = demo2.CameraSystem(service, demo2.start_backend(service))
+
+    def login():
+        marks['login_shown'] = time.monotonic()
+        window.login_window.username_input.setText("admin")
+        window.login_window.password_input.setText("admin123")
+        window.login_window.login_check()
+        marks['main_shown'] = time.monotonic()
+        poll.start(5)
+
+    def check_frames():
+        shown = [widget.image is not None for widget in window.camera_widgets if widget is not None]
+        if any(shown) and 'first_frame' not in marks:
+            marks['first_frame'] = time.monotonic()
+        if shown and all(shown) or time.monotonic() - marks['login_shown'] > TIMEOUT:
+            marks['all_frames'] = time.monotonic()
+            app.quit()
+
+    poll = QTimer()
+    poll.timeout.connect(check_frames)
+    QTimer.singleShot(0, login)  # first pass of the event loop, with the login window on screen
+    app.exec_()
+    window.logout()
+    service.stop()
+    demo2.close_databases()
+    print(json.dumps(marks))
+
+def run_once(cameras, mode):
+    # Fresh working directory: new databases, no cached logo
+    workdir = tempfile.mkdtemp(prefix="bench_startup_")
+    try:
+        start = time.monotonic()
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', str(cameras), mode],
+                                cwd=workdir, capture_output=True, text=True, timeout=TIMEOUT * 2).stdout
+        marks = json.loads(output.strip().splitlines()[-1])
+        return {name: marks[name] - start for name in MARKS if name in marks}
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    cameras = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    mode = sys.argv[3] if len(sys.argv) > 3 else "1280x720@25"
+    results = [run_once(cameras, mode) for _ in range(runs)]
+
+    print(f"{cameras} synthetic cameras ({mode}), median of {runs} cold starts")
+    for name in MARKS:
+        values = [result[name] for result in results if name in result]
+        if values:
+            print(f"{name:>12}: {statistics.median(values) * 1000:7.0f} ms  (max {max(values) * 1000:.0f} ms)")
+    first_frame = statistics.median(result.get('first_frame', TIMEOUT) for result in results)
+    passed = first_frame <= TIME_TO_FIRST_FRAME_TARGET
+    print(f"time to first frame {first_frame:.2f}s, target {TIME_TO_FIRST_FRAME_TARGET:.2f}s: "
+          f"{'PASS' if passed else 'FAIL'}")
+    return 0 if passed else 1
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        child(int(sys.argv[2]), sys.argv[3])
+    else:
+        sys.exit(main())
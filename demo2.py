@@ -1,689 +1,5838 @@
-import sys
-import os
-import cv2
-import sqlite3
-from datetime import datetime, timedelta
-from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
-                             QLabel, QPushButton, QLineEdit, QComboBox, QTabWidget, 
-                             QGridLayout, QMessageBox, QFileDialog, QGroupBox, QDateEdit, 
-                             QTimeEdit, QListWidget, QStackedWidget, QSizePolicy)
-from PyQt5.QtCore import Qt, QTimer, QDateTime, QDate, QTime
-from PyQt5.QtGui import QImage, QPixmap, QIcon
-
-# Database initialization
-def init_databases():
-    # Personnel database
-    conn = sqlite3.connect('personnel.db')
-    c = conn.cursor()
-    c.execute('''CREATE TABLE IF NOT EXISTS personnel
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                 username TEXT UNIQUE,
-                 password TEXT,
-                 authority TEXT)''')
-    
-    # Default admin account (if not exists)
-    c.execute("SELECT * FROM personnel WHERE username='admin'")
-    if not c.fetchone():
-        c.execute("INSERT INTO personnel (username, password, authority) VALUES (?, ?, ?)",
-                  ('admin', 'admin123', 'admin'))
-    
-    conn.commit()
-    conn.close()
-    
-    # Camera recordings database
-    conn = sqlite3.connect('camera_recordings.db')
-    c = conn.cursor()
-    c.execute('''CREATE TABLE IF NOT EXISTS recordings
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                 camera_id INTEGER,
-                 start_time TEXT,
-                 file_path TEXT)''')
-    conn.commit()
-    conn.close()
-
-# Camera widget class
-class CameraWidget(QLabel):
-    def __init__(self, camera_id, parent=None):
-        super().__init__(parent)
-        self.camera_id = camera_id
-        self.setAlignment(Qt.AlignCenter)
-        self.setStyleSheet("background-color: black;")
-        self.setMinimumSize(320, 240)
-        
-    def update_frame(self, frame):
-        if frame is not None:
-            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            h, w, ch = frame.shape
-            bytes_per_line = ch * w
-            q_img = QImage(frame.data, w, h, bytes_per_line, QImage.Format_RGB888)
-            self.setPixmap(QPixmap.fromImage(q_img).scaled(
-                self.width(), self.height(), Qt.KeepAspectRatio))
-
-# Login Window
-class LoginWindow(QWidget):
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.parent = parent
-        self.setWindowTitle("Security Camera System - Login")
-        self.setFixedSize(400, 300)
-        
-        layout = QVBoxLayout()
-        
-        self.logo_label = QLabel()
-        self.logo_label.setPixmap(QPixmap("logo.png").scaled(200, 200, Qt.KeepAspectRatio))
-        self.logo_label.setAlignment(Qt.AlignCenter)
-        layout.addWidget(self.logo_label)
-        
-        self.username_input = QLineEdit()
-        self.username_input.setPlaceholderText("Username")
-        layout.addWidget(self.username_input)
-        
-        self.password_input = QLineEdit()
-        self.password_input.setPlaceholderText("Password")
-        self.password_input.setEchoMode(QLineEdit.Password)
-        layout.addWidget(self.password_input)
-        
-        self.login_btn = QPushButton("Login")
-        self.login_btn.clicked.connect(self.login_check)
-        layout.addWidget(self.login_btn)
-        
-        self.setLayout(layout)
-    
-    def login_check(self):
-        username = self.username_input.text()
-        password = self.password_input.text()
-        
-        conn = sqlite3.connect('personnel.db')
-        c = conn.cursor()
-        c.execute("SELECT * FROM personnel WHERE username=? AND password=?", (username, password))
-        user = c.fetchone()
-        conn.close()
-        
-        if user:
-            self.parent.username = user[1]
-            self.parent.authority = user[3]
-            self.parent.init_ui()
-            self.close()
-        else:
-            QMessageBox.warning(self, "Error", "Invalid username or password!")
-
-# Main Application Window
-class CameraSystem(QMainWindow):
-    def __init__(self):
-        super().__init__()
-        self.username = None
-        self.authority = None
-        self.cameras = []
-        self.camera_widgets = []
-        self.recording_managers = []
-        self.login_window = LoginWindow(self)
-        self.login_window.show()
-        
-        # Camera configuration
-        self.camera_count = 4
-        self.camera_layout = QGridLayout()
-        
-        # Recording settings
-        self.recording_duration = 10  # minutes
-        self.recording_folder = "recordings"
-        if not os.path.exists(self.recording_folder):
-            os.makedirs(self.recording_folder)
-    
-    def init_ui(self):
-        self.setWindowTitle(f"Security Camera System - {self.username} ({self.authority})")
-        self.setMinimumSize(1280, 720)
-        
-        # Central widget
-        central_widget = QWidget()
-        self.setCentralWidget(central_widget)
-        
-        # Main layout
-        main_layout = QVBoxLayout()
-        central_widget.setLayout(main_layout)
-        
-        # Menu bar
-        menubar = self.menuBar()
-        
-        # File menu
-        file_menu = menubar.addMenu('File')
-        
-        if self.authority == 'admin':
-            admin_action = file_menu.addAction('Admin Panel')
-            admin_action.triggered.connect(self.open_admin_panel)
-        
-        logout_action = file_menu.addAction('Logout')
-        logout_action.triggered.connect(self.logout)
-        
-        # Tabs
-        self.tab_widget = QTabWidget()
-        main_layout.addWidget(self.tab_widget)
-        
-        # Live View Tab
-        self.live_view_tab = QWidget()
-        self.live_view_layout = QVBoxLayout()
-        self.live_view_tab.setLayout(self.live_view_layout)
-        
-        self.camera_container = QWidget()
-        self.camera_container.setLayout(self.camera_layout)
-        self.live_view_layout.addWidget(self.camera_container)
-        
-        self.tab_widget.addTab(self.live_view_tab, "Live View")
-        
-        # History Tab
-        self.history_tab = QWidget()
-        self.history_layout = QVBoxLayout()
-        self.history_tab.setLayout(self.history_layout)
-        
-        # Filter section
-        filter_group = QGroupBox("Filters")
-        filter_layout = QHBoxLayout()
-        
-        self.camera_filter_combo = QComboBox()
-        self.camera_filter_combo.addItem("All Cameras", -1)
-        for i in range(self.camera_count):
-            self.camera_filter_combo.addItem(f"Camera {i+1}", i)
-        
-        self.date_filter = QDateEdit()
-        self.date_filter.setDate(QDate.currentDate())
-        self.date_filter.setCalendarPopup(True)
-        
-        self.filter_btn = QPushButton("Filter")
-        self.filter_btn.clicked.connect(self.filter_recordings)
-        
-        filter_layout.addWidget(QLabel("Camera:"))
-        filter_layout.addWidget(self.camera_filter_combo)
-        filter_layout.addWidget(QLabel("Date:"))
-        filter_layout.addWidget(self.date_filter)
-        filter_layout.addWidget(self.filter_btn)
-        filter_group.setLayout(filter_layout)
-        self.history_layout.addWidget(filter_group)
-        
-        # Recordings list
-        self.recordings_list = QListWidget()
-        self.recordings_list.itemDoubleClicked.connect(self.play_recording)
-        self.history_layout.addWidget(self.recordings_list)
-        
-        # Recording player
-        self.recording_player = CameraWidget(0)
-        self.recording_player.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
-        self.history_layout.addWidget(self.recording_player)
-        
-        self.tab_widget.addTab(self.history_tab, "History")
-        
-        # Mixed Mode Tab (Live + History)
-        if self.authority == 'admin':
-            self.mixed_mode_tab = QWidget()
-            self.mixed_mode_layout = QHBoxLayout()
-            self.mixed_mode_tab.setLayout(self.mixed_mode_layout)
-            
-            # Live section
-            live_group = QGroupBox("Live View")
-            live_layout = QVBoxLayout()
-            self.mixed_live_widget = CameraWidget(0)
-            live_layout.addWidget(self.mixed_live_widget)
-            live_group.setLayout(live_layout)
-            self.mixed_mode_layout.addWidget(live_group)
-            
-            # History section
-            history_group = QGroupBox("Recordings")
-            history_layout = QVBoxLayout()
-            
-            self.mixed_recordings_list = QListWidget()
-            self.mixed_recordings_list.itemDoubleClicked.connect(self.play_mixed_recording)
-            history_layout.addWidget(self.mixed_recordings_list)
-            
-            self.mixed_player = CameraWidget(0)
-            history_layout.addWidget(self.mixed_player)
-            
-            history_group.setLayout(history_layout)
-            self.mixed_mode_layout.addWidget(history_group)
-            
-            self.tab_widget.addTab(self.mixed_mode_tab, "Mixed Mode")
-        
-        # Initialize cameras
-        self.initialize_cameras()
-        
-        # Initialize recording managers
-        self.initialize_recording_managers()
-        
-        # Update recordings list
-        self.filter_recordings()
-        
-        # Start timers
-        self.live_update_timer = QTimer()
-        self.live_update_timer.timeout.connect(self.update_live)
-        self.live_update_timer.start(30)  # ~30 FPS
-        
-        if self.authority == 'admin':
-            self.mixed_update_timer = QTimer()
-            self.mixed_update_timer.timeout.connect(self.update_mixed)
-            self.mixed_update_timer.start(30)
-    
-    def initialize_cameras(self):
-        # Clear existing widgets
-        for i in reversed(range(self.camera_layout.count())): 
-            self.camera_layout.itemAt(i).widget().setParent(None)
-        
-        self.cameras = []
-        self.camera_widgets = []
-        
-        # Initialize cameras
-        for i in range(self.camera_count):
-            cap = cv2.VideoCapture(i)
-            if cap.isOpened():
-                self.cameras.append(cap)
-                
-                # Create camera widget
-                camera_widget = CameraWidget(i)
-                self.camera_widgets.append(camera_widget)
-                
-                # Add widget to layout (2x2 grid)
-                row = i // 2
-                col = i % 2
-                self.camera_layout.addWidget(camera_widget, row, col)
-            else:
-                print(f"Camera {i} initialization failed!")
-                self.cameras.append(None)
-                self.camera_widgets.append(None)
-    
-    def initialize_recording_managers(self):
-        self.recording_managers = []
-        
-        for i in range(self.camera_count):
-            if self.cameras[i] is not None:
-                recording_manager = RecordingManager(i, self.recording_folder, self.recording_duration)
-                self.recording_managers.append(recording_manager)
-            else:
-                self.recording_managers.append(None)
-    
-    def update_live(self):
-        for i, (camera, widget) in enumerate(zip(self.cameras, self.camera_widgets)):
-            if camera is not None and widget is not None:
-                ret, frame = camera.read()
-                if ret:
-                    widget.update_frame(frame)
-                    
-                    # Send frame to recording manager
-                    if self.recording_managers[i] is not None:
-                        self.recording_managers[i].record_frame(frame)
-    
-    def update_mixed(self):
-        if self.cameras[0] is not None and hasattr(self, 'mixed_live_widget'):
-            ret, frame = self.cameras[0].read()
-            if ret:
-                self.mixed_live_widget.update_frame(frame)
-    
-    def filter_recordings(self):
-        self.recordings_list.clear()
-        
-        camera_id = self.camera_filter_combo.currentData()
-        date = self.date_filter.date().toString("yyyy-MM-dd")
-        
-        conn = sqlite3.connect('camera_recordings.db')
-        c = conn.cursor()
-        
-        if camera_id == -1:  # All cameras
-            c.execute("SELECT * FROM recordings WHERE start_time LIKE ? ORDER BY start_time DESC", 
-                     (f"{date}%",))
-        else:
-            c.execute("SELECT * FROM recordings WHERE camera_id=? AND start_time LIKE ? ORDER BY start_time DESC", 
-                     (camera_id, f"{date}%"))
-        
-        recordings = c.fetchall()
-        conn.close()
-        
-        for recording in recordings:
-            item_text = f"Camera {recording[1]} - {recording[2]}"
-            self.recordings_list.addItem(item_text)
-            self.recordings_list.item(self.recordings_list.count()-1).setData(Qt.UserRole, recording[3])
-        
-        if self.authority == 'admin':
-            self.mixed_recordings_list.clear()
-            for recording in recordings:
-                item_text = f"Camera {recording[1]} - {recording[2]}"
-                self.mixed_recordings_list.addItem(item_text)
-                self.mixed_recordings_list.item(self.mixed_recordings_list.count()-1).setData(Qt.UserRole, recording[3])
-    
-    def play_recording(self, item):
-        file_path = item.data(Qt.UserRole)
-        self.play_video(file_path, self.recording_player)
-    
-    def play_mixed_recording(self, item):
-        file_path = item.data(Qt.UserRole)
-        self.play_video(file_path, self.mixed_player)
-    
-    def play_video(self, file_path, widget):
-        if hasattr(self, 'video_cap'):
-            self.video_cap.release()
-        
-        self.video_cap = cv2.VideoCapture(file_path)
-        
-        if not hasattr(self, 'video_timer'):
-            self.video_timer = QTimer()
-            self.video_timer.timeout.connect(lambda: self.update_video(widget))
-        
-        self.video_timer.start(30)
-    
-    def update_video(self, widget):
-        ret, frame = self.video_cap.read()
-        if ret:
-            widget.update_frame(frame)
-        else:
-            self.video_timer.stop()
-            self.video_cap.release()
-    
-    def open_admin_panel(self):
-        self.admin_panel = AdminPanel(self)
-        self.admin_panel.show()
-    
-    def logout(self):
-        # Release resources
-        for camera in self.cameras:
-            if camera is not None:
-                camera.release()
-        
-        for recording_manager in self.recording_managers:
-            if recording_manager is not None:
-                recording_manager.stop_recording()
-        
-        if hasattr(self, 'video_cap'):
-            self.video_cap.release()
-        
-        self.login_window.show()
-        self.close()
-
-# Recording Manager Class
-class RecordingManager:
-    def __init__(self, camera_id, recording_folder, recording_duration_min):
-        self.camera_id = camera_id
-        self.recording_folder = recording_folder
-        self.recording_duration = recording_duration_min * 60  # convert to seconds
-        self.recording_start = None
-        self.video_writer = None
-        self.file_path = None
-    
-    def record_frame(self, frame):
-        now = datetime.now()
-        
-        # Check if new recording should be started
-        if self.recording_start is None or (now - self.recording_start).total_seconds() > self.recording_duration:
-            self.stop_recording()
-            self.start_recording(now)
-        
-        # Write frame
-        if self.video_writer is not None:
-            self.video_writer.write(frame)
-    
-    def start_recording(self, start_time):
-        self.recording_start = start_time
-        file_name = f"camera_{self.camera_id}_{start_time.strftime('%Y%m%d_%H%M%S')}.avi"
-        self.file_path = os.path.join(self.recording_folder, file_name)
-        
-        fourcc = cv2.VideoWriter_fourcc(*'XVID')
-        self.video_writer = cv2.VideoWriter(self.file_path, fourcc, 20.0, (640, 480))
-        
-        # Save to database
-        conn = sqlite3.connect('camera_recordings.db')
-        c = conn.cursor()
-        c.execute("INSERT INTO recordings (camera_id, start_time, file_path) VALUES (?, ?, ?)",
-                  (self.camera_id, start_time.strftime("%Y-%m-%d %H:%M:%S"), self.file_path))
-        conn.commit()
-        conn.close()
-    
-    def stop_recording(self):
-        if self.video_writer is not None:
-            self.video_writer.release()
-            self.video_writer = None
-            self.recording_start = None
-
-# Admin Panel
-class AdminPanel(QWidget):
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.parent = parent
-        self.setWindowTitle("Admin Panel")
-        self.setFixedSize(600, 400)
-        
-        layout = QVBoxLayout()
-        
-        # Personnel Management
-        personnel_group = QGroupBox("Personnel Management")
-        personnel_layout = QVBoxLayout()
-        
-        # Personnel list
-        self.personnel_list = QListWidget()
-        self.personnel_list.itemClicked.connect(self.personnel_selected)
-        personnel_layout.addWidget(self.personnel_list)
-        
-        # Personnel details
-        detail_layout = QHBoxLayout()
-        
-        left_layout = QVBoxLayout()
-        self.username_input = QLineEdit()
-        self.username_input.setPlaceholderText("Username")
-        left_layout.addWidget(self.username_input)
-        
-        self.password_input = QLineEdit()
-        self.password_input.setPlaceholderText("Password")
-        self.password_input.setEchoMode(QLineEdit.Password)
-        left_layout.addWidget(self.password_input)
-        
-        self.authority_combo = QComboBox()
-        self.authority_combo.addItems(["security", "admin"])
-        left_layout.addWidget(self.authority_combo)
-        
-        detail_layout.addLayout(left_layout)
-        
-        right_layout = QVBoxLayout()
-        self.add_btn = QPushButton("Add New")
-        self.add_btn.clicked.connect(self.add_personnel)
-        right_layout.addWidget(self.add_btn)
-        
-        self.update_btn = QPushButton("Update")
-        self.update_btn.clicked.connect(self.update_personnel)
-        right_layout.addWidget(self.update_btn)
-        
-        self.delete_btn = QPushButton("Delete")
-        self.delete_btn.clicked.connect(self.delete_personnel)
-        right_layout.addWidget(self.delete_btn)
-        
-        detail_layout.addLayout(right_layout)
-        personnel_layout.addLayout(detail_layout)
-        personnel_group.setLayout(personnel_layout)
-        layout.addWidget(personnel_group)
-        
-        # System Settings
-        settings_group = QGroupBox("System Settings")
-        settings_layout = QVBoxLayout()
-        
-        self.camera_count_input = QLineEdit()
-        self.camera_count_input.setPlaceholderText(f"Current Camera Count: {self.parent.camera_count}")
-        settings_layout.addWidget(self.camera_count_input)
-        
-        self.recording_duration_input = QLineEdit()
-        self.recording_duration_input.setPlaceholderText(f"Recording Duration (min): {self.parent.recording_duration}")
-        settings_layout.addWidget(self.recording_duration_input)
-        
-        self.recording_folder_btn = QPushButton("Change Recording Folder")
-        self.recording_folder_btn.clicked.connect(self.change_recording_folder)
-        settings_layout.addWidget(self.recording_folder_btn)
-        
-        self.save_settings_btn = QPushButton("Save Settings")
-        self.save_settings_btn.clicked.connect(self.save_settings)
-        settings_layout.addWidget(self.save_settings_btn)
-        
-        settings_group.setLayout(settings_layout)
-        layout.addWidget(settings_group)
-        
-        self.setLayout(layout)
-        
-        # Update personnel list
-        self.update_personnel_list()
-    
-    def update_personnel_list(self):
-        self.personnel_list.clear()
-        
-        conn = sqlite3.connect('personnel.db')
-        c = conn.cursor()
-        c.execute("SELECT * FROM personnel")
-        personnel = c.fetchall()
-        conn.close()
-        
-        for person in personnel:
-            item_text = f"{person[1]} ({person[3]})"
-            self.personnel_list.addItem(item_text)
-            self.personnel_list.item(self.personnel_list.count()-1).setData(Qt.UserRole, person[0])
-    
-    def personnel_selected(self, item):
-        person_id = item.data(Qt.UserRole)
-        
-        conn = sqlite3.connect('personnel.db')
-        c = conn.cursor()
-        c.execute("SELECT * FROM personnel WHERE id=?", (person_id,))
-        person = c.fetchone()
-        conn.close()
-        
-        if person:
-            self.username_input.setText(person[1])
-            self.password_input.setText(person[2])
-            self.authority_combo.setCurrentText(person[3])
-    
-    def add_personnel(self):
-        username = self.username_input.text()
-        password = self.password_input.text()
-        authority = self.authority_combo.currentText()
-        
-        if not username or not password:
-            QMessageBox.warning(self, "Error", "Username and password cannot be empty!")
-            return
-        
-        conn = sqlite3.connect('personnel.db')
-        c = conn.cursor()
-        
-        try:
-            c.execute("INSERT INTO personnel (username, password, authority) VALUES (?, ?, ?)",
-                      (username, password, authority))
-            conn.commit()
-            QMessageBox.information(self, "Success", "Personnel added successfully!")
-            self.update_personnel_list()
-        except sqlite3.IntegrityError:
-            QMessageBox.warning(self, "Error", "Username already exists!")
-        finally:
-            conn.close()
-    
-    def update_personnel(self):
-        current_item = self.personnel_list.currentItem()
-        if not current_item:
-            QMessageBox.warning(self, "Error", "Please select a personnel!")
-            return
-        
-        person_id = current_item.data(Qt.UserRole)
-        username = self.username_input.text()
-        password = self.password_input.text()
-        authority = self.authority_combo.currentText()
-        
-        if not username or not password:
-            QMessageBox.warning(self, "Error", "Username and password cannot be empty!")
-            return
-        
-        conn = sqlite3.connect('personnel.db')
-        c = conn.cursor()
-        
-        try:
-            c.execute("UPDATE personnel SET username=?, password=?, authority=? WHERE id=?",
-                      (username, password, authority, person_id))
-            conn.commit()
-            QMessageBox.information(self, "Success", "Personnel updated successfully!")
-            self.update_personnel_list()
-        except sqlite3.IntegrityError:
-            QMessageBox.warning(self, "Error", "Username already exists!")
-        finally:
-            conn.close()
-    
-    def delete_personnel(self):
-        current_item = self.personnel_list.currentItem()
-        if not current_item:
-            QMessageBox.warning(self, "Error", "Please select a personnel!")
-            return
-        
-        person_id = current_item.data(Qt.UserRole)
-        
-        # Check if admin
-        conn = sqlite3.connect('personnel.db')
-        c = conn.cursor()
-        c.execute("SELECT authority FROM personnel WHERE id=?", (person_id,))
-        authority = c.fetchone()[0]
-        
-        if authority == "admin":
-            QMessageBox.warning(self, "Error", "Admin account cannot be deleted!")
-            conn.close()
-            return
-        
-        reply = QMessageBox.question(self, 'Confirmation', 'Are you sure you want to delete this personnel?',
-                                    QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
-        
-        if reply == QMessageBox.Yes:
-            c.execute("DELETE FROM personnel WHERE id=?", (person_id,))
-            conn.commit()
-            QMessageBox.information(self, "Success", "Personnel deleted successfully!")
-            self.update_personnel_list()
-        
-        conn.close()
-    
-    def change_recording_folder(self):
-        folder = QFileDialog.getExistingDirectory(self, "Select Recording Folder")
-        if folder:
-            self.parent.recording_folder = folder
-            QMessageBox.information(self, "Success", f"Recording folder set to {folder}!")
-    
-    def save_settings(self):
-        # Camera count
-        if self.camera_count_input.text():
-            try:
-                new_count = int(self.camera_count_input.text())
-                if new_count > 0:
-                    self.parent.camera_count = new_count
-                    self.parent.initialize_cameras()
-                    self.parent.initialize_recording_managers()
-                else:
-                    QMessageBox.warning(self, "Error", "Camera count must be greater than 0!")
-            except ValueError:
-                QMessageBox.warning(self, "Error", "Invalid camera count!")
-        
-        # Recording duration
-        if self.recording_duration_input.text():
-            try:
-                new_duration = int(self.recording_duration_input.text())
-                if new_duration > 0:
-                    self.parent.recording_duration = new_duration
-                    for manager in self.parent.recording_managers:
-                        if manager is not None:
-                            manager.recording_duration = new_duration * 60
-                else:
-                    QMessageBox.warning(self, "Error", "Recording duration must be greater than 0!")
-            except ValueError:
-                QMessageBox.warning(self, "Error", "Invalid recording duration!")
-        
-        QMessageBox.information(self, "Success", "Settings saved successfully!")
-
-# Start application
-if __name__ == "__main__":
-    init_databases()
-    app = QApplication(sys.argv)
-    app.setStyle('Fusion')
-    
-    # Check logo file
-    if not os.path.exists("logo.png"):
-        # Create default logo (optional)
-        from PIL import Image, ImageDraw, ImageFont
-        img = Image.new('RGB', (200, 200), color=(70, 130, 180))
-        d = ImageDraw.Draw(img)
-        try:
-            font = ImageFont.truetype("arial.ttf", 20)
-        except:
-            font = ImageFont.load_default()
-        d.text((10, 80), "Security Camera\n      System", fill=(255, 255, 255), font=font)
-        img.save("logo.png")
-    
-    window = CameraSystem()
-    sys.exit(app.exec_())
\ No newline at end of file
+import sys
+import os
+import time
+import json
+import hmac
+import signal
+import socket
+import struct
+import argparse
+import math
+import shutil
+import secrets
+import tempfile
+import subprocess
+import threading
+import queue
+import cv2
+import numpy as np
+import sqlite3
+from collections import deque, OrderedDict
+from concurrent.futures import Future, as_completed
+from multiprocessing import shared_memory
+from datetime import datetime, timedelta
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
+                             QLabel, QPushButton, QLineEdit, QComboBox, QTabWidget, 
+                             QGridLayout, QMessageBox, QFileDialog, QGroupBox, QDateEdit, 
+                             QTimeEdit, QListWidget, QListView, QStackedWidget, QSizePolicy,
+                             QSlider, QCheckBox, QTableWidget, QTableWidgetItem, QHeaderView)
+from PyQt5.QtCore import (Qt, QTimer, QDateTime, QDate, QTime, QEvent, pyqtSignal,
+                          QAbstractListModel, QModelIndex, QPoint, QObject)
+from PyQt5.QtGui import QImage, QPixmap, QIcon, QPainter, QColor, QPolygon
+
+# Performance telemetry: per-camera rolling samples of pipeline stage timings.
+# Adding a sample is one array store; percentiles are only computed when someone reads them.
+# Several threads can feed one histogram (e.g. two tiles of the same camera), hence the lock.
+class RollingHistogram:
+    def __init__(self, size=1024):
+        self.samples = np.zeros(size)
+        self.count = 0
+        self.lock = threading.Lock()
+    
+    def add(self, value):
+        with self.lock:
+            self.samples[self.count % len(self.samples)] = value
+            self.count += 1
+    
+    def window(self):
+        # (copy of the retained samples, total samples added)
+        with self.lock:
+            return self.samples[:min(self.count, len(self.samples))].copy(), self.count
+    
+    def reset(self):
+        with self.lock:
+            self.count = 0
+
+def percentile_summary(samples, count):
+    if len(samples) == 0:
+        return None
+    p50, p95, p99 = np.percentile(samples, (50, 95, 99))
+    return {'count': count, 'p50': float(p50), 'p95': float(p95), 'p99': float(p99)}
+
+class Telemetry:
+    WINDOW = 1024  # samples kept per camera and stage
+    COUNT_METRICS = ('queue_depth',)  # sampled counts; every other stage is in seconds
+    
+    def __init__(self):
+        self.histograms = {}  # (camera_id or None for process-wide stages, stage) -> RollingHistogram
+        self.lock = threading.Lock()
+    
+    def histogram(self, camera_id, stage):
+        # Producers look their histogram up once and keep it, so the hot path never touches the dict
+        key = (camera_id, stage)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            with self.lock:
+                histogram = self.histograms.setdefault(key, RollingHistogram(self.WINDOW))
+        return histogram
+    
+    def percentiles(self, camera_id, stage):
+        histogram = self.histograms.get((camera_id, stage))
+        return None if histogram is None else percentile_summary(*histogram.window())
+    
+    def summary(self, stage):
+        # One stage over every camera, e.g. for a load benchmark
+        windows = [h.window() for (_, name), h in list(self.histograms.items()) if name == stage]
+        if not windows:
+            return None
+        return percentile_summary(np.concatenate([samples for samples, _ in windows]), sum(count for _, count in windows))
+    
+    def snapshot(self):
+        cameras = {}
+        for (camera_id, stage), histogram in sorted(list(self.histograms.items()), key=lambda item: str(item[0])):
+            summary = percentile_summary(*histogram.window())
+            if summary is not None:
+                cameras.setdefault('all' if camera_id is None else camera_id, {})[stage] = summary
+        return cameras
+    
+    def prometheus_text(self):
+        lines = ["# TYPE ghost_iron_stage_seconds summary", "# TYPE ghost_iron_queue_depth summary"]
+        for camera_id, stages in self.snapshot().items():
+            for stage, summary in stages.items():
+                if stage in self.COUNT_METRICS:
+                    name, labels = f"ghost_iron_{stage}", f'camera="{camera_id}"'
+                else:
+                    name, labels = "ghost_iron_stage_seconds", f'camera="{camera_id}",stage="{stage}"'
+                for key, quantile in (('p50', '0.5'), ('p95', '0.95'), ('p99', '0.99')):
+                    lines.append(f'{name}{{{labels},quantile="{quantile}"}} {summary[key]:.6g}')
+                lines.append(f"{name}_count{{{labels}}} {summary['count']}")
+        return "\n".join(lines) + "\n"
+    
+    def reset(self):
+        for histogram in list(self.histograms.values()):
+            histogram.reset()
+
+telemetry = Telemetry()
+
+# Database access layer (WAL mode, one batching writer thread, pooled readers)
+class Database:
+    PRAGMAS = ("PRAGMA journal_mode=WAL",
+               "PRAGMA synchronous=NORMAL",
+               "PRAGMA temp_store=MEMORY",
+               "PRAGMA cache_size=-16000",
+               "PRAGMA mmap_size=268435456",
+               "PRAGMA busy_timeout=5000")
+    
+    def __init__(self, path, reader_count=4, batch_size=256):
+        self.path = path
+        self.batch_size = batch_size
+        
+        # Readers never wait on the writer in WAL mode
+        self.readers = queue.Queue()
+        for _ in range(reader_count):
+            self.readers.put(self.connect())
+        
+        self.write_queue = queue.Queue()
+        self.writer_thread = threading.Thread(target=self.write_loop, daemon=True)
+        self.writer_thread.start()
+    
+    def connect(self):
+        # sqlite3 keeps compiled statements per connection, keyed by SQL text
+        conn = sqlite3.connect(self.path, check_same_thread=False, cached_statements=256)
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        return conn
+    
+    def query(self, sql, params=(), one=False):
+        conn = self.readers.get()
+        try:
+            cursor = conn.execute(sql, params)
+            return cursor.fetchone() if one else cursor.fetchall()
+        finally:
+            self.readers.put(conn)
+    
+    def submit(self, sql, params=(), many=False):
+        # Queue a write for the writer thread; the future holds lastrowid (rowcount for many).
+        # sql may also be a callable(conn), run all-or-nothing; the future holds its result
+        future = Future()
+        self.write_queue.put((sql, params, many, future))
+        return future
+    
+    def execute(self, sql, params=()):
+        return self.submit(sql, params).result()
+    
+    def write_loop(self):
+        conn = self.connect()
+        commit_histogram = telemetry.histogram(None, 'db_commit')
+        running = True
+        while running:
+            batch = [self.write_queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.write_queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            # One transaction per batch; a failing statement only fails its own future
+            results = []
+            commit_start = time.perf_counter()
+            try:
+                with conn:
+                    for item in batch:
+                        if item is None:
+                            running = False
+                            continue
+                        sql, params, many, future = item
+                        try:
+                            if callable(sql):
+                                results.append((future, self.run_atomic(conn, sql), None))
+                            elif many:
+                                results.append((future, conn.executemany(sql, params).rowcount, None))
+                            else:
+                                results.append((future, conn.execute(sql, params).lastrowid, None))
+                        except Exception as e:  # the writer thread must outlive any one write
+                            results.append((future, None, e))
+            except sqlite3.Error as e:
+                results = [(future, None, e) for future, _, _ in results]
+            commit_histogram.add(time.perf_counter() - commit_start)
+            for future, result, error in results:
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+        conn.close()
+    
+    def run_atomic(self, conn, function):
+        # A savepoint inside the batch transaction, so a failure undoes only this function's writes
+        conn.execute("SAVEPOINT atomic")
+        try:
+            result = function(conn)
+        except BaseException:
+            conn.execute("ROLLBACK TO atomic")
+            conn.execute("RELEASE atomic")
+            raise
+        conn.execute("RELEASE atomic")
+        return result
+    
+    def migrate(self, migrations):
+        # migrations[n] upgrades the schema from user_version n to n + 1; a step is SQL or a callable(conn)
+        conn = self.connect()
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for index in range(version, len(migrations)):
+            with conn:
+                for statement in migrations[index]:
+                    if callable(statement):
+                        statement(conn)
+                    else:
+                        conn.execute(statement)
+                conn.execute(f"PRAGMA user_version={index + 1}")
+        conn.close()
+    
+    def close(self):
+        self.write_queue.put(None)
+        self.writer_thread.join()
+        while not self.readers.empty():
+            self.readers.get().close()
+
+personnel_db = None
+recordings_db = None
+
+def close_open_segments(conn):
+    # Segments without an end: rows from before per-segment metadata, or left open by a crash.
+    # Each ends at the next segment of its camera or its file's last write, whichever is first,
+    # and is sized from its file, so retention can count and evict it
+    rows = conn.execute("SELECT id, camera_id, start_ts, file_path FROM recordings WHERE end_ts IS NULL").fetchall()
+    updates = []
+    for recording_id, camera_id, start_ts, file_path in rows:
+        try:
+            size_bytes = os.path.getsize(file_path)
+            last_write = int(os.path.getmtime(file_path))
+        except (OSError, TypeError):
+            size_bytes, last_write = 0, None
+        if file_path and os.path.exists(thumbnail_path(file_path)):
+            size_bytes += os.path.getsize(thumbnail_path(file_path))
+        if start_ts is None:
+            start_ts = last_write or 0
+        end_ts = start_ts if last_write is None else max(last_write, start_ts)
+        next_start = conn.execute("SELECT MIN(start_ts) FROM recordings WHERE camera_id=? AND start_ts > ?",
+                                  (camera_id, start_ts)).fetchone()[0]
+        if next_start is not None:
+            end_ts = min(end_ts, next_start)
+        updates.append((start_ts, datetime.fromtimestamp(end_ts).strftime("%Y-%m-%d %H:%M:%S"), end_ts,
+                        end_ts - start_ts, size_bytes, recording_id))
+    conn.executemany("UPDATE recordings SET start_ts=?, end_time=?, end_ts=?, duration=?, size_bytes=? WHERE id=?",
+                     updates)
+    return len(updates)
+
+def size_digest_files(conn):
+    # Digests and pending parts written before their sizes were recorded
+    for table, column in (('digests', 'file_path'), ('digest_parts', 'part_path')):
+        rows = conn.execute(f"SELECT rowid, {column} FROM {table} WHERE {column} IS NOT NULL").fetchall()
+        updates = []
+        for rowid, path in rows:
+            try:
+                updates.append((os.path.getsize(path), rowid))
+            except OSError:
+                updates.append((0, rowid))  # not assembled yet, or already gone
+        conn.executemany(f"UPDATE {table} SET size_bytes=? WHERE rowid=?", updates)
+
+# Schema upgrades for camera_recordings.db, applied in order on startup
+RECORDINGS_MIGRATIONS = [
+    # 1: integer epoch timestamps and range indexes replacing LIKE scans on start_time
+    ["ALTER TABLE recordings ADD COLUMN start_ts INTEGER",
+     "UPDATE recordings SET start_ts = CAST(strftime('%s', start_time, 'utc') AS INTEGER)",
+     "CREATE INDEX IF NOT EXISTS idx_recordings_camera_start ON recordings (camera_id, start_ts)",
+     "CREATE INDEX IF NOT EXISTS idx_recordings_start ON recordings (start_ts)",
+     "ALTER TABLE motion_events ADD COLUMN start_ts INTEGER",
+     "ALTER TABLE motion_events ADD COLUMN end_ts INTEGER",
+     "UPDATE motion_events SET start_ts = CAST(strftime('%s', start_time, 'utc') AS INTEGER), "
+     "end_ts = CAST(strftime('%s', end_time, 'utc') AS INTEGER)",
+     "CREATE INDEX IF NOT EXISTS idx_motion_events_camera_start ON motion_events (camera_id, start_ts)"],
+    # 2: per-segment metadata written when the segment closes
+    ["ALTER TABLE recordings ADD COLUMN end_time TEXT",
+     "ALTER TABLE recordings ADD COLUMN end_ts INTEGER",
+     "ALTER TABLE recordings ADD COLUMN duration REAL",
+     "ALTER TABLE recordings ADD COLUMN size_bytes INTEGER",
+     "ALTER TABLE recordings ADD COLUMN frame_count INTEGER",
+     "ALTER TABLE recordings ADD COLUMN fps REAL"],
+    # 3: segments that contain motion are kept longer by retention
+    ["ALTER TABLE recordings ADD COLUMN motion INTEGER DEFAULT 0"],
+    # 4: thumbnail index into the per-segment sprite files written at record time
+    ["ALTER TABLE recordings ADD COLUMN thumb_width INTEGER",
+     "ALTER TABLE recordings ADD COLUMN thumb_height INTEGER",
+     '''CREATE TABLE IF NOT EXISTS thumbnails
+        (recording_id INTEGER, camera_id INTEGER, ts INTEGER, slot INTEGER)''',
+     "CREATE INDEX IF NOT EXISTS idx_thumbnails_camera_ts ON thumbnails (camera_id, ts)",
+     "CREATE INDEX IF NOT EXISTS idx_thumbnails_recording ON thumbnails (recording_id, slot)"],
+    # 5: per-segment ROI change scores from motion searches (float32 blobs), reused by later searches
+    ['''CREATE TABLE IF NOT EXISTS motion_search_cache
+        (recording_id INTEGER, roi TEXT, sample_fps REAL, times BLOB, scores BLOB,
+         PRIMARY KEY (recording_id, roi, sample_fps))'''],
+    # 6: per-camera burn-in names and privacy mask polygons (JSON, normalised frame coordinates)
+    ['''CREATE TABLE IF NOT EXISTS camera_overlays
+        (camera_id INTEGER PRIMARY KEY, name TEXT, masks TEXT)'''],
+    # 7: time-lapse digests per camera and period, and the segments already sampled into them
+    ['''CREATE TABLE IF NOT EXISTS digests
+        (id INTEGER PRIMARY KEY AUTOINCREMENT, camera_id INTEGER, period_start_ts INTEGER,
+         period_end_ts INTEGER, file_path TEXT, frame_count INTEGER DEFAULT 0, segment_count INTEGER DEFAULT 0,
+         complete INTEGER DEFAULT 0, updated_ts INTEGER, UNIQUE (camera_id, period_start_ts))''',
+     '''CREATE TABLE IF NOT EXISTS digest_parts
+        (recording_id INTEGER PRIMARY KEY, digest_id INTEGER, start_ts INTEGER, part_path TEXT, frame_count INTEGER)''',
+     "CREATE INDEX IF NOT EXISTS idx_digest_parts_digest ON digest_parts (digest_id, start_ts)"],
+    # 8: the encoder addresses its open segment's row by file path instead of waiting for its id
+    ["CREATE INDEX IF NOT EXISTS idx_recordings_file_path ON recordings (file_path)"],
+    # 9: retention removes a segment's motion events together with its row
+    ["CREATE INDEX IF NOT EXISTS idx_motion_events_file_path ON motion_events (file_path)"],
+    # 10: end and size for segments that never got them, so retention counts and evicts them
+    [close_open_segments],
+    # 11: JPEG thumbnails in the sprite files, located by byte range (NULL for raw sprites)
+    ["ALTER TABLE thumbnails ADD COLUMN byte_offset INTEGER",
+     "ALTER TABLE thumbnails ADD COLUMN byte_length INTEGER"],
+    # 12: digest and part sizes, so retention tracks them like segments instead of scanning folders
+    ["ALTER TABLE digests ADD COLUMN size_bytes INTEGER",
+     "ALTER TABLE digest_parts ADD COLUMN size_bytes INTEGER",
+     size_digest_files],
+]
+
+# Database initialization
+def init_databases():
+    global personnel_db, recordings_db
+    
+    # Personnel database
+    personnel_db = Database('personnel.db')
+    personnel_db.execute('''CREATE TABLE IF NOT EXISTS personnel
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                 username TEXT UNIQUE,
+                 password TEXT,
+                 authority TEXT)''')
+    
+    # Default admin account (if not exists)
+    if not personnel_db.query("SELECT * FROM personnel WHERE username='admin'", one=True):
+        personnel_db.execute("INSERT INTO personnel (username, password, authority) VALUES (?, ?, ?)",
+                             ('admin', 'admin123', 'admin'))
+    
+    # Camera recordings database
+    recordings_db = Database('camera_recordings.db')
+    recordings_db.execute('''CREATE TABLE IF NOT EXISTS recordings
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                 camera_id INTEGER,
+                 start_time TEXT,
+                 file_path TEXT)''')
+    recordings_db.execute('''CREATE TABLE IF NOT EXISTS motion_events
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                 camera_id INTEGER,
+                 start_time TEXT,
+                 end_time TEXT,
+                 peak_score REAL,
+                 file_path TEXT)''')
+    recordings_db.migrate(RECORDINGS_MIGRATIONS)
+
+def thumbnail_path(file_path):
+    # Sprite file of a segment: JPEG thumbnails back to back, located by their thumbnails rows
+    # (segments recorded before JPEG sprites hold raw BGR thumbnails of equal size instead)
+    return os.path.splitext(file_path)[0] + '.thumbs'
+
+# Thumbnail lookups in the sprite files, decoded on demand
+class ThumbnailStore:
+    def __init__(self, cache_size=256):
+        self.cache_size = cache_size
+        self.thumbnails = OrderedDict()  # (recording_id, slot) -> BGR image
+    
+    def thumbnail(self, recording_id, slot):
+        key = (recording_id, slot)
+        image = self.thumbnails.get(key)
+        if image is not None:
+            self.thumbnails.move_to_end(key)
+            return image
+        row = recordings_db.query("SELECT r.file_path, r.thumb_width, r.thumb_height, t.byte_offset, t.byte_length "
+                                  "FROM thumbnails t JOIN recordings r ON r.id = t.recording_id "
+                                  "WHERE t.recording_id=? AND t.slot=?", (recording_id, slot), one=True)
+        if row is None:
+            return None
+        image = self.read(*row, slot)
+        if image is None:
+            return None
+        self.thumbnails[key] = image
+        if len(self.thumbnails) > self.cache_size:
+            self.thumbnails.popitem(last=False)
+        return image
+    
+    @staticmethod
+    def read(file_path, width, height, byte_offset, byte_length, slot):
+        raw = byte_offset is None
+        if raw:
+            # Raw sprite: slot-sized records
+            if not width:
+                return None
+            byte_length = width * height * 3
+            byte_offset = slot * byte_length
+        try:
+            with open(thumbnail_path(file_path), 'rb') as f:
+                f.seek(byte_offset)
+                data = f.read(byte_length)
+        except OSError:
+            return None
+        if len(data) < byte_length:
+            return None
+        if raw:
+            return np.frombuffer(data, dtype=np.uint8).reshape(height, width, 3)
+        return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    
+    def thumbnail_at(self, camera_id, timestamp):
+        # Nearest earlier thumbnail, unless the position falls in a recording gap
+        row = recordings_db.query("SELECT recording_id, slot FROM thumbnails WHERE camera_id=? AND ts <= ? AND ts > ? "
+                                  "ORDER BY ts DESC LIMIT 1",
+                                  (camera_id, int(timestamp),
+                                   int(timestamp) - 2 * RecordingManager.THUMBNAIL_INTERVAL), one=True)
+        if row is None:
+            return None
+        return self.thumbnail(*row)
+    
+    def filmstrip(self, recording_id, count=8):
+        # Up to count thumbnails spread evenly over the segment, side by side
+        slots = [slot for (slot,) in recordings_db.query("SELECT slot FROM thumbnails WHERE recording_id=? "
+                                                         "ORDER BY slot", (recording_id,))]
+        if not slots:
+            return None
+        picks = np.linspace(0, len(slots) - 1, min(count, len(slots))).astype(int)
+        images = [self.thumbnail(recording_id, slots[i]) for i in picks]
+        images = [image for image in images if image is not None]
+        if not images:
+            return None
+        return np.ascontiguousarray(np.hstack(images))
+
+thumbnail_store = ThumbnailStore()
+
+def numpy_to_pixmap(image):
+    height, width = image.shape[:2]
+    return QPixmap.fromImage(QImage(image.data, width, height, width * 3, QImage.Format_BGR888))
+
+def find_segment(camera_id, timestamp):
+    # Segment of camera_id covering the epoch timestamp, with the frame offset into its file
+    row = recordings_db.query(
+        "SELECT id, file_path, start_ts, end_ts, fps, frame_count FROM recordings "
+        "WHERE camera_id=? AND start_ts <= ? ORDER BY start_ts DESC LIMIT 1",
+        (camera_id, int(timestamp)), one=True)
+    if row is None:
+        return None
+    recording_id, file_path, start_ts, end_ts, fps, frame_count = row
+    if end_ts is not None and timestamp >= end_ts:
+        return None  # falls in a gap after this segment
+    frame_offset = int((timestamp - start_ts) * fps) if fps else 0
+    if frame_count:
+        frame_offset = min(frame_offset, frame_count - 1)
+    return {'id': recording_id,
+            'file_path': file_path,
+            'start_ts': start_ts,
+            'end_ts': end_ts,
+            'fps': fps,
+            'frame_offset': frame_offset}
+
+def load_camera_overlays():
+    # Returns ({camera_id: name}, {camera_id: [mask, ...]})
+    names, masks = {}, {}
+    for camera_id, name, mask_json in recordings_db.query("SELECT camera_id, name, masks FROM camera_overlays"):
+        if name:
+            names[camera_id] = name
+        if mask_json:
+            masks[camera_id] = json.loads(mask_json)
+    return names, masks
+
+def save_camera_overlays(names, masks):
+    # Whole table replaced in one writer batch
+    rows = [(camera_id, names.get(camera_id), json.dumps(masks[camera_id]) if masks.get(camera_id) else None)
+            for camera_id in sorted(set(names) | set(masks))]
+    recordings_db.submit("DELETE FROM camera_overlays")
+    recordings_db.submit("INSERT INTO camera_overlays (camera_id, name, masks) VALUES (?, ?, ?)",
+                         rows, many=True).result()
+
+def close_databases():
+    for db in (personnel_db, recordings_db):
+        if db is not None:
+            db.close()
+
+# Frame buffer rotation: frames are decoded into pre-allocated slots, and a slot handed to
+# subscribers is only reused after size - 1 more frames
+class FrameRing:
+    def __init__(self, size=4):
+        self.size = size
+        self.slots = [None] * size
+        self.index = 0  # slot of the latest published frame
+    
+    def next_buffer(self):
+        return self.slots[(self.index + 1) % self.size]
+    
+    def publish(self, frame):
+        index = (self.index + 1) % self.size
+        if self.slots[index] is not frame:
+            # First frame or resolution change: (re)allocate every slot once
+            self.slots = [frame if j == index else np.empty_like(frame) for j in range(self.size)]
+        self.index = index
+
+# Frame broadcaster (each frame decoded once, fanned out by reference)
+class FrameBroadcaster:
+    def __init__(self, camera_id):
+        self.camera_id = camera_id
+        # Subscriber tuple is replaced, never mutated, so publishing needs no lock
+        self.subscribers = ()  # called on the capture thread for every frame
+        self.lock = threading.Lock()
+    
+    def subscribe(self, callback):
+        with self.lock:
+            if callback not in self.subscribers:
+                self.subscribers = self.subscribers + (callback,)
+    
+    def unsubscribe(self, callback):
+        with self.lock:
+            self.subscribers = tuple(s for s in self.subscribers if s != callback)
+    
+    def publish(self, frame, timestamp):
+        for callback in self.subscribers:
+            try:
+                callback(frame, timestamp)
+            except Exception as e:
+                print(f"Camera {self.camera_id} subscriber error: {e}")
+
+def scale_frame(frame, size, halving_buffers, dst=None):
+    # INTER_AREA is only fast for exact 2x steps, so halve while the frame is at least
+    # twice the target and finish with a short bilinear step; halving_buffers is the
+    # caller's list of reused intermediate frames
+    w, h = size
+    source = frame
+    level = 0
+    while source.shape[1] >= 2 * w and source.shape[0] >= 2 * h:
+        half_h, half_w = source.shape[0] // 2, source.shape[1] // 2
+        if (half_w, half_h) == size and dst is not None:
+            return cv2.resize(source[:2 * half_h, :2 * half_w], size, dst=dst, interpolation=cv2.INTER_AREA)
+        half_shape = (half_h, half_w) + source.shape[2:]
+        if level == len(halving_buffers):
+            halving_buffers.append(None)
+        if halving_buffers[level] is None or halving_buffers[level].shape != half_shape:
+            halving_buffers[level] = np.empty(half_shape, dtype=source.dtype)
+        source = cv2.resize(source[:2 * half_h, :2 * half_w], (half_w, half_h), dst=halving_buffers[level],
+                            interpolation=cv2.INTER_AREA)
+        level += 1
+    if source.shape[:2] == (h, w):
+        if dst is None:
+            return source.copy()
+        np.copyto(dst, source)
+        return dst
+    return cv2.resize(source, size, dst=dst, interpolation=cv2.INTER_LINEAR)
+
+def fourcc_to_str(code):
+    code = int(code)
+    return ''.join(chr((code >> 8 * i) & 0xFF) for i in range(4)) if code else None
+
+# Simulated cameras for testing and capacity planning; both pace read() like a device would
+class SimulatedCapture:
+    def __init__(self, fps):
+        self.fps = fps
+        self.next_due = None
+        self.frames_skipped = 0  # frames a real camera would have dropped because nobody read them
+    
+    def pace(self):
+        now = time.monotonic()
+        if self.next_due is None:
+            self.next_due = now
+        elif self.next_due > now:
+            time.sleep(self.next_due - now)
+        elif now - self.next_due > 1.0:
+            # A second behind: skip ahead instead of replaying the backlog at full speed
+            self.frames_skipped += int((now - self.next_due) * self.fps)
+            self.next_due = now
+        self.next_due += 1.0 / self.fps
+    
+    def read(self, image=None):
+        if not self.grab():
+            return False, None
+        return self.retrieve(image)
+
+class SyntheticCapture(SimulatedCapture):
+    # "synthetic:WIDTHxHEIGHT@FPS;motion=START-END,...;period=SECONDS;seed=N"
+    # A block crosses the frame during each motion window of a script that repeats every period
+    SCHEME = "synthetic:"
+    
+    def __init__(self, width=640, height=480, fps=15.0, motion=((5.0, 10.0),), period=30.0, seed=0):
+        super().__init__(fps)
+        self.width = width
+        self.height = height
+        self.motion = motion
+        self.period = period
+        self.seed = seed
+        self.background = None
+        self.frame_index = 0
+        self.opened = True
+    
+    @classmethod
+    def from_spec(cls, spec):
+        fields = spec[len(cls.SCHEME):].split(';')
+        options = {}
+        size, _, fps = fields[0].partition('@')
+        if size:
+            width, height = size.split('x')
+            options.update(width=int(width), height=int(height))
+        if fps:
+            options['fps'] = float(fps)
+        for field in fields[1:]:
+            key, _, value = field.partition('=')
+            if key == 'motion':
+                options['motion'] = tuple(tuple(float(t) for t in window.split('-')) for window in value.split(',') if window)
+            elif key == 'period':
+                options['period'] = float(value)
+            elif key == 'seed':
+                options['seed'] = int(value)
+            else:
+                raise ValueError(f"Unknown synthetic source option: {key}")
+        return cls(**options)
+    
+    def isOpened(self):
+        return self.opened
+    
+    def render_background(self):
+        # Blurred noise over a gradient: compresses and scales roughly like a real scene
+        rng = np.random.default_rng(self.seed)
+        noise = rng.integers(0, 256, (self.height, self.width, 3), dtype=np.uint8)
+        gradient = np.linspace(0, 96, self.width, dtype=np.uint8)[np.newaxis, :, np.newaxis]
+        return cv2.GaussianBlur(noise // 2 + gradient, (9, 9), 0)
+    
+    def grab(self):
+        if not self.opened:
+            return False
+        self.pace()
+        return True
+    
+    def retrieve(self, image=None):
+        if self.background is None:
+            self.background = self.render_background()
+        if image is None or image.shape != self.background.shape:
+            image = np.empty_like(self.background)
+        np.copyto(image, self.background)
+        t = (self.frame_index / self.fps) % self.period
+        for start, end in self.motion:
+            if start <= t < end:
+                block_w, block_h = self.width // 8, self.height // 6
+                x = int((t - start) / (end - start) * (self.width - block_w))
+                cv2.rectangle(image, (x, self.height // 3), (x + block_w, self.height // 3 + block_h), (0, 0, 255), -1)
+        self.frame_index += 1
+        return True, image
+    
+    def get(self, prop):
+        return {cv2.CAP_PROP_FRAME_WIDTH: self.width,
+                cv2.CAP_PROP_FRAME_HEIGHT: self.height,
+                cv2.CAP_PROP_FPS: self.fps}.get(prop, 0)
+    
+    def set(self, prop, value):
+        # Grants any requested profile, like a camera that supports everything
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            self.width = int(value)
+        elif prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            self.height = int(value)
+        elif prop == cv2.CAP_PROP_FPS:
+            self.fps = float(value)
+        else:
+            return False
+        self.background = None
+        return True
+    
+    def release(self):
+        self.opened = False
+
+class LoopingFileCapture(SimulatedCapture):
+    # A recorded video played over and over at its native frame rate
+    def __init__(self, path):
+        self.capture = cv2.VideoCapture(path)
+        super().__init__(self.capture.get(cv2.CAP_PROP_FPS) or RecordingManager.WRITER_FPS)
+    
+    def isOpened(self):
+        return self.capture.isOpened()
+    
+    def grab(self):
+        self.pace()
+        if self.capture.grab():
+            return True
+        self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        return self.capture.grab()
+    
+    def retrieve(self, image=None):
+        return self.capture.retrieve(image)
+    
+    def get(self, prop):
+        return self.capture.get(prop)
+    
+    def set(self, prop, value):
+        return False  # a file's resolution and rate are fixed
+    
+    def release(self):
+        self.capture.release()
+
+def open_source(source):
+    # Camera sources: a device index or stream URL, a video file (looped) or a synthetic pattern
+    if isinstance(source, str):
+        if source.startswith(SyntheticCapture.SCHEME):
+            return SyntheticCapture.from_spec(source)
+        if os.path.isfile(source):
+            return LoopingFileCapture(source)
+    return cv2.VideoCapture(source)
+
+def open_camera(source, requested=None):
+    # Opens a device and negotiates the requested stream profile; returns (capture, actual profile)
+    capture = open_source(source)
+    if not capture.isOpened():
+        return capture, None
+    requested = requested or {}
+    if requested.get('fourcc'):
+        capture.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*requested['fourcc']))
+    if requested.get('width') and requested.get('height'):
+        capture.set(cv2.CAP_PROP_FRAME_WIDTH, requested['width'])
+        capture.set(cv2.CAP_PROP_FRAME_HEIGHT, requested['height'])
+    if requested.get('fps'):
+        capture.set(cv2.CAP_PROP_FPS, requested['fps'])
+    # Devices silently fall back to what they support, so read back what was granted
+    profile = {'width': int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)) or None,
+               'height': int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)) or None,
+               'fps': capture.get(cv2.CAP_PROP_FPS) or None,
+               'fourcc': fourcc_to_str(capture.get(cv2.CAP_PROP_FOURCC))}
+    return capture, profile
+
+def format_profile(profile):
+    # e.g. "1280x720 @ 30 fps MJPG"; fields the device did not report are left out
+    if not profile:
+        return "unknown"
+    parts = []
+    if profile.get('width') and profile.get('height'):
+        parts.append(f"{profile['width']}x{profile['height']}")
+    if profile.get('fps'):
+        parts.append(f"@ {profile['fps']:g} fps")
+    if profile.get('fourcc'):
+        parts.append(profile['fourcc'])
+    return " ".join(parts) or "unknown"
+
+def check_privacy_masks(masks):
+    # {camera_id: [{'points': [[x, y], ...], 'mode': ...}]} with x, y in 0..1; JSON keys may be strings
+    checked = {}
+    for camera_id, camera_masks in masks.items():
+        checked[int(camera_id)] = []
+        for mask in camera_masks:
+            if mask.get('mode') not in FrameOverlay.MASK_MODES:
+                raise ValueError(f"Unknown privacy mask mode: {mask.get('mode')}")
+            points = [[min(max(float(x), 0.0), 1.0), min(max(float(y), 0.0), 1.0)] for x, y in mask['points']]
+            if len(points) < 3:
+                raise ValueError("A privacy mask needs at least 3 points")
+            checked[int(camera_id)].append({'points': points, 'mode': mask['mode']})
+    return checked
+
+# Privacy masks and the camera name/time burn-in, drawn into the shared frame once on the
+# capture thread, so tiles, recorder, frame bus and sub stream all get it at no extra cost
+class FrameOverlay:
+    MASK_MODES = ('black', 'blur')
+    BLUR_FACTOR = 16  # blurred regions are averaged down this much and scaled back up
+    FONT = cv2.FONT_HERSHEY_SIMPLEX
+    
+    def __init__(self):
+        # (masks, name, burn_in, {frame shape: regions}), replaced whole so the capture
+        # thread never sees a half-applied change
+        self.state = None
+        self.label = None
+        self.label_key = None
+    
+    def configure(self, masks=(), name="", burn_in=False):
+        self.state = (list(masks), name, burn_in, {}) if masks or burn_in else None
+    
+    @classmethod
+    def rasterise(cls, masks, shape):
+        # Each polygon becomes its bounding box, a stencil of that box and the box-sized
+        # buffer it is filled from, once per frame size
+        h, w = shape
+        regions = []
+        for mask in masks:
+            points = np.array([(round(x * (w - 1)), round(y * (h - 1))) for x, y in mask['points']], dtype=np.int32)
+            x, y, box_w, box_h = cv2.boundingRect(points)
+            stencil = np.zeros((box_h, box_w), dtype=np.uint8)
+            cv2.fillPoly(stencil, [points - (x, y)], 255)
+            fill = np.zeros((box_h, box_w, 3), dtype=np.uint8)  # stays black, or holds the blurred box
+            small_size = (max(1, box_w // cls.BLUR_FACTOR), max(1, box_h // cls.BLUR_FACTOR))
+            regions.append((slice(y, y + box_h), slice(x, x + box_w), stencil, fill, mask['mode'], small_size))
+        return regions
+    
+    def apply(self, frame, timestamp):
+        # In place; the cost is bounded by the masked boxes and one label copy
+        state = self.state
+        if state is None:
+            return
+        masks, name, burn_in, regions_by_shape = state
+        if masks:
+            regions = regions_by_shape.get(frame.shape[:2])
+            if regions is None:
+                regions = regions_by_shape[frame.shape[:2]] = self.rasterise(masks, frame.shape[:2])
+            for rows, cols, stencil, fill, mode, (small_w, small_h) in regions:
+                region = frame[rows, cols]
+                if mode == 'blur':
+                    # Exact integer steps keep INTER_AREA on its fast path
+                    factor_h, factor_w = region.shape[0] // small_h, region.shape[1] // small_w
+                    small = cv2.resize(region[:small_h * factor_h, :small_w * factor_w], (small_w, small_h),
+                                       interpolation=cv2.INTER_AREA)
+                    cv2.resize(small, fill.shape[1::-1], dst=fill, interpolation=cv2.INTER_LINEAR)
+                cv2.copyTo(fill, stencil, region)
+        if burn_in:
+            self.burn_in(frame, int(timestamp), name)
+    
+    def burn_in(self, frame, second, name):
+        # Text is only rendered when the second (or the frame size) changes; otherwise one copy
+        h, w = frame.shape[:2]
+        key = (second, name, h)
+        if key != self.label_key:
+            self.label = self.render_label(f"{name}  {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(second))}", h)
+            self.label_key = key
+        label_h, label_w = min(self.label.shape[0], h), min(self.label.shape[1], w)
+        np.copyto(frame[:label_h, :label_w], self.label[:label_h, :label_w])
+    
+    @classmethod
+    def render_label(cls, text, frame_height):
+        # White text on an opaque black box, scaled with the frame
+        scale = max(0.4, frame_height / 720 * 0.7)
+        thickness = max(1, round(scale * 1.5))
+        (text_w, text_h), baseline = cv2.getTextSize(text, cls.FONT, scale, thickness)
+        pad = max(2, text_h // 3)
+        label = np.zeros((text_h + baseline + 2 * pad, text_w + 2 * pad, 3), dtype=np.uint8)
+        cv2.putText(label, text, (pad, pad + text_h), cls.FONT, scale, (255, 255, 255), thickness, cv2.LINE_AA)
+        return label
+
+# Capture thread class (one grabber per camera)
+class CaptureThread(threading.Thread):
+    RECORD_HEIGHTS = (None, 1080, 720, 480, 360)  # None keeps the native resolution
+    
+    # Lost or unavailable devices are retried after 1, 2, 4 ... 60 seconds
+    BACKOFF_INITIAL = 1.0
+    BACKOFF_MAX = 60.0
+    READ_FAILURE_LIMIT = 50  # consecutive failed reads before the stream counts as lost
+    
+    def __init__(self, camera_id, source, ring_size=4, requested=None, record_height=None, stream='main'):
+        super().__init__(daemon=True)
+        self.camera_id = camera_id
+        self.source = source
+        self.stream = stream
+        self.requested = requested  # stream profile asked of the device on every (re)connect
+        self.capture = None  # opened on this thread, so a slow device never blocks the caller
+        self.profile = {}
+        self.on_opened = None  # callable(profile), called on this thread after every (re)connect
+        self.record_height = record_height
+        self.raw_buffer = None  # native frames land here when they are downsampled
+        self.halving_buffers = []
+        self.sub_halving_buffers = []
+        self.ring = FrameRing(ring_size)
+        self.broadcaster = FrameBroadcaster(camera_id)
+        self.overlay = FrameOverlay()  # privacy masks and burn-in, set by the service
+        
+        # Optional low-res sub stream for live tiles: a second source or derived from the main stream
+        self.sub_height = None
+        self.sub_thread = None
+        self.sub_ring = None
+        self.sub_broadcaster = None
+        
+        # Health: 'connecting', 'live', 'reconnecting' or 'stopped'
+        self.state = 'connecting'
+        self.retry_at = None  # monotonic time of the next reconnect attempt
+        self.reconnects = 0
+        self.stopped = threading.Event()
+        self.frames_captured = 0
+        self.read_failures = 0
+        self.fps = 0.0
+        
+        # Stage timings; a separate sub stream thread records under its own names
+        prefix = '' if stream == 'main' else stream + '_'
+        self.wait_histogram = telemetry.histogram(camera_id, prefix + 'wait')
+        self.read_histogram = telemetry.histogram(camera_id, prefix + 'read')
+        self.downsample_histogram = telemetry.histogram(camera_id, prefix + 'downsample')
+        self.overlay_histogram = telemetry.histogram(camera_id, prefix + 'overlay')
+        self.fanout_histogram = telemetry.histogram(camera_id, prefix + 'fanout')
+        self.sub_scale_histogram = telemetry.histogram(camera_id, 'sub_scale')
+    
+    def run(self):
+        backoff = self.BACKOFF_INITIAL
+        while not self.stopped.is_set():
+            if self.connect() and self.capture_frames():
+                backoff = self.BACKOFF_INITIAL  # it was live: reconnect straight away
+                self.state = 'reconnecting'
+                continue
+            if self.stopped.is_set():
+                break
+            print(f"Camera {self.camera_id} unavailable, retrying in {backoff:.0f}s")
+            self.state = 'reconnecting'
+            self.retry_at = time.monotonic() + backoff
+            self.stopped.wait(backoff)
+            backoff = min(backoff * 2, self.BACKOFF_MAX)
+        self.state = 'stopped'
+    
+    def connect(self):
+        capture, profile = open_camera(self.source, self.requested)
+        if not capture.isOpened():
+            capture.release()
+            return False
+        self.capture = capture
+        self.profile = profile
+        message = f"Camera {self.camera_id} {self.stream} stream opened at {format_profile(profile)}"
+        if self.requested:
+            message += f" (requested {format_profile(self.requested)})"
+        print(message)
+        if self.on_opened is not None:
+            self.on_opened(profile)
+        return True
+    
+    def capture_frames(self):
+        # Reads until the stream is lost or the thread is stopped; True if any frame arrived
+        captured = False
+        failures = 0
+        fps_frames = 0
+        fps_start = time.monotonic()
+        while not self.stopped.is_set():
+            downsample = self.record_height is not None and (self.raw_buffer is None or
+                                                             self.raw_buffer.shape[0] > self.record_height)
+            # grab() waits for the device; only retrieve() (decode and conversion) counts as 'read'
+            wait_start = time.perf_counter()
+            try:
+                ret = self.capture.grab()
+                read_start = time.perf_counter()
+                if ret:
+                    ret, frame = self.capture.retrieve(self.raw_buffer if downsample else self.ring.next_buffer())
+            except cv2.error:
+                ret = False
+            if not ret:
+                self.read_failures += 1
+                failures += 1
+                if failures >= self.READ_FAILURE_LIMIT:
+                    print(f"Camera {self.camera_id} stream lost")
+                    break
+                time.sleep(0.01)
+                continue
+            failures = 0
+            if not captured:
+                captured = True
+                if self.state == 'reconnecting':
+                    self.reconnects += 1
+                self.state = 'live'
+                self.retry_at = None
+            timestamp = time.time()
+            stage_start = time.perf_counter()
+            self.wait_histogram.add(read_start - wait_start)
+            self.read_histogram.add(stage_start - read_start)
+            if downsample:
+                self.raw_buffer = frame
+                frame = self.downsample(frame)
+                stage_end = time.perf_counter()
+                self.downsample_histogram.add(stage_end - stage_start)
+                stage_start = stage_end
+            if self.overlay.state is not None:
+                self.overlay.apply(frame, timestamp)  # before fan-out, so it is drawn once
+                stage_end = time.perf_counter()
+                self.overlay_histogram.add(stage_end - stage_start)
+                stage_start = stage_end
+            self.ring.publish(frame)
+            self.broadcaster.publish(frame, timestamp)
+            stage_end = time.perf_counter()
+            self.fanout_histogram.add(stage_end - stage_start)
+            if self.sub_height is not None and self.sub_broadcaster.subscribers:
+                self.publish_sub_frame(frame, timestamp)
+                self.sub_scale_histogram.add(time.perf_counter() - stage_end)
+            self.frames_captured += 1
+            
+            # Capture FPS over one-second windows
+            fps_frames += 1
+            elapsed = time.monotonic() - fps_start
+            if elapsed >= 1.0:
+                self.fps = fps_frames / elapsed
+                fps_frames = 0
+                fps_start = time.monotonic()
+        self.capture.release()
+        self.capture = None
+        self.fps = 0.0
+        return captured
+    
+    def downsample(self, frame):
+        # Scale to the record profile once here, before the recorder and tiles see the frame
+        h, w = frame.shape[:2]
+        if h <= self.record_height:
+            return frame.copy()  # already small enough; later frames are read straight into the ring
+        size = (max(2, round(w * self.record_height / h / 2) * 2), self.record_height)
+        target = self.ring.next_buffer()
+        if target is None or target.shape[1::-1] != size:
+            target = None
+        return scale_frame(frame, size, self.halving_buffers, dst=target)
+    
+    def stats(self):
+        retry_in = None if self.retry_at is None else max(0.0, self.retry_at - time.monotonic())
+        return {'fps': self.fps,
+                'captured': self.frames_captured,
+                'read_failures': self.read_failures,
+                'state': self.state,
+                'retry_in': retry_in,
+                'reconnects': self.reconnects,
+                'profile': self.profile}
+    
+    def enable_sub_stream(self, height=360, source=None):
+        # Must be called before start(); a separate source runs (and reconnects) in its own thread
+        if source is not None:
+            self.sub_thread = CaptureThread(self.camera_id, source, stream='sub')
+            self.sub_broadcaster = self.sub_thread.broadcaster
+        else:
+            self.sub_height = height
+            self.sub_ring = FrameRing(self.ring.size)
+            self.sub_broadcaster = FrameBroadcaster(self.camera_id)
+    
+    def publish_sub_frame(self, frame, timestamp):
+        # Scaled once here for every tile showing this camera, and only while one is subscribed
+        h, w = frame.shape[:2]
+        size = (w, h) if h <= self.sub_height else (max(2, round(w * self.sub_height / h / 2) * 2), self.sub_height)
+        target = self.sub_ring.next_buffer()
+        if target is None or target.shape[1::-1] != size:
+            target = None
+        if size == (w, h):
+            sub = frame.copy() if target is None else target
+            if target is not None:
+                np.copyto(target, frame)
+        else:
+            sub = scale_frame(frame, size, self.sub_halving_buffers, dst=target)
+        self.sub_ring.publish(sub)
+        self.sub_broadcaster.publish(sub, timestamp)
+    
+    def live_broadcaster(self, full_resolution=False):
+        if full_resolution or self.sub_broadcaster is None:
+            return self.broadcaster
+        return self.sub_broadcaster
+    
+    def start(self):
+        super().start()
+        if self.sub_thread is not None:
+            self.sub_thread.start()
+    
+    def stop(self, wait=True):
+        self.stopped.set()
+        if self.sub_thread is not None:
+            self.sub_thread.stop(wait)
+        if wait and self.is_alive():
+            self.join(timeout=2)
+
+# Camera widget class
+class CameraWidget(QLabel):
+    double_clicked = pyqtSignal(int)
+    
+    # Tiles smaller than these areas are refreshed at 1/2 and 1/3 of the capture rate
+    FULL_RATE_AREA = 640 * 360
+    HALF_RATE_AREA = 320 * 180
+    
+    def __init__(self, camera_id, parent=None, telemetry_enabled=True):
+        super().__init__(parent)
+        self.camera_id = camera_id
+        self.setAlignment(Qt.AlignCenter)
+        self.setStyleSheet("background-color: black;")
+        self.setMinimumSize(320, 240)
+        
+        self.status_text = None
+        self.overlay_text = None  # optional performance overlay, top left
+        
+        # Capture-to-display latency and scaling cost of this tile; playback tiles keep theirs
+        # private so recorded footage never shows up in the live camera's stats
+        if telemetry_enabled:
+            self.latency_histogram = telemetry.histogram(camera_id, 'display_latency')
+            self.scale_histogram = telemetry.histogram(camera_id, 'scale')
+        else:
+            self.latency_histogram = RollingHistogram(Telemetry.WINDOW)
+            self.scale_histogram = RollingHistogram(Telemetry.WINDOW)
+        
+        # Target size is cached here and only recomputed on resize events
+        self.widget_size = (self.width(), self.height())
+        self.source_shape = None
+        self.scaled_size = None
+        
+        # Triple buffer: front is displayed, ready is the newest scaled frame,
+        # back is written by the producer (usually the capture thread)
+        self.front_buffer = None
+        self.ready_buffer = None
+        self.back_buffer = None
+        self.halving_buffers = []
+        self.ready_fresh = False
+        self.ready_timestamp = None
+        self.buffer_lock = threading.Lock()
+        self.image = None
+        
+        # Adaptive refresh: inactive tiles skip all work, small tiles skip frames
+        self.active = True
+        self.focused = False
+        self.frame_stride = 1
+        self.frame_counter = 0
+    
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.widget_size = (self.width(), self.height())
+        self.source_shape = None  # force the scaled size to be recomputed
+        self.update_frame_stride()
+    
+    def update_frame_stride(self):
+        area = self.width() * self.height()
+        if self.focused or area >= self.FULL_RATE_AREA:
+            self.frame_stride = 1
+        elif area >= self.HALF_RATE_AREA:
+            self.frame_stride = 2
+        else:
+            self.frame_stride = 3
+    
+    def set_focused(self, focused):
+        self.focused = focused
+        self.update_frame_stride()
+    
+    def mouseDoubleClickEvent(self, event):
+        self.double_clicked.emit(self.camera_id)
+        super().mouseDoubleClickEvent(event)
+    
+    def target_size(self, frame):
+        if frame.shape[:2] != self.source_shape:
+            h, w = frame.shape[:2]
+            widget_w, widget_h = self.widget_size
+            scale = min(widget_w / w, widget_h / h)
+            self.scaled_size = (max(1, int(w * scale)), max(1, int(h * scale)))
+            self.source_shape = frame.shape[:2]
+        return self.scaled_size
+    
+    def prepare_frame(self, frame, timestamp=None):
+        # Safe to call from the capture thread: scales into a reused buffer
+        if frame is None or not self.active:
+            return
+        self.frame_counter += 1
+        if self.frame_counter % self.frame_stride:
+            return
+        scale_start = time.perf_counter()
+        w, h = self.target_size(frame)
+        back = self.back_buffer
+        if back is None or back.shape[:2] != (h, w):
+            back = np.empty((h, w, 3), dtype=np.uint8)
+        
+        scale_frame(frame, (w, h), self.halving_buffers, dst=back)
+        self.scale_histogram.add(time.perf_counter() - scale_start)
+        with self.buffer_lock:
+            self.back_buffer = self.ready_buffer
+            self.ready_buffer = back
+            self.ready_fresh = True
+            self.ready_timestamp = timestamp
+    
+    def render(self):
+        # GUI thread: wrap the newest buffer as BGR without converting or copying it
+        with self.buffer_lock:
+            if not self.ready_fresh:
+                return
+            self.front_buffer, self.ready_buffer = self.ready_buffer, self.front_buffer
+            self.ready_fresh = False
+            timestamp = self.ready_timestamp
+        if timestamp is not None:
+            self.latency_histogram.add(time.time() - timestamp)
+        front = self.front_buffer
+        h, w = front.shape[:2]
+        self.image = QImage(front.data, w, h, front.strides[0], QImage.Format_BGR888)
+        self.update()
+    
+    def update_frame(self, frame, timestamp=None):
+        self.prepare_frame(frame, timestamp)
+        self.render()
+    
+    def set_status_text(self, text):
+        # Shown over the tile while the camera is not live (e.g. "Reconnecting in 4s")
+        if text != self.status_text:
+            self.status_text = text
+            self.update()
+    
+    def set_overlay_text(self, text):
+        if text != self.overlay_text:
+            self.overlay_text = text
+            self.update()
+    
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.image is None and self.status_text is None and self.overlay_text is None:
+            return
+        painter = QPainter(self)
+        if self.image is not None:
+            x = (self.width() - self.image.width()) // 2
+            y = (self.height() - self.image.height()) // 2
+            painter.drawImage(x, y, self.image)
+        if self.status_text is not None:
+            painter.setPen(QColor(255, 200, 0))
+            painter.drawText(self.rect(), Qt.AlignCenter, self.status_text)
+        if self.overlay_text is not None:
+            painter.setPen(QColor(0, 255, 0))
+            painter.drawText(self.rect().adjusted(6, 4, -6, -4), Qt.AlignLeft | Qt.AlignTop, self.overlay_text)
+        painter.end()
+
+# Recordings list model (range query, fetched a page at a time as the view scrolls)
+class RecordingsModel(QAbstractListModel):
+    PAGE_SIZE = 200
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = []
+        self.camera_id = -1
+        self.start_ts = 0
+        self.end_ts = 0
+        self.exhausted = True
+    
+    def set_filter(self, camera_id, start_ts, end_ts):
+        self.beginResetModel()
+        self.rows = []
+        self.camera_id = camera_id
+        self.start_ts = start_ts
+        self.end_ts = end_ts
+        self.exhausted = False
+        self.endResetModel()
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        recording = self.rows[index.row()]
+        if role == Qt.DisplayRole:
+            return f"Camera {recording[1]} - {recording[2]}"
+        if role == Qt.UserRole:
+            return recording[3]
+        if role == Qt.UserRole + 1:
+            return recording[0]
+        return None
+    
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.exhausted
+    
+    def fetchMore(self, parent=QModelIndex()):
+        # Keyset pagination on (start_ts, id), newest first, served by the start_ts indexes
+        if self.rows:
+            last_ts, last_id = self.rows[-1][4], self.rows[-1][0]
+        else:
+            last_ts, last_id = self.end_ts, -1
+        camera_clause = "" if self.camera_id == -1 else "camera_id=? AND "
+        params = () if self.camera_id == -1 else (self.camera_id,)
+        page = recordings_db.query(
+            "SELECT id, camera_id, start_time, file_path, start_ts FROM recordings "
+            f"WHERE {camera_clause}start_ts >= ? AND (start_ts < ? OR (start_ts = ? AND id < ?)) "
+            "ORDER BY start_ts DESC, id DESC LIMIT ?",
+            params + (self.start_ts, last_ts, last_ts, last_id, self.PAGE_SIZE))
+        if len(page) < self.PAGE_SIZE:
+            self.exhausted = True
+        if page:
+            self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(page) - 1)
+            self.rows.extend(page)
+            self.endInsertRows()
+
+def load_timeline(camera_id, start_ts, end_ts):
+    # Recorded segments and motion events overlapping [start_ts, end_ts), in one query
+    rows = recordings_db.query(
+        "SELECT 'segment', file_path, start_ts, COALESCE(end_ts, CAST(strftime('%s', 'now') AS INTEGER)), fps, "
+        "NULL FROM recordings WHERE camera_id=? AND start_ts < ? "
+        "AND COALESCE(end_ts, CAST(strftime('%s', 'now') AS INTEGER)) > ? "
+        "UNION ALL "
+        "SELECT 'motion', file_path, start_ts, end_ts, NULL, peak_score FROM motion_events "
+        "WHERE camera_id=? AND start_ts < ? AND end_ts >= ? "
+        "ORDER BY 3",
+        (camera_id, end_ts, start_ts, camera_id, end_ts, start_ts))
+    segments = []
+    motion_events = []
+    for kind, file_path, row_start, row_end, fps, peak_score in rows:
+        if kind == 'segment':
+            segments.append({'file_path': file_path, 'start_ts': row_start, 'end_ts': row_end, 'fps': fps})
+        else:
+            motion_events.append((row_start, row_end, peak_score))
+    return segments, motion_events
+
+# Playback decoder (worker thread filling a small read-ahead cache)
+class PlaybackDecoder(threading.Thread):
+    CACHE_SIZE = 8
+    GRAB_SKIP_LIMIT = 3  # beyond this many skipped frames per shown frame, seek instead
+    PREOPEN_SECONDS = 2  # open and pre-buffer the next segment this long before the current ends
+    
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.commands = queue.Queue()
+        self.cache = deque()
+        self.cache_ready = threading.Condition()
+        
+        # Playlist of segments played back to back; a single file is a one-item playlist
+        self.segments = []
+        self.segment_index = 0
+        self.capture = None
+        self.frame_count = 0  # 0 while unknown
+        self.fps = 0.0
+        self.still_recording = False
+        self.position = 0  # index of the next frame to decode in the current segment
+        self.preload = None  # (segment index, loader thread, result)
+        
+        self.playing = False
+        self.speed = 1
+        self.generation = 0  # bumped on every seek so stale cached frames are dropped
+        self.running = True
+        
+        # Optional shared clock (callable returning the target timestamp); when set,
+        # frames that are already late are skipped instead of decoded
+        self.clock = None
+        self.frames_dropped = 0
+    
+    def send(self, command, *args):
+        self.commands.put((command, args))
+        with self.cache_ready:
+            self.cache_ready.notify()
+    
+    def run(self):
+        while self.running:
+            self.process_commands()
+            with self.cache_ready:
+                if not self.playing or self.capture is None or len(self.cache) >= self.CACHE_SIZE:
+                    self.cache_ready.wait(0.05)
+                    continue
+            self.decode_next()
+        self.discard_preload()
+        if self.capture is not None:
+            self.capture.release()
+    
+    def process_commands(self):
+        seek_target = None
+        while True:
+            try:
+                command, args = self.commands.get_nowait()
+            except queue.Empty:
+                break
+            if command == 'open':
+                self.segments, seek_target = args
+                self.segment_index = 0
+                self.discard_preload()
+                if self.capture is not None:
+                    self.capture.release()
+                    self.capture = None
+                self.playing = True
+            elif command == 'seek':
+                seek_target = args[0]  # coalesce scrubbing: only the last seek matters
+            elif command == 'play':
+                self.playing = True
+            elif command == 'pause':
+                self.playing = False
+                with self.cache_ready:
+                    self.cache.clear()
+                    self.generation += 1
+            elif command == 'speed':
+                self.speed = args[0]
+            elif command == 'stop':
+                self.running = False
+                return
+        if seek_target is not None:
+            self.seek(seek_target)
+    
+    def segment_at(self, timestamp):
+        # Segment covering timestamp, or the next one after a gap
+        for index, segment in enumerate(self.segments):
+            end_ts = segment.get('end_ts')
+            if end_ts is None or timestamp < end_ts:
+                return index
+        return len(self.segments) - 1 if self.segments else None
+    
+    def open_segment(self, index):
+        preloaded = self.take_preload(index)
+        if self.capture is not None:
+            self.capture.release()
+        segment = self.segments[index]
+        if preloaded is not None:
+            self.capture, first_frame = preloaded
+        else:
+            self.capture, first_frame = cv2.VideoCapture(segment['file_path']), None
+        self.segment_index = index
+        self.position = 0 if first_frame is None else 1
+        
+        # A segment still being written has no index yet: the backend reports -1 (or 0)
+        # for both frame count and FPS, which are then treated as unknown
+        frame_count = int(self.capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.frame_count = max(frame_count, 0)
+        self.still_recording = self.capture.isOpened() and frame_count <= 0
+        
+        # Measured recording FPS (if known) maps frames to wall-clock time
+        fps = segment.get('fps') or 0
+        if fps <= 0:
+            fps = self.capture.get(cv2.CAP_PROP_FPS)
+        self.fps = fps if fps > 0 else RecordingManager.WRITER_FPS
+        return first_frame
+    
+    def frame_time(self, frame_index):
+        return self.segments[self.segment_index]['start_ts'] + frame_index / self.fps
+    
+    def seek(self, timestamp):
+        # The FFmpeg backend seeks to the preceding keyframe and decodes forward,
+        # so POS_FRAMES seeks land on the exact frame
+        index = self.segment_at(timestamp)
+        if index is None:
+            return
+        if self.capture is None or index != self.segment_index:
+            self.open_segment(index)
+        segment = self.segments[index]
+        frame_index = int(round((timestamp - segment['start_ts']) * self.fps))
+        frame_index = max(0, frame_index)
+        if self.frame_count:
+            frame_index = min(frame_index, self.frame_count - 1)
+        if frame_index != self.position:
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+            self.position = frame_index
+        with self.cache_ready:
+            self.cache.clear()
+            self.generation += 1
+        self.decode_next(skip=0)
+    
+    def decode_next(self, skip=None):
+        if self.capture is None:
+            return
+        if skip is None:
+            skip = int(self.speed) - 1
+            if self.clock is not None:
+                late_frames = int((self.clock() - self.frame_time(self.position)) * self.fps)
+                if late_frames > 1:
+                    skip = max(skip, late_frames)
+                    self.frames_dropped += late_frames
+        
+        # Frames that won't be shown are grabbed without conversion, or jumped over
+        if skip > self.GRAB_SKIP_LIMIT:
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, self.position + skip)
+            self.position += skip
+        else:
+            for _ in range(skip):
+                if not self.capture.grab():
+                    break
+                self.position += 1
+        
+        frame_index = self.position
+        ret, frame = self.capture.read()
+        if ret:
+            self.position += 1
+        
+        # End of this segment: continue gaplessly with the (pre-opened) next one,
+        # skipping segments that are missing or fail to decode
+        while not ret and self.segment_index + 1 < len(self.segments):
+            frame = self.open_segment(self.segment_index + 1)
+            frame_index = 0
+            ret = frame is not None
+            if not ret:
+                ret, frame = self.capture.read()
+                self.position = 1
+        
+        with self.cache_ready:
+            if ret:
+                self.cache.append((self.generation, self.frame_time(frame_index), frame))
+            else:
+                self.cache.append((self.generation, None, None))  # end of playback
+                self.playing = False
+        self.maybe_preload()
+    
+    def maybe_preload(self):
+        next_index = self.segment_index + 1
+        if not self.playing or next_index >= len(self.segments) or self.preload is not None:
+            return
+        if not self.frame_count or (self.frame_count - self.position) / self.fps > self.PREOPEN_SECONDS:
+            return
+        
+        result = {}
+        file_path = self.segments[next_index]['file_path']
+        
+        def load():
+            capture = cv2.VideoCapture(file_path)
+            ok, frame = capture.read()
+            result['capture'] = capture
+            result['first_frame'] = frame if ok else None
+        
+        thread = threading.Thread(target=load, daemon=True)
+        thread.start()
+        self.preload = (next_index, thread, result)
+    
+    def take_preload(self, index):
+        if self.preload is None:
+            return None
+        preload_index, thread, result = self.preload
+        self.preload = None
+        thread.join()
+        if preload_index != index:
+            result['capture'].release()
+            return None
+        return result['capture'], result['first_frame']
+    
+    def discard_preload(self):
+        self.take_preload(None)
+    
+    def pop(self):
+        with self.cache_ready:
+            while self.cache:
+                generation, timestamp, frame = self.cache.popleft()
+                if generation == self.generation:
+                    self.cache_ready.notify()
+                    return timestamp, frame
+        return None
+    
+    def peek_time(self):
+        # Timestamp of the next cached frame; None if nothing is decoded yet, -1 at the end
+        with self.cache_ready:
+            for generation, timestamp, _ in self.cache:
+                if generation == self.generation:
+                    return -1 if timestamp is None else timestamp
+        return None
+    
+    def pop_until(self, timestamp):
+        # Latest cached frame due at timestamp; earlier due frames are dropped as late
+        latest = None
+        with self.cache_ready:
+            while self.cache:
+                generation, frame_ts, frame = self.cache[0]
+                if generation == self.generation and frame_ts is not None and frame_ts > timestamp:
+                    break
+                self.cache.popleft()
+                if generation != self.generation:
+                    continue
+                if latest is not None and latest[1] is not None:
+                    self.frames_dropped += 1
+                latest = (frame_ts, frame)
+                if frame_ts is None:
+                    break
+            self.cache_ready.notify()
+        return latest
+
+# Timeline bar (recorded and motion regions over a time range, click or drag to seek)
+class TimelineBar(QWidget):
+    seek_requested = pyqtSignal(float)
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMinimumHeight(28)
+        self.start_ts = 0
+        self.end_ts = 1
+        self.segments = []
+        self.motion_events = []
+        self.playhead = None
+        self.camera_id = None
+        self.setMouseTracking(True)
+        
+        # Hover preview from the record-time thumbnails
+        self.preview = QLabel(self, Qt.ToolTip)
+        self.preview.hide()
+    
+    def set_data(self, start_ts, end_ts, segments, motion_events, camera_id=None):
+        self.camera_id = camera_id
+        self.start_ts = start_ts
+        self.end_ts = max(end_ts, start_ts + 1)
+        self.segments = segments
+        self.motion_events = motion_events
+        self.playhead = None
+        self.update()
+    
+    def set_playhead(self, timestamp):
+        self.playhead = timestamp
+        self.update()
+    
+    def x_for(self, timestamp):
+        return int((timestamp - self.start_ts) / (self.end_ts - self.start_ts) * self.width())
+    
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor(40, 40, 40))
+        height = self.height()
+        for segment in self.segments:
+            x = self.x_for(segment['start_ts'])
+            painter.fillRect(x, 0, max(1, self.x_for(segment['end_ts']) - x), height, QColor(70, 130, 180))
+        for start_ts, end_ts, _ in self.motion_events:
+            x = self.x_for(start_ts)
+            painter.fillRect(x, 0, max(2, self.x_for(end_ts) - x), height // 3, QColor(220, 60, 60))
+        if self.playhead is not None:
+            painter.setPen(QColor(255, 255, 255))
+            x = self.x_for(self.playhead)
+            painter.drawLine(x, 0, x, height)
+        painter.end()
+    
+    def mousePressEvent(self, event):
+        self.request_seek(event.x())
+    
+    def mouseMoveEvent(self, event):
+        if event.buttons() & Qt.LeftButton:
+            self.request_seek(event.x())
+        else:
+            self.show_preview(event.x())
+    
+    def leaveEvent(self, event):
+        self.preview.hide()
+    
+    def show_preview(self, x):
+        thumbnail = None
+        if self.camera_id is not None:
+            thumbnail = thumbnail_store.thumbnail_at(self.camera_id, self.ts_for(x))
+        if thumbnail is None:
+            self.preview.hide()
+            return
+        self.preview.setPixmap(numpy_to_pixmap(np.ascontiguousarray(thumbnail)))
+        self.preview.adjustSize()
+        pos = self.mapToGlobal(self.rect().topLeft())
+        self.preview.move(pos.x() + x - self.preview.width() // 2, pos.y() - self.preview.height() - 4)
+        self.preview.show()
+    
+    def ts_for(self, x):
+        x = max(0, min(x, self.width()))
+        return self.start_ts + x / max(1, self.width()) * (self.end_ts - self.start_ts)
+    
+    def request_seek(self, x):
+        self.seek_requested.emit(self.ts_for(x))
+
+# Video player widget (one independent playback engine per instance)
+class VideoPlayer(QWidget):
+    SPEEDS = (1, 2, 8, 16)
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.decoder = None
+        self.duration = 0.0
+        self.current_time = 0.0
+        self.frames_shown = False
+        self.timeline_mode = False
+        
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.setLayout(layout)
+        
+        self.display = CameraWidget(0, telemetry_enabled=False)
+        self.display.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        layout.addWidget(self.display)
+        
+        # Single files scrub with the slider (in ms), timelines with the timeline bar
+        self.slider = QSlider(Qt.Horizontal)
+        self.slider.setEnabled(False)
+        self.slider.sliderMoved.connect(lambda value: self.seek(value / 1000))
+        layout.addWidget(self.slider)
+        
+        self.timeline_bar = TimelineBar()
+        self.timeline_bar.seek_requested.connect(self.seek)
+        self.timeline_bar.hide()
+        layout.addWidget(self.timeline_bar)
+        
+        controls = QHBoxLayout()
+        self.step_back_btn = QPushButton("<|")
+        self.step_back_btn.clicked.connect(lambda: self.step(-1))
+        controls.addWidget(self.step_back_btn)
+        
+        self.play_btn = QPushButton("Pause")
+        self.play_btn.clicked.connect(self.toggle_play)
+        controls.addWidget(self.play_btn)
+        
+        self.step_forward_btn = QPushButton("|>")
+        self.step_forward_btn.clicked.connect(lambda: self.step(1))
+        controls.addWidget(self.step_forward_btn)
+        
+        self.speed_combo = QComboBox()
+        for speed in self.SPEEDS:
+            self.speed_combo.addItem(f"{speed}x", speed)
+        self.speed_combo.currentIndexChanged.connect(self.change_speed)
+        controls.addWidget(self.speed_combo)
+        
+        self.position_label = QLabel("--")
+        controls.addWidget(self.position_label)
+        layout.addLayout(controls)
+        
+        # Presents cached frames on the GUI thread at the recording's frame rate
+        self.present_timer = QTimer(self)
+        self.present_timer.timeout.connect(self.present)
+    
+    def start_decoder(self, segments, start_time):
+        if self.decoder is None:
+            self.decoder = PlaybackDecoder()
+            self.decoder.speed = self.speed_combo.currentData()
+            self.decoder.start()
+        self.decoder.send('open', segments, start_time)
+        self.frames_shown = False
+        self.play_btn.setText("Pause")
+        self.present_timer.start(30)
+    
+    def open(self, file_path):
+        self.timeline_mode = False
+        self.duration = 0.0
+        self.timeline_bar.hide()
+        self.slider.show()
+        self.slider.setEnabled(False)
+        self.start_decoder([{'file_path': file_path, 'start_ts': 0.0, 'end_ts': None, 'fps': None}], 0.0)
+    
+    def open_timeline(self, camera_id, start_ts, end_ts, position_ts=None):
+        # Plays every segment of camera_id in [start_ts, end_ts) back to back
+        segments, motion_events = load_timeline(camera_id, start_ts, end_ts)
+        if not segments:
+            return False
+        self.timeline_mode = True
+        self.slider.hide()
+        self.timeline_bar.set_data(start_ts, end_ts, segments, motion_events, camera_id)
+        self.timeline_bar.show()
+        self.start_decoder(segments, start_ts if position_ts is None else position_ts)
+        return True
+    
+    def present(self):
+        decoder = self.decoder
+        if not self.timeline_mode and decoder.frame_count and not self.duration:
+            self.duration = decoder.frame_count / decoder.fps
+            self.slider.setRange(0, int(self.duration * 1000))
+            self.slider.setEnabled(True)
+        if decoder.fps:
+            self.present_timer.setInterval(max(1, int(1000 / decoder.fps)))
+        
+        cached = decoder.pop()
+        if cached is None:
+            return
+        timestamp, frame = cached
+        if frame is None:
+            self.play_btn.setText("Play")
+            if not self.frames_shown and decoder.still_recording:
+                self.display.setText("Still recording: this segment can be played once it is closed")
+            return
+        self.current_time = timestamp
+        self.frames_shown = True
+        self.display.update_frame(frame)
+        
+        if self.timeline_mode:
+            self.timeline_bar.set_playhead(timestamp)
+            self.position_label.setText(datetime.fromtimestamp(timestamp).strftime("%H:%M:%S"))
+        else:
+            if not self.slider.isSliderDown():
+                self.slider.setValue(int(timestamp * 1000))
+            position = f"{int(timestamp // 60):02d}:{timestamp % 60:05.2f}"
+            self.position_label.setText(f"{position} (still recording)" if decoder.still_recording else position)
+    
+    def toggle_play(self):
+        if self.decoder is None:
+            return
+        if self.decoder.playing:
+            # Rewind the decoder from its read-ahead position to the frame on screen
+            self.decoder.send('pause')
+            self.decoder.send('seek', self.current_time)
+            self.play_btn.setText("Play")
+        else:
+            self.decoder.send('play')
+            self.play_btn.setText("Pause")
+    
+    def seek(self, timestamp):
+        if self.decoder is not None:
+            self.decoder.send('seek', timestamp)
+    
+    def step(self, frames):
+        if self.decoder is not None and self.decoder.fps:
+            self.decoder.send('pause')
+            self.decoder.send('seek', self.current_time + frames / self.decoder.fps)
+            self.play_btn.setText("Play")
+    
+    def change_speed(self):
+        if self.decoder is not None:
+            self.decoder.send('speed', self.speed_combo.currentData())
+    
+    def stop(self):
+        self.present_timer.stop()
+        if self.decoder is not None:
+            self.decoder.send('stop')
+            self.decoder.join(timeout=2)
+            self.decoder = None
+
+# Synchronised multi-camera playback (one decoder thread per stream, shared clock)
+class SyncPlayer(QWidget):
+    MAX_LAG = 0.5  # seconds the clock may run ahead of the slowest stream
+    SPEEDS = (1, 2, 4, 8)
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.streams = []  # (camera_id, decoder, widget)
+        self.finished = set()
+        self.clock_ts = 0.0
+        self.end_ts = 0.0
+        self.playing = False
+        self.speed = 1
+        self.last_tick = None
+        
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+        
+        self.grid = QGridLayout()
+        grid_container = QWidget()
+        grid_container.setLayout(self.grid)
+        layout.addWidget(grid_container)
+        
+        controls = QHBoxLayout()
+        self.play_btn = QPushButton("Pause")
+        self.play_btn.clicked.connect(self.toggle_play)
+        controls.addWidget(self.play_btn)
+        
+        self.speed_combo = QComboBox()
+        for speed in self.SPEEDS:
+            self.speed_combo.addItem(f"{speed}x", speed)
+        self.speed_combo.currentIndexChanged.connect(
+            lambda: setattr(self, 'speed', self.speed_combo.currentData()))
+        controls.addWidget(self.speed_combo)
+        
+        self.clock_label = QLabel("--")
+        controls.addWidget(self.clock_label)
+        layout.addLayout(controls)
+        
+        self.tick_timer = QTimer(self)
+        self.tick_timer.timeout.connect(self.tick)
+    
+    def open(self, camera_ids, start_ts, end_ts):
+        self.stop()
+        self.clock_ts = start_ts
+        self.end_ts = end_ts
+        columns = math.ceil(math.sqrt(len(camera_ids))) if camera_ids else 1
+        
+        for i, camera_id in enumerate(camera_ids):
+            segments, _ = load_timeline(camera_id, start_ts, end_ts)
+            widget = CameraWidget(camera_id, telemetry_enabled=False)
+            widget.setMinimumSize(160, 120)
+            self.grid.addWidget(widget, i // columns, i % columns)
+            if not segments:
+                widget.setText(f"Camera {camera_id + 1}: no recordings")
+                continue
+            
+            # Decoders skip frames that are already behind the shared clock
+            decoder = PlaybackDecoder()
+            decoder.clock = lambda: self.clock_ts
+            decoder.start()
+            decoder.send('open', segments, start_ts)
+            self.streams.append((camera_id, decoder, widget))
+        
+        self.playing = True
+        self.play_btn.setText("Pause")
+        self.last_tick = time.monotonic()
+        self.tick_timer.start(10)
+        return bool(self.streams)
+    
+    def tick(self):
+        now = time.monotonic()
+        elapsed = now - self.last_tick
+        self.last_tick = now
+        
+        if self.playing:
+            # The clock follows real time but never runs more than MAX_LAG ahead of the
+            # slowest live stream; it jumps over gaps where no camera has footage
+            target = self.clock_ts + elapsed * self.speed
+            earliest_next = None
+            for _, decoder, _ in self.streams:
+                if decoder in self.finished:
+                    continue
+                next_ts = decoder.peek_time()
+                if next_ts is None:
+                    target = self.clock_ts  # still decoding: hold the clock
+                    earliest_next = -1
+                elif next_ts >= 0:
+                    target = min(target, next_ts + self.MAX_LAG)
+                    if earliest_next != -1:
+                        earliest_next = next_ts if earliest_next is None else min(earliest_next, next_ts)
+            if earliest_next is not None and earliest_next > target:
+                target = earliest_next
+            self.clock_ts = min(max(target, self.clock_ts), self.end_ts)
+        
+        for _, decoder, widget in self.streams:
+            due = decoder.pop_until(self.clock_ts)
+            if due is None:
+                continue
+            frame_ts, frame = due
+            if frame is None:
+                self.finished.add(decoder)
+            else:
+                widget.update_frame(frame)
+        
+        self.clock_label.setText(datetime.fromtimestamp(self.clock_ts).strftime("%Y-%m-%d %H:%M:%S"))
+        if self.clock_ts >= self.end_ts or len(self.finished) == len(self.streams):
+            self.playing = False
+            self.play_btn.setText("Play")
+    
+    def toggle_play(self):
+        self.playing = not self.playing
+        self.play_btn.setText("Pause" if self.playing else "Play")
+        self.last_tick = time.monotonic()
+    
+    def stop(self):
+        self.tick_timer.stop()
+        for _, decoder, _ in self.streams:
+            decoder.send('stop')
+        for _, decoder, _ in self.streams:
+            decoder.join(timeout=2)
+        self.streams = []
+        self.finished = set()
+        for i in reversed(range(self.grid.count())):
+            self.grid.itemAt(i).widget().setParent(None)
+
+# Clip export: the segments covering a range become one file. With ffmpeg, whole GOPs are
+# stream-copied and only the partial GOPs at the cut points are re-encoded; without it,
+# every frame is re-encoded through OpenCV.
+EXPORT_ENCODERS = {'mpeg4': ['-c:v', 'mpeg4', '-vtag', 'xvid', '-q:v', '3'],
+                   'mjpeg': ['-c:v', 'mjpeg', '-q:v', '3'],
+                   'h264': ['-c:v', 'libx264', '-preset', 'veryfast', '-crf', '20']}
+
+def ffmpeg_tools():
+    ffmpeg, ffprobe = shutil.which('ffmpeg'), shutil.which('ffprobe')
+    return (ffmpeg, ffprobe) if ffmpeg and ffprobe else None
+
+def probe_keyframes(ffprobe, file_path):
+    # Keyframe times from the packet index; nothing is decoded
+    output = subprocess.run([ffprobe, '-v', 'error', '-select_streams', 'v:0',
+                             '-show_entries', 'packet=pts_time,flags', '-of', 'csv=p=0', file_path],
+                            capture_output=True, text=True, check=True).stdout
+    keyframes = []
+    for line in output.splitlines():
+        pts_time, _, flags = line.partition(',')
+        if 'K' in flags and pts_time not in ('', 'N/A'):
+            keyframes.append(float(pts_time))
+    return keyframes
+
+def probe_codec(ffprobe, file_path):
+    return subprocess.run([ffprobe, '-v', 'error', '-select_streams', 'v:0', '-show_entries', 'stream=codec_name',
+                           '-of', 'csv=p=0', file_path], capture_output=True, text=True, check=True).stdout.strip()
+
+class ExportJob:
+    STATES = ('queued', 'running', 'done', 'failed', 'cancelled')
+    
+    def __init__(self, camera_id, start_ts, end_ts, output_path):
+        self.camera_id = camera_id
+        self.start_ts = start_ts
+        self.end_ts = end_ts
+        self.output_path = output_path
+        self.state = 'queued'
+        self.progress = 0.0
+        self.method = None  # 'stream copy' or 're-encode'
+        self.error = None
+        self.cancelled = threading.Event()
+    
+    def describe(self):
+        text = (f"Camera {self.camera_id + 1} {datetime.fromtimestamp(self.start_ts):%Y-%m-%d %H:%M:%S}-"
+                f"{datetime.fromtimestamp(self.end_ts):%H:%M:%S} -> {os.path.basename(self.output_path)}: ")
+        if self.state == 'running':
+            text += f"{self.progress:.0%}"
+        else:
+            text += self.state
+        if self.method:
+            text += f" ({self.method})"
+        if self.error:
+            text += f" - {self.error}"
+        return text
+
+class ExportQueue(threading.Thread):
+    # One job at a time: exports are bound by the disk, and running them in parallel only adds seeks
+    CONCAT_SHARE = 0.1  # share of the progress bar for joining the parts
+    
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.jobs = []
+        self.pending = queue.Queue()
+        self.lock = threading.Lock()
+    
+    def submit(self, job):
+        with self.lock:
+            if not self.is_alive():
+                self.start()
+            self.jobs.append(job)
+        self.pending.put(job)
+        return job
+    
+    def run(self):
+        while True:
+            job = self.pending.get()
+            if job is None:
+                break
+            if job.cancelled.is_set():
+                job.state = 'cancelled'
+                continue
+            job.state = 'running'
+            try:
+                segments, _ = load_timeline(job.camera_id, job.start_ts, job.end_ts)
+                if not segments:
+                    raise ValueError("no recordings in range")
+                tools = ffmpeg_tools()
+                if tools is not None:
+                    job.method = 'stream copy'
+                    self.export_stream_copy(job, segments, *tools)
+                else:
+                    job.method = 're-encode'
+                    self.export_reencode(job, segments)
+                job.state = 'cancelled' if job.cancelled.is_set() else 'done'
+                job.progress = 1.0
+            except Exception as e:  # any error fails this job only; the queue keeps running
+                job.state = 'cancelled' if job.cancelled.is_set() else 'failed'
+                job.error = None if job.cancelled.is_set() else str(e) or type(e).__name__
+            if job.state != 'done':
+                try:
+                    os.remove(job.output_path)
+                except OSError:
+                    pass
+    
+    def plan_parts(self, job, segments, ffprobe):
+        # (file, in, out, copy) in file seconds; a cut inside a GOP re-encodes up to the next keyframe
+        parts = []
+        for segment in segments:
+            cut_in = max(0.0, job.start_ts - segment['start_ts'])
+            cut_out = min(job.end_ts, segment['end_ts']) - segment['start_ts']
+            if cut_out <= cut_in:
+                continue
+            if cut_in == 0 and job.end_ts >= segment['end_ts']:
+                parts.append((segment['file_path'], None, None, True))  # the whole file
+                continue
+            keyframes = [t for t in probe_keyframes(ffprobe, segment['file_path']) if cut_in <= t <= cut_out]
+            if not keyframes:
+                parts.append((segment['file_path'], cut_in, cut_out, False))
+                continue
+            copy_in, copy_out = keyframes[0], keyframes[-1]
+            if copy_in > cut_in:
+                parts.append((segment['file_path'], cut_in, copy_in, False))
+            if copy_out > copy_in:
+                parts.append((segment['file_path'], copy_in, copy_out, True))
+            if cut_out > copy_out:
+                parts.append((segment['file_path'], copy_out, cut_out, False))
+        return parts
+    
+    def run_ffmpeg(self, job, command, duration, done, total):
+        # Progress from ffmpeg's -progress output, as a share of total seconds of output
+        process = subprocess.Popen(command + ['-progress', 'pipe:1', '-nostats', '-loglevel', 'error'],
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        for line in process.stdout:
+            if job.cancelled.is_set():
+                process.terminate()
+                break
+            key, _, value = line.strip().partition('=')
+            if key == 'out_time_us' and value.isdigit() and duration:
+                job.progress = (done + min(int(value) / 1e6, duration)) / total
+        stderr = process.stderr.read()
+        if process.wait() != 0 and not job.cancelled.is_set():
+            raise subprocess.CalledProcessError(process.returncode, command[0], stderr=stderr)
+    
+    def export_stream_copy(self, job, segments, ffmpeg, ffprobe):
+        work_dir = tempfile.mkdtemp(prefix=".export_", dir=os.path.dirname(os.path.abspath(job.output_path)))
+        try:
+            parts = self.plan_parts(job, segments, ffprobe)
+            durations = []
+            for file_path, cut_in, cut_out, _ in parts:
+                if cut_in is None:
+                    segment = next(s for s in segments if s['file_path'] == file_path)
+                    durations.append(segment['end_ts'] - segment['start_ts'])
+                else:
+                    durations.append(cut_out - cut_in)
+            total = sum(durations) / (1 - self.CONCAT_SHARE)
+            encoders = {}
+            part_paths = []
+            done = 0.0
+            for index, ((file_path, cut_in, cut_out, copy), duration) in enumerate(zip(parts, durations)):
+                if job.cancelled.is_set():
+                    return
+                part_path = os.path.join(work_dir, f"part_{index:05d}.avi")
+                command = [ffmpeg, '-y']
+                if cut_in is not None:
+                    command += ['-ss', f"{cut_in:.3f}"]
+                command += ['-i', file_path]
+                if cut_in is not None:
+                    command += ['-t', f"{cut_out - cut_in:.3f}"]
+                if copy:
+                    command += ['-c', 'copy', '-avoid_negative_ts', 'make_zero']
+                else:
+                    if file_path not in encoders:
+                        encoders[file_path] = EXPORT_ENCODERS.get(probe_codec(ffprobe, file_path),
+                                                                  EXPORT_ENCODERS['mpeg4'])
+                    command += encoders[file_path] + ['-an']
+                self.run_ffmpeg(job, command + [part_path], duration, done, total)
+                part_paths.append(part_path)
+                done += duration
+            if job.cancelled.is_set():
+                return
+            
+            # Join the parts without touching the frames again
+            list_path = os.path.join(work_dir, "parts.txt")
+            with open(list_path, 'w') as f:
+                for part_path in part_paths:
+                    f.write(f"file '{part_path}'\n")
+            self.run_ffmpeg(job, [ffmpeg, '-y', '-f', 'concat', '-safe', '0', '-i', list_path, '-c', 'copy',
+                                  job.output_path], total - done, done, total)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    
+    def export_reencode(self, job, segments):
+        # Segments are written at a constant rate, so rows without a measured FPS use the writer's
+        frame_total = sum((min(job.end_ts, s['end_ts']) - max(job.start_ts, s['start_ts']))
+                          * (s['fps'] or RecordingManager.WRITER_FPS) for s in segments)
+        writer = None
+        frame_size = None
+        frames_done = 0
+        try:
+            for segment in segments:
+                fps = segment['fps'] or RecordingManager.WRITER_FPS
+                capture = cv2.VideoCapture(segment['file_path'])
+                first = int(max(0.0, job.start_ts - segment['start_ts']) * fps)
+                last = int((min(job.end_ts, segment['end_ts']) - segment['start_ts']) * fps)
+                if first:
+                    capture.set(cv2.CAP_PROP_POS_FRAMES, first)
+                for _ in range(first, last):
+                    if job.cancelled.is_set():
+                        capture.release()
+                        return
+                    ret, frame = capture.read()
+                    if not ret:
+                        break
+                    if writer is None:
+                        frame_size = frame.shape[1::-1]
+                        writer = cv2.VideoWriter(job.output_path, cv2.VideoWriter_fourcc(*'XVID'), fps, frame_size)
+                        if not writer.isOpened():
+                            raise OSError(f"cannot write {job.output_path}")
+                    if frame.shape[1::-1] != frame_size:
+                        frame = cv2.resize(frame, frame_size, interpolation=cv2.INTER_AREA)
+                    writer.write(frame)
+                    frames_done += 1
+                    job.progress = min(frames_done / max(1, frame_total), 1.0)
+                capture.release()
+            if writer is None:
+                raise ValueError("no frames in range")
+        finally:
+            if writer is not None:
+                writer.release()
+    
+    def stop(self):
+        for job in self.jobs:
+            job.cancelled.set()
+        self.pending.put(None)
+        if self.is_alive():
+            self.join(timeout=5)
+
+# Region of interest drawn with the mouse over a reference frame, kept in normalised coordinates
+class RoiSelector(QLabel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setAlignment(Qt.AlignCenter)
+        self.setStyleSheet("background-color: black;")
+        self.setMinimumSize(320, 180)
+        self.frame = None  # QPixmap of the reference frame
+        self.roi = (0.0, 0.0, 1.0, 1.0)
+        self.drag_start = None
+    
+    def set_frame(self, frame):
+        self.frame = None if frame is None else numpy_to_pixmap(np.ascontiguousarray(frame))
+        self.update()
+    
+    def image_rect(self):
+        if self.frame is None:
+            return self.rect()
+        scaled = self.frame.size().scaled(self.size(), Qt.KeepAspectRatio)
+        x = (self.width() - scaled.width()) // 2
+        y = (self.height() - scaled.height()) // 2
+        return self.rect().adjusted(x, y, -x, -y)
+    
+    def normalised(self, pos):
+        rect = self.image_rect()
+        return (min(max((pos.x() - rect.x()) / max(1, rect.width()), 0.0), 1.0),
+                min(max((pos.y() - rect.y()) / max(1, rect.height()), 0.0), 1.0))
+    
+    def mousePressEvent(self, event):
+        self.drag_start = self.normalised(event.pos())
+    
+    def mouseMoveEvent(self, event):
+        if self.drag_start is None:
+            return
+        (x0, y0), (x1, y1) = self.drag_start, self.normalised(event.pos())
+        if x0 != x1 and y0 != y1:
+            self.roi = (min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1))
+            self.update()
+    
+    def mouseReleaseEvent(self, event):
+        self.drag_start = None
+    
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        painter = QPainter(self)
+        rect = self.image_rect()
+        if self.frame is not None:
+            painter.drawPixmap(rect, self.frame)
+        x0, y0, x1, y1 = self.roi
+        painter.setPen(QColor(255, 200, 0))
+        painter.drawRect(int(rect.x() + x0 * rect.width()), int(rect.y() + y0 * rect.height()),
+                         int((x1 - x0) * rect.width()) - 1, int((y1 - y0) * rect.height()) - 1)
+        painter.end()
+
+# Privacy mask polygons over a live frame: click adds a point, double-click closes the
+# polygon, right-click takes back the last point (or polygon)
+class MaskCanvas(RoiSelector):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.polygons = []  # [{'points': [[x, y], ...], 'mode': ...}], edited in place
+        self.points = []
+        self.mode = 'black'
+    
+    def set_polygons(self, polygons):
+        self.polygons = polygons
+        self.points = []
+        self.update()
+    
+    def mousePressEvent(self, event):
+        if event.button() == Qt.RightButton:
+            self.undo_point()
+        else:
+            self.points.append(list(self.normalised(event.pos())))
+            self.update()
+    
+    def mouseMoveEvent(self, event):
+        pass
+    
+    def mouseDoubleClickEvent(self, event):
+        self.close_polygon()
+    
+    def close_polygon(self):
+        if len(self.points) >= 3:
+            self.polygons.append({'points': self.points, 'mode': self.mode})
+        self.points = []
+        self.update()
+    
+    def undo_point(self):
+        if self.points:
+            self.points.pop()
+        elif self.polygons:
+            self.polygons.pop()
+        self.update()
+    
+    def to_widget(self, rect, points):
+        return QPolygon([QPoint(int(rect.x() + x * rect.width()), int(rect.y() + y * rect.height())) for x, y in points])
+    
+    def paintEvent(self, event):
+        QLabel.paintEvent(self, event)
+        painter = QPainter(self)
+        rect = self.image_rect()
+        if self.frame is not None:
+            painter.drawPixmap(rect, self.frame)
+        painter.setPen(QColor(255, 200, 0))
+        for polygon in self.polygons:
+            painter.setBrush(QColor(0, 0, 0, 200) if polygon['mode'] == 'black' else QColor(80, 140, 255, 140))
+            painter.drawPolygon(self.to_widget(rect, polygon['points']))
+        if self.points:
+            painter.setPen(QColor(0, 255, 0))
+            painter.setBrush(Qt.NoBrush)
+            painter.drawPolyline(self.to_widget(rect, self.points))
+        painter.end()
+
+def reference_frame(camera_id, start_ts, end_ts):
+    # First record-time thumbnail of the camera in the range, to draw the ROI on
+    row = recordings_db.query("SELECT recording_id, slot FROM thumbnails WHERE camera_id=? AND ts >= ? AND ts < ? "
+                              "ORDER BY ts LIMIT 1", (camera_id, int(start_ts), int(end_ts)), one=True)
+    if row is None:
+        return None
+    return thumbnail_store.thumbnail(*row)
+
+LOGO_PATH = "logo.png"
+logo_cache = None
+
+def logo_pixmap():
+    # Drawn once and saved, so later starts only load it; a custom logo.png is used as is
+    global logo_cache
+    if logo_cache is None:
+        logo_cache = QPixmap(LOGO_PATH) if os.path.exists(LOGO_PATH) else QPixmap()
+        if logo_cache.isNull():
+            logo_cache = QPixmap(200, 200)
+            logo_cache.fill(QColor(70, 130, 180))
+            painter = QPainter(logo_cache)
+            painter.setPen(QColor(255, 255, 255))
+            font = painter.font()
+            font.setPointSize(14)
+            painter.setFont(font)
+            painter.drawText(logo_cache.rect(), Qt.AlignCenter, "Security Camera\nSystem")
+            painter.end()
+            logo_cache.save(LOGO_PATH)
+    return logo_cache
+
+# Login Window
+class LoginWindow(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent, Qt.Window)  # its own window; the main window stays hidden until login
+        self.parent = parent
+        self.setWindowTitle("Security Camera System - Login")
+        self.setFixedSize(400, 300)
+        
+        layout = QVBoxLayout()
+        
+        self.logo_label = QLabel()
+        self.logo_label.setPixmap(logo_pixmap().scaled(200, 200, Qt.KeepAspectRatio))
+        self.logo_label.setAlignment(Qt.AlignCenter)
+        layout.addWidget(self.logo_label)
+        
+        self.username_input = QLineEdit()
+        self.username_input.setPlaceholderText("Username")
+        layout.addWidget(self.username_input)
+        
+        self.password_input = QLineEdit()
+        self.password_input.setPlaceholderText("Password")
+        self.password_input.setEchoMode(QLineEdit.Password)
+        layout.addWidget(self.password_input)
+        
+        self.login_btn = QPushButton("Login")
+        self.login_btn.clicked.connect(self.login_check)
+        layout.addWidget(self.login_btn)
+        
+        self.setLayout(layout)
+    
+    def login_check(self):
+        username = self.username_input.text()
+        password = self.password_input.text()
+        
+        self.parent.wait_for_backend()
+        user = personnel_db.query("SELECT * FROM personnel WHERE username=? AND password=?",
+                                  (username, password), one=True)
+        
+        if user:
+            self.parent.username = user[1]
+            self.parent.authority = user[3]
+            if isinstance(self.parent.service, RemoteRecorderService):
+                self.parent.service.credentials = (username, password)
+            self.parent.init_ui()
+            self.close()
+        else:
+            QMessageBox.warning(self, "Error", "Invalid username or password!")
+
+# Service statistics fetched on a worker thread, so a recorder daemon round trip never stalls the GUI
+class StatsPoller(QObject):
+    stats_ready = pyqtSignal(object)  # stats dict, or None while the service is unreachable
+    
+    def __init__(self, service, interval=1.0):
+        super().__init__()
+        self.service = service
+        self.interval = interval
+        self.stopped = None
+    
+    def start(self):
+        if self.stopped is None:
+            self.stopped = threading.Event()
+            threading.Thread(target=self.run, args=(self.stopped,), daemon=True).start()
+    
+    def stop(self):
+        if self.stopped is not None:
+            self.stopped.set()
+            self.stopped = None
+    
+    def run(self, stopped):
+        while not stopped.is_set():
+            try:
+                stats = self.service.stats()
+            except (OSError, ValueError):
+                stats = None
+            if not stopped.is_set():
+                self.stats_ready.emit(stats)  # queued to the GUI thread
+            stopped.wait(self.interval)
+
+# Settings applied on a worker thread: restarting cameras joins their threads (and a daemon
+# round trip waits for that), so the GUI only hears back once the service is done
+class ConfigureWorker(QObject):
+    applied = pyqtSignal(bool)  # True if the set of cameras changed
+    failed = pyqtSignal(str)
+    
+    def __init__(self, service, settings):
+        super().__init__()
+        self.service = service
+        self.settings = settings
+    
+    def start(self):
+        threading.Thread(target=self.run, daemon=True).start()
+    
+    def run(self):
+        try:
+            restarted = self.service.configure(**self.settings)
+        except (OSError, ValueError) as e:
+            self.failed.emit(str(e))  # queued to the GUI thread
+            return
+        self.applied.emit(bool(restarted))
+
+# Main Application Window
+class CameraSystem(QMainWindow):
+    SEARCH_MAX_RESULTS = 200
+    
+    def __init__(self, service, backend=None):
+        super().__init__()
+        self.username = None
+        self.authority = None
+        # Capture, recording and retention live in the service (in-process or the recorder daemon)
+        self.service = service
+        self.backend = backend  # startup thread still bringing up the databases and service
+        self.camera_widgets = []
+        self.focused_camera = None
+        self.show_overlay = False  # per-tile FPS and latency
+        self.last_stats = None
+        self.export_queue = ExportQueue()
+        self.login_window = LoginWindow(self)
+        self.login_window.show()
+        
+        self.camera_layout = QGridLayout()
+    
+    def wait_for_backend(self):
+        if self.backend is not None:
+            self.backend.join()
+            self.backend = None
+    
+    def init_ui(self):
+        # The window is built once; later logins only refresh what depends on the user
+        if self.centralWidget() is None:
+            self.build_ui()
+        self.setWindowTitle(f"Security Camera System - {self.username} ({self.authority})")
+        is_admin = self.authority == 'admin'
+        self.admin_action.setVisible(is_admin)
+        mixed_index = self.tab_widget.indexOf(self.mixed_mode_tab)
+        if is_admin and mixed_index == -1:
+            self.tab_widget.addTab(self.mixed_mode_tab, "Mixed Mode")
+        elif not is_admin and mixed_index != -1:
+            self.tab_widget.removeTab(mixed_index)
+        self.tab_widget.setCurrentWidget(self.live_view_tab)
+        
+        # Live tiles for the cameras the service is capturing
+        self.build_camera_grid()
+        self.live_update_timer.start(30)  # ~30 FPS
+        self.stats_poller.start()
+        self.show()
+    
+    def build_ui(self):
+        self.setMinimumSize(1280, 720)
+        
+        # Central widget
+        central_widget = QWidget()
+        self.setCentralWidget(central_widget)
+        
+        # Main layout
+        main_layout = QVBoxLayout()
+        central_widget.setLayout(main_layout)
+        
+        # Menu bar
+        menubar = self.menuBar()
+        
+        # File menu
+        file_menu = menubar.addMenu('File')
+        
+        self.admin_action = file_menu.addAction('Admin Panel')
+        self.admin_action.triggered.connect(self.open_admin_panel)
+        
+        logout_action = file_menu.addAction('Logout')
+        logout_action.triggered.connect(self.logout)
+        
+        # View menu
+        view_menu = menubar.addMenu('View')
+        overlay_action = view_menu.addAction('Performance Overlay')
+        overlay_action.setCheckable(True)
+        overlay_action.setChecked(self.show_overlay)
+        overlay_action.toggled.connect(self.set_overlay_visible)
+        
+        # Tabs
+        self.tab_widget = QTabWidget()
+        main_layout.addWidget(self.tab_widget)
+        
+        # Live View Tab
+        self.live_view_tab = QWidget()
+        self.live_view_layout = QVBoxLayout()
+        self.live_view_tab.setLayout(self.live_view_layout)
+        
+        self.camera_container = QWidget()
+        self.camera_container.setLayout(self.camera_layout)
+        self.live_view_layout.addWidget(self.camera_container)
+        
+        self.tab_widget.addTab(self.live_view_tab, "Live View")
+        
+        # The other tabs (and their queries) are built the first time they are opened
+        self.history_tab = QWidget()
+        self.sync_tab = QWidget()
+        self.search_tab = QWidget()
+        self.mixed_mode_tab = QWidget()
+        self.tab_builders = {self.history_tab: self.build_history_tab,
+                             self.sync_tab: self.build_sync_tab,
+                             self.search_tab: self.build_search_tab,
+                             self.mixed_mode_tab: self.build_mixed_tab}
+        self.tab_widget.addTab(self.history_tab, "History")
+        self.tab_widget.addTab(self.sync_tab, "Sync Playback")
+        self.tab_widget.addTab(self.search_tab, "Motion Search")
+        self.tab_widget.currentChanged.connect(self.tab_changed)
+        
+        # One lazily paged model backs both the history and mixed-mode lists
+        self.recordings_model = RecordingsModel(self)
+        
+        # Timers run while someone is logged in
+        self.live_update_timer = QTimer()
+        self.live_update_timer.timeout.connect(self.update_live)
+        
+        # Capture statistics in the status bar
+        self.stats_poller = StatsPoller(self.service)
+        self.stats_poller.stats_ready.connect(self.show_capture_stats)
+    
+    def tab_changed(self, index):
+        self.build_tab(self.tab_widget.widget(index))
+        self.update_render_state()
+    
+    def build_tab(self, tab):
+        builder = self.tab_builders.pop(tab, None)
+        if builder is not None:
+            builder()
+    
+    def build_history_tab(self):
+        self.history_layout = QVBoxLayout()
+        self.history_tab.setLayout(self.history_layout)
+        
+        # Filter section
+        filter_group = QGroupBox("Filters")
+        filter_layout = QHBoxLayout()
+        
+        self.camera_filter_combo = QComboBox()
+        self.camera_filter_combo.addItem("All Cameras", -1)
+        for i in range(self.service.camera_count):
+            self.camera_filter_combo.addItem(f"Camera {i+1}", i)
+        
+        self.date_filter = QDateEdit()
+        self.date_filter.setDate(QDate.currentDate())
+        self.date_filter.setCalendarPopup(True)
+        
+        self.filter_btn = QPushButton("Filter")
+        self.filter_btn.clicked.connect(self.filter_recordings)
+        
+        filter_layout.addWidget(QLabel("Camera:"))
+        filter_layout.addWidget(self.camera_filter_combo)
+        filter_layout.addWidget(QLabel("Date:"))
+        filter_layout.addWidget(self.date_filter)
+        filter_layout.addWidget(self.filter_btn)
+        
+        # Jump straight to the segment covering a time of day
+        self.time_filter = QTimeEdit()
+        self.time_filter.setDisplayFormat("HH:mm:ss")
+        self.go_to_time_btn = QPushButton("Go to Time")
+        self.go_to_time_btn.clicked.connect(self.go_to_time)
+        filter_layout.addWidget(QLabel("Time:"))
+        filter_layout.addWidget(self.time_filter)
+        filter_layout.addWidget(self.go_to_time_btn)
+        
+        # Continuous playback of one camera over a time range
+        self.end_time_filter = QTimeEdit()
+        self.end_time_filter.setDisplayFormat("HH:mm:ss")
+        self.end_time_filter.setTime(QTime(23, 59, 59))
+        self.play_range_btn = QPushButton("Play Range")
+        self.play_range_btn.clicked.connect(self.play_range)
+        filter_layout.addWidget(QLabel("To:"))
+        filter_layout.addWidget(self.end_time_filter)
+        filter_layout.addWidget(self.play_range_btn)
+        self.export_btn = QPushButton("Export Range")
+        self.export_btn.clicked.connect(self.export_range)
+        filter_layout.addWidget(self.export_btn)
+        filter_group.setLayout(filter_layout)
+        self.history_layout.addWidget(filter_group)
+        
+        # Recordings list
+        self.recordings_list = QListView()
+        self.recordings_list.setUniformItemSizes(True)
+        self.recordings_list.setModel(self.recordings_model)
+        self.recordings_list.doubleClicked.connect(self.play_recording)
+        self.recordings_list.selectionModel().currentChanged.connect(self.show_filmstrip)
+        self.history_layout.addWidget(self.recordings_list)
+        
+        # Filmstrip of the selected recording, read from its thumbnail sprite
+        self.filmstrip = QLabel()
+        self.filmstrip.setAlignment(Qt.AlignCenter)
+        self.filmstrip.setFixedHeight(100)
+        self.history_layout.addWidget(self.filmstrip)
+        
+        # Background exports; they keep running across logins
+        export_group = QGroupBox("Exports")
+        export_layout = QHBoxLayout()
+        self.exports_list = QListWidget()
+        self.exports_list.setMaximumHeight(80)
+        export_layout.addWidget(self.exports_list)
+        self.cancel_export_btn = QPushButton("Cancel Export")
+        self.cancel_export_btn.clicked.connect(self.cancel_export)
+        export_layout.addWidget(self.cancel_export_btn)
+        export_group.setLayout(export_layout)
+        self.history_layout.addWidget(export_group)
+        
+        # Time-lapse digests overlapping the selected day
+        digest_group = QGroupBox("Time-lapse Digests")
+        digest_layout = QHBoxLayout()
+        self.digests_list = QListWidget()
+        self.digests_list.setMaximumHeight(80)
+        self.digests_list.itemDoubleClicked.connect(self.play_digest)
+        digest_layout.addWidget(self.digests_list)
+        digest_group.setLayout(digest_layout)
+        self.history_layout.addWidget(digest_group)
+        self.export_timer = QTimer()
+        self.export_timer.timeout.connect(self.update_exports)
+        self.export_timer.start(500)
+        self.update_exports()
+        
+        # Update recordings list
+        self.filter_recordings()
+        
+        # Recording player
+        self.recording_player = VideoPlayer()
+        self.recording_player.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.history_layout.addWidget(self.recording_player)
+    
+    def build_sync_tab(self):
+        sync_layout = QVBoxLayout()
+        self.sync_tab.setLayout(sync_layout)
+        
+        sync_filter_group = QGroupBox("Cameras and Time Window")
+        sync_filter_layout = QHBoxLayout()
+        self.sync_camera_list = QListWidget()
+        self.sync_camera_list.setMaximumHeight(80)
+        for i in range(self.service.camera_count):
+            self.sync_camera_list.addItem(f"Camera {i+1}")
+            item = self.sync_camera_list.item(i)
+            item.setData(Qt.UserRole, i)
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+            item.setCheckState(Qt.Checked if i < 4 else Qt.Unchecked)
+        sync_filter_layout.addWidget(self.sync_camera_list)
+        
+        self.sync_date = QDateEdit()
+        self.sync_date.setDate(QDate.currentDate())
+        self.sync_date.setCalendarPopup(True)
+        self.sync_start_time = QTimeEdit()
+        self.sync_start_time.setDisplayFormat("HH:mm:ss")
+        self.sync_end_time = QTimeEdit()
+        self.sync_end_time.setDisplayFormat("HH:mm:ss")
+        self.sync_end_time.setTime(QTime(23, 59, 59))
+        self.sync_play_btn = QPushButton("Play Synchronised")
+        self.sync_play_btn.clicked.connect(self.play_synchronised)
+        sync_filter_layout.addWidget(QLabel("Date:"))
+        sync_filter_layout.addWidget(self.sync_date)
+        sync_filter_layout.addWidget(QLabel("From:"))
+        sync_filter_layout.addWidget(self.sync_start_time)
+        sync_filter_layout.addWidget(QLabel("To:"))
+        sync_filter_layout.addWidget(self.sync_end_time)
+        sync_filter_layout.addWidget(self.sync_play_btn)
+        sync_filter_group.setLayout(sync_filter_layout)
+        sync_layout.addWidget(sync_filter_group)
+        
+        self.sync_player = SyncPlayer()
+        self.sync_player.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        sync_layout.addWidget(self.sync_player)
+    
+    def build_search_tab(self):
+        search_layout = QVBoxLayout()
+        self.search_tab.setLayout(search_layout)
+        
+        search_filter_group = QGroupBox("Camera, Time Range and Sensitivity")
+        search_filter_layout = QHBoxLayout()
+        self.search_camera_combo = QComboBox()
+        for i in range(self.service.camera_count):
+            self.search_camera_combo.addItem(f"Camera {i+1}", i)
+        self.search_date = QDateEdit()
+        self.search_date.setDate(QDate.currentDate())
+        self.search_date.setCalendarPopup(True)
+        self.search_start_time = QTimeEdit()
+        self.search_start_time.setDisplayFormat("HH:mm:ss")
+        self.search_end_time = QTimeEdit()
+        self.search_end_time.setDisplayFormat("HH:mm:ss")
+        self.search_end_time.setTime(QTime(23, 59, 59))
+        self.search_sensitivity_combo = QComboBox()
+        for label, threshold in (("High", 0.005), ("Normal", 0.02), ("Low", 0.05)):
+            self.search_sensitivity_combo.addItem(f"{label} ({threshold:.1%} of ROI)", threshold)
+        self.search_sensitivity_combo.setCurrentIndex(1)
+        self.search_frame_btn = QPushButton("Load Frame")
+        self.search_frame_btn.clicked.connect(self.load_search_frame)
+        self.search_btn = QPushButton("Search")
+        self.search_btn.clicked.connect(self.start_motion_search)
+        self.search_cancel_btn = QPushButton("Cancel")
+        self.search_cancel_btn.clicked.connect(self.cancel_motion_search)
+        search_filter_layout.addWidget(self.search_camera_combo)
+        search_filter_layout.addWidget(QLabel("Date:"))
+        search_filter_layout.addWidget(self.search_date)
+        search_filter_layout.addWidget(QLabel("From:"))
+        search_filter_layout.addWidget(self.search_start_time)
+        search_filter_layout.addWidget(QLabel("To:"))
+        search_filter_layout.addWidget(self.search_end_time)
+        search_filter_layout.addWidget(QLabel("Sensitivity:"))
+        search_filter_layout.addWidget(self.search_sensitivity_combo)
+        search_filter_layout.addWidget(self.search_frame_btn)
+        search_filter_layout.addWidget(self.search_btn)
+        search_filter_layout.addWidget(self.search_cancel_btn)
+        search_filter_group.setLayout(search_filter_layout)
+        search_layout.addWidget(search_filter_group)
+        
+        # ROI on the left, hits ranked by score on the right, player below
+        search_body = QHBoxLayout()
+        self.roi_selector = RoiSelector()
+        search_body.addWidget(self.roi_selector, 2)
+        search_results_layout = QVBoxLayout()
+        self.search_status = QLabel("Drag on the frame to set the region of interest")
+        search_results_layout.addWidget(self.search_status)
+        self.search_results_list = QListWidget()
+        self.search_results_list.itemDoubleClicked.connect(self.play_search_hit)
+        search_results_layout.addWidget(self.search_results_list)
+        search_body.addLayout(search_results_layout, 1)
+        search_layout.addLayout(search_body)
+        
+        self.search_player = VideoPlayer()
+        self.search_player.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        search_layout.addWidget(self.search_player)
+        
+        self.motion_search = None
+        self.search_hits = []
+        self.search_timer = QTimer()
+        self.search_timer.timeout.connect(self.poll_motion_search)
+    
+    def build_mixed_tab(self):
+        # Shares the history tab's recordings model and filters
+        self.build_tab(self.history_tab)
+        self.mixed_mode_layout = QHBoxLayout()
+        self.mixed_mode_tab.setLayout(self.mixed_mode_layout)
+        
+        # Live section
+        live_group = QGroupBox("Live View")
+        live_layout = QVBoxLayout()
+        self.mixed_live_widget = CameraWidget(0)
+        live_layout.addWidget(self.mixed_live_widget)
+        live_group.setLayout(live_layout)
+        self.mixed_mode_layout.addWidget(live_group)
+        
+        # History section
+        history_group = QGroupBox("Recordings")
+        history_layout = QVBoxLayout()
+        
+        self.mixed_recordings_list = QListView()
+        self.mixed_recordings_list.setUniformItemSizes(True)
+        self.mixed_recordings_list.setModel(self.recordings_model)
+        self.mixed_recordings_list.doubleClicked.connect(self.play_mixed_recording)
+        history_layout.addWidget(self.mixed_recordings_list)
+        
+        self.mixed_player = VideoPlayer()
+        history_layout.addWidget(self.mixed_player)
+        
+        history_group.setLayout(history_layout)
+        self.mixed_mode_layout.addWidget(history_group)
+        if self.service.camera_available(0):
+            self.service.live_feed(0).subscribe(self.mixed_live_widget.prepare_frame)
+        self.update_render_state()
+    
+    def build_camera_grid(self):
+        # Clear existing widgets
+        self.release_camera_widgets()
+        for i in reversed(range(self.camera_layout.count())): 
+            self.camera_layout.itemAt(i).widget().setParent(None)
+        
+        self.camera_widgets = []
+        self.focused_camera = None
+        
+        # Grid shape grows with the camera count (2x2, 3x3, 4x4, ...)
+        columns = math.ceil(math.sqrt(self.service.camera_count))
+        
+        for i in range(self.service.camera_count):
+            if self.service.camera_available(i):
+                # Create camera widget
+                camera_widget = CameraWidget(i)
+                camera_widget.setMinimumSize(160, 120)
+                camera_widget.double_clicked.connect(self.toggle_focus)
+                self.service.live_feed(i).subscribe(camera_widget.prepare_frame)
+                self.camera_widgets.append(camera_widget)
+                
+                # Add widget to layout
+                row = i // columns
+                col = i % columns
+                self.camera_layout.addWidget(camera_widget, row, col)
+            else:
+                self.camera_widgets.append(None)
+        
+        # Mixed mode shares camera 0's stream instead of reading the device again
+        if hasattr(self, 'mixed_live_widget') and self.service.camera_available(0):
+            self.service.live_feed(0).subscribe(self.mixed_live_widget.prepare_frame)
+        
+        self.update_render_state()
+    
+    def release_camera_widgets(self):
+        # Tiles stop receiving frames; capture and recording carry on in the service
+        widgets = [widget for widget in self.camera_widgets if widget is not None]
+        if hasattr(self, 'mixed_live_widget'):
+            widgets.append(self.mixed_live_widget)
+        for widget in widgets:
+            for full_resolution in (False, True):
+                feed = self.service.live_feed(widget.camera_id, full_resolution)
+                if feed is not None:
+                    feed.unsubscribe(widget.prepare_frame)
+    
+    def toggle_focus(self, camera_id):
+        # Double-clicking a tile shows it alone at full rate; again restores the grid
+        if self.focused_camera is None:
+            self.focused_camera = camera_id
+        else:
+            self.focused_camera = None
+        for widget in self.camera_widgets:
+            if widget is not None:
+                is_focused = widget.camera_id == self.focused_camera
+                widget.set_focused(is_focused)
+                widget.setVisible(self.focused_camera is None or is_focused)
+                self.select_tile_stream(widget, is_focused)
+        self.update_render_state()
+    
+    def select_tile_stream(self, widget, full_resolution):
+        # A focused (maximised) tile shows the main stream, grid tiles the sub stream
+        old_feed = self.service.live_feed(widget.camera_id, not full_resolution)
+        new_feed = self.service.live_feed(widget.camera_id, full_resolution)
+        if old_feed is None or old_feed is new_feed:
+            return
+        old_feed.unsubscribe(widget.prepare_frame)
+        new_feed.subscribe(widget.prepare_frame)
+    
+    def update_render_state(self):
+        # Capture and recording keep running; only tiles nobody can see stop rendering
+        if not hasattr(self, 'tab_widget'):
+            return
+        minimized = self.isMinimized()
+        current_tab = self.tab_widget.currentWidget()
+        live_visible = not minimized and current_tab is self.live_view_tab
+        for widget in self.camera_widgets:
+            if widget is not None:
+                widget.active = live_visible and (self.focused_camera is None or
+                                                  widget.camera_id == self.focused_camera)
+        if hasattr(self, 'mixed_live_widget'):
+            self.mixed_live_widget.active = not minimized and current_tab is self.mixed_mode_tab
+    
+    def changeEvent(self, event):
+        if event.type() == QEvent.WindowStateChange:
+            self.update_render_state()
+        super().changeEvent(event)
+    
+    def update_live(self):
+        # Scaling and recording happen on the capture threads; the GUI only presents
+        for widget in self.camera_widgets:
+            if widget is not None:
+                widget.render()
+        if hasattr(self, 'mixed_live_widget'):
+            self.mixed_live_widget.render()
+    
+    def show_capture_stats(self, stats):
+        if stats is None:
+            self.statusBar().showMessage("Recorder daemon unreachable")
+            return
+        self.last_stats = stats
+        parts = []
+        for camera_id, camera in enumerate(stats['cameras']):
+            if camera['state'] == 'live':
+                parts.append(f"Cam {camera_id + 1}: {camera['fps']:.1f} fps, {camera['read_failures']} read failures, "
+                             f"{camera['recorder_dropped']} not recorded")
+                status_text = None
+            elif camera['retry_in'] is not None:
+                status_text = f"Reconnecting in {max(1, round(camera['retry_in'])):d}s"
+                parts.append(f"Cam {camera_id + 1}: {status_text.lower()}")
+            else:
+                status_text = "Connecting..."
+                parts.append(f"Cam {camera_id + 1}: connecting")
+            if camera_id < len(self.camera_widgets) and self.camera_widgets[camera_id] is not None:
+                widget = self.camera_widgets[camera_id]
+                widget.set_status_text(status_text)
+                widget.set_overlay_text(self.overlay_text(camera_id, camera) if self.show_overlay else None)
+        if stats['storage'] is not None:
+            parts.append(format_storage_status(stats['storage']))
+        self.statusBar().showMessage(" | ".join(parts))
+    
+    def overlay_text(self, camera_id, camera):
+        text = f"{camera['fps']:.1f} fps"
+        latency = telemetry.percentiles(camera_id, 'display_latency')
+        if latency is not None:
+            text += f"  latency p50 {latency['p50'] * 1000:.0f} / p95 {latency['p95'] * 1000:.0f} ms"
+        return text
+    
+    def set_overlay_visible(self, visible):
+        self.show_overlay = visible
+        if not visible:
+            for widget in self.camera_widgets:
+                if widget is not None:
+                    widget.set_overlay_text(None)
+        if self.last_stats is not None:
+            self.show_capture_stats(self.last_stats)
+    
+    def filter_recordings(self):
+        camera_id = self.camera_filter_combo.currentData()
+        day_start = datetime.combine(self.date_filter.date().toPyDate(), datetime.min.time())
+        start_ts = int(day_start.timestamp())
+        end_ts = int((day_start + timedelta(days=1)).timestamp())
+        self.recordings_model.set_filter(camera_id, start_ts, end_ts)
+        self.update_digests(camera_id, start_ts, end_ts)
+    
+    def update_digests(self, camera_id, start_ts, end_ts):
+        camera_clause = "" if camera_id == -1 else "AND camera_id=? "
+        params = (end_ts, start_ts) + (() if camera_id == -1 else (camera_id,))
+        rows = recordings_db.query(
+            "SELECT camera_id, period_start_ts, period_end_ts, file_path, frame_count, complete FROM digests "
+            f"WHERE period_start_ts < ? AND period_end_ts > ? AND frame_count > 0 {camera_clause}"
+            "ORDER BY period_start_ts, camera_id", params)
+        self.digests_list.clear()
+        for digest_camera, period_start, period_end, file_path, frame_count, complete in rows:
+            start, end = datetime.fromtimestamp(period_start), datetime.fromtimestamp(period_end)
+            status = "" if complete else ", in progress"
+            self.digests_list.addItem(f"Camera {digest_camera + 1}  {start:%Y-%m-%d %H:%M} - {end:%H:%M}  "
+                                      f"({frame_count} frames{status})")
+            self.digests_list.item(self.digests_list.count() - 1).setData(Qt.UserRole, file_path)
+    
+    def play_digest(self, item):
+        self.play_video(item.data(Qt.UserRole), self.recording_player)
+    
+    def play_recording(self, index):
+        file_path = index.data(Qt.UserRole)
+        self.play_video(file_path, self.recording_player)
+    
+    def show_filmstrip(self, index):
+        strip = thumbnail_store.filmstrip(index.data(Qt.UserRole + 1)) if index.isValid() else None
+        if strip is None:
+            self.filmstrip.clear()
+            return
+        self.filmstrip.setPixmap(numpy_to_pixmap(strip).scaledToHeight(self.filmstrip.height(),
+                                                                        Qt.SmoothTransformation))
+    
+    def play_mixed_recording(self, index):
+        file_path = index.data(Qt.UserRole)
+        self.play_video(file_path, self.mixed_player)
+    
+    def selected_range(self):
+        day = self.date_filter.date().toPyDate()
+        start = datetime.combine(day, self.time_filter.time().toPyTime())
+        end = datetime.combine(day, self.end_time_filter.time().toPyTime())
+        if end <= start:
+            end = datetime.combine(day, datetime.max.time())
+        return start, end
+    
+    def go_to_time(self):
+        camera_id = self.camera_filter_combo.currentData()
+        if camera_id == -1:
+            QMessageBox.warning(self, "Error", "Please select a camera!")
+            return
+        
+        moment, _ = self.selected_range()
+        if find_segment(camera_id, moment.timestamp()) is None:
+            QMessageBox.information(self, "No Recording",
+                                    f"No recording of Camera {camera_id + 1} covers {moment:%Y-%m-%d %H:%M:%S}.")
+            return
+        
+        # Open the rest of the day as a timeline, positioned at the requested moment
+        day_end = datetime.combine(moment.date(), datetime.max.time())
+        self.recording_player.open_timeline(camera_id, moment.timestamp(), day_end.timestamp())
+    
+    def play_range(self):
+        camera_id = self.camera_filter_combo.currentData()
+        if camera_id == -1:
+            QMessageBox.warning(self, "Error", "Please select a camera!")
+            return
+        
+        start, end = self.selected_range()
+        if not self.recording_player.open_timeline(camera_id, start.timestamp(), end.timestamp()):
+            QMessageBox.information(self, "No Recording",
+                                    f"No recordings of Camera {camera_id + 1} between "
+                                    f"{start:%H:%M:%S} and {end:%H:%M:%S}.")
+    
+    def export_range(self):
+        camera_id = self.camera_filter_combo.currentData()
+        if camera_id == -1:
+            QMessageBox.warning(self, "Error", "Please select a camera!")
+            return
+        
+        start, end = self.selected_range()
+        segments, _ = load_timeline(camera_id, start.timestamp(), end.timestamp())
+        if not segments:
+            QMessageBox.information(self, "No Recording",
+                                    f"No recordings of Camera {camera_id + 1} between "
+                                    f"{start:%H:%M:%S} and {end:%H:%M:%S}.")
+            return
+        default_name = f"camera_{camera_id}_{start:%Y%m%d_%H%M%S}-{end:%H%M%S}.avi"
+        output_path, _ = QFileDialog.getSaveFileName(self, "Export Clip", default_name, "AVI files (*.avi)")
+        if not output_path:
+            return
+        self.export_queue.submit(ExportJob(camera_id, start.timestamp(), end.timestamp(), output_path))
+        self.update_exports()
+    
+    def update_exports(self):
+        jobs = self.export_queue.jobs
+        while self.exports_list.count() < len(jobs):
+            self.exports_list.addItem("")
+        for row, job in enumerate(jobs):
+            item = self.exports_list.item(row)
+            text = job.describe()
+            if item.text() != text:
+                item.setText(text)
+    
+    def cancel_export(self):
+        row = self.exports_list.currentRow()
+        if 0 <= row < len(self.export_queue.jobs):
+            self.export_queue.jobs[row].cancelled.set()
+    
+    def play_synchronised(self):
+        camera_ids = [self.sync_camera_list.item(i).data(Qt.UserRole)
+                      for i in range(self.sync_camera_list.count())
+                      if self.sync_camera_list.item(i).checkState() == Qt.Checked]
+        if not camera_ids:
+            QMessageBox.warning(self, "Error", "Please select at least one camera!")
+            return
+        
+        day = self.sync_date.date().toPyDate()
+        start = datetime.combine(day, self.sync_start_time.time().toPyTime())
+        end = datetime.combine(day, self.sync_end_time.time().toPyTime())
+        if end <= start:
+            QMessageBox.warning(self, "Error", "End time must be after start time!")
+            return
+        if not self.sync_player.open(camera_ids, start.timestamp(), end.timestamp()):
+            QMessageBox.information(self, "No Recording", "No recordings found in that time window.")
+    
+    def search_range(self):
+        day = self.search_date.date().toPyDate()
+        start = datetime.combine(day, self.search_start_time.time().toPyTime())
+        end = datetime.combine(day, self.search_end_time.time().toPyTime())
+        return start, end
+    
+    def load_search_frame(self):
+        start, end = self.search_range()
+        frame = reference_frame(self.search_camera_combo.currentData(), start.timestamp(), end.timestamp())
+        if frame is None:
+            QMessageBox.information(self, "No Recording", "No recorded frame found in that time window.")
+        self.roi_selector.set_frame(frame)
+    
+    def start_motion_search(self):
+        start, end = self.search_range()
+        if end <= start:
+            QMessageBox.warning(self, "Error", "End time must be after start time!")
+            return
+        self.cancel_motion_search()
+        if self.roi_selector.frame is None:
+            self.load_search_frame()
+        self.search_hits = []
+        self.search_results_list.clear()
+        self.motion_search = MotionSearch(self.search_camera_combo.currentData(), start.timestamp(), end.timestamp(),
+                                          self.roi_selector.roi, self.search_sensitivity_combo.currentData())
+        self.motion_search.start()
+        self.search_timer.start(200)
+    
+    def cancel_motion_search(self):
+        if self.motion_search is not None:
+            self.motion_search.cancel()
+            self.motion_search = None
+        self.search_timer.stop()
+    
+    def poll_motion_search(self):
+        # Hits arrive a segment at a time; the list is re-ranked whenever new ones come in
+        search = self.motion_search
+        if search is None:
+            return
+        finished = False
+        changed = False
+        while True:
+            try:
+                hits = search.results.get_nowait()
+            except queue.Empty:
+                break
+            if hits is None:
+                finished = True
+                break
+            self.search_hits.extend(hits)
+            changed = changed or bool(hits)
+        if changed:
+            self.search_hits.sort(reverse=True)
+            self.search_results_list.clear()
+            for score, timestamp in self.search_hits[:self.SEARCH_MAX_RESULTS]:
+                self.search_results_list.addItem(f"{datetime.fromtimestamp(timestamp):%H:%M:%S}  "
+                                                 f"change {score:.1%}")
+                self.search_results_list.item(self.search_results_list.count() - 1).setData(Qt.UserRole, timestamp)
+        state = "done" if finished else "searching"
+        self.search_status.setText(f"{len(self.search_hits)} hits, {search.segments_done}/{search.segments_total} "
+                                   f"segments ({search.cache_hits} cached), {state}")
+        if finished:
+            self.search_timer.stop()
+            self.motion_search = None
+    
+    def play_search_hit(self, item):
+        timestamp = item.data(Qt.UserRole)
+        start, end = self.search_range()
+        self.search_player.open_timeline(self.search_camera_combo.currentData(), start.timestamp(), end.timestamp(),
+                                         max(start.timestamp(), timestamp - 2))
+    
+    def play_video(self, file_path, player):
+        player.open(file_path)
+    
+    def open_admin_panel(self):
+        self.admin_panel = AdminPanel(self)
+        self.admin_panel.show()
+    
+    def logout(self):
+        # Release resources; recording keeps running in the service, the window is kept for the next login
+        self.release_camera_widgets()
+        self.live_update_timer.stop()
+        self.stats_poller.stop()
+        
+        for name in ('recording_player', 'sync_player', 'search_player', 'mixed_player'):
+            if hasattr(self, name):
+                getattr(self, name).stop()
+        if hasattr(self, 'search_timer'):
+            self.cancel_motion_search()
+        
+        self.login_window.show()
+        self.close()
+
+# Motion Detector Class (downscaled grayscale differencing against a running average)
+class MotionDetector:
+    def __init__(self, width=160, every_n=3, pixel_threshold=25, learning_rate=0.05):
+        self.width = width
+        self.every_n = every_n
+        self.pixel_threshold = pixel_threshold
+        self.learning_rate = learning_rate
+        self.frame_index = 0
+        self.score = 0.0
+        self.background = None
+        self.small = None
+        self.gray = None
+        self.diff = None
+    
+    def update(self, frame):
+        # Returns the fraction of changed pixels; only every Nth frame is analysed
+        self.frame_index += 1
+        if self.frame_index % self.every_n:
+            return self.score
+        
+        h, w = frame.shape[:2]
+        size = (self.width, max(1, h * self.width // w))
+        if self.small is None or self.small.shape[:2] != (size[1], size[0]):
+            self.small = np.empty((size[1], size[0], 3), dtype=np.uint8)
+            self.gray = np.empty((size[1], size[0]), dtype=np.uint8)
+            self.diff = np.empty((size[1], size[0]), dtype=np.uint8)
+            self.background = None
+        
+        cv2.resize(frame, size, dst=self.small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self.small, cv2.COLOR_BGR2GRAY, dst=self.gray)
+        cv2.GaussianBlur(self.gray, (5, 5), 0, dst=self.gray)
+        
+        if self.background is None:
+            self.background = self.gray.astype(np.float32)
+            return self.score
+        
+        cv2.absdiff(self.gray, cv2.convertScaleAbs(self.background), dst=self.diff)
+        cv2.accumulateWeighted(self.gray, self.background, self.learning_rate)
+        cv2.threshold(self.diff, self.pixel_threshold, 255, cv2.THRESH_BINARY, dst=self.diff)
+        self.score = cv2.countNonZero(self.diff) / self.diff.size
+        return self.score
+
+# Forensic motion search: archived segments are scanned in worker processes for change
+# inside a region of interest; the raw scores are cached so only thresholds change on a re-run
+SEARCH_WIDTH = 160  # frames are scored at this width, like the live motion detector
+SEARCH_PIXEL_THRESHOLD = 25
+search_executor = None
+
+def search_pool():
+    # Spawned workers: forking a process that runs Qt and capture threads is not safe
+    global search_executor
+    if search_executor is None:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor  # only needed once someone searches
+        search_executor = ProcessPoolExecutor(max_workers=max(1, (os.cpu_count() or 2) - 1),
+                                              mp_context=multiprocessing.get_context('spawn'))
+    return search_executor
+
+def close_search_pool():
+    global search_executor
+    if search_executor is not None:
+        search_executor.shutdown(wait=False, cancel_futures=True)
+        search_executor = None
+
+def scan_segment(file_path, roi, sample_fps):
+    # Worker process: (offsets in seconds, fraction of changed ROI pixels) per sampled frame
+    capture = cv2.VideoCapture(file_path)
+    if not capture.isOpened():
+        return None
+    fps = capture.get(cv2.CAP_PROP_FPS) or RecordingManager.WRITER_FPS
+    stride = max(1, round(fps / sample_fps))  # skipped frames are grabbed, never converted
+    offsets = []
+    frames = []
+    index = 0
+    while True:
+        if index % stride:
+            if not capture.grab():
+                break
+        else:
+            ret, frame = capture.read()
+            if not ret:
+                break
+            # Crop first, then shrink only the ROI
+            h, w = frame.shape[:2]
+            x0, y0, x1, y1 = roi
+            top, left = int(y0 * h), int(x0 * w)
+            crop = frame[top:max(int(y1 * h), top + 1), left:max(int(x1 * w), left + 1)]
+            scale = SEARCH_WIDTH / w
+            size = (max(1, round(crop.shape[1] * scale)), max(1, round(crop.shape[0] * scale)))
+            gray = cv2.cvtColor(cv2.resize(crop, size, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+            frames.append(cv2.GaussianBlur(gray, (5, 5), 0))
+            offsets.append(index / fps)
+        index += 1
+    capture.release()
+    if len(frames) < 2:
+        return np.zeros(0, np.float32), np.zeros(0, np.float32)
+    # Every sampled frame against the previous one in one pass
+    stack = np.stack(frames).astype(np.int16)
+    changed = np.abs(np.diff(stack, axis=0)) > SEARCH_PIXEL_THRESHOLD
+    return np.asarray(offsets[1:], np.float32), changed.mean(axis=(1, 2)).astype(np.float32)
+
+def find_hits(timestamps, scores, threshold, gap):
+    # Runs of samples at or above threshold (split by gaps longer than gap seconds) -> (peak score, peak ts)
+    above = np.flatnonzero(scores >= threshold)
+    if len(above) == 0:
+        return []
+    runs = np.split(above, np.flatnonzero(np.diff(timestamps[above]) > gap) + 1)
+    hits = []
+    for run in runs:
+        peak = run[np.argmax(scores[run])]
+        hits.append((float(scores[peak]), float(timestamps[peak])))
+    return hits
+
+class MotionSearch(threading.Thread):
+    SAMPLE_FPS = 2.0
+    HIT_GAP = 5.0  # seconds; changes closer together than this are one hit
+    
+    def __init__(self, camera_id, start_ts, end_ts, roi, threshold, sample_fps=SAMPLE_FPS):
+        super().__init__(daemon=True)
+        self.camera_id = camera_id
+        self.start_ts = start_ts
+        self.end_ts = end_ts
+        self.roi = tuple(round(v, 3) for v in roi)  # normalised (x0, y0, x1, y1)
+        self.roi_key = ",".join(f"{v:.3f}" for v in self.roi)
+        self.threshold = threshold
+        self.sample_fps = sample_fps
+        self.results = queue.Queue()  # lists of (score, ts) hits per segment, then None when finished
+        self.cancelled = threading.Event()
+        self.segments_total = 0
+        self.segments_done = 0
+        self.cache_hits = 0
+    
+    def run(self):
+        rows = recordings_db.query(
+            "SELECT r.id, r.file_path, r.start_ts, r.end_ts, c.times, c.scores FROM recordings r "
+            "LEFT JOIN motion_search_cache c ON c.recording_id = r.id AND c.roi = ? AND c.sample_fps = ? "
+            "WHERE r.camera_id = ? AND r.start_ts < ? AND (r.end_ts IS NULL OR r.end_ts > ?) ORDER BY r.start_ts",
+            (self.roi_key, self.sample_fps, self.camera_id, int(self.end_ts), int(self.start_ts)))
+        self.segments_total = len(rows)
+        pending = {}
+        for recording_id, file_path, start_ts, end_ts, times, scores in rows:
+            if times is not None:
+                self.cache_hits += 1
+                self.add_scores(start_ts, np.frombuffer(times, np.float32), np.frombuffer(scores, np.float32))
+                continue
+            future = search_pool().submit(scan_segment, file_path, self.roi, self.sample_fps)
+            pending[future] = (recording_id, start_ts, end_ts)
+        for future in as_completed(pending):
+            if self.cancelled.is_set():
+                for other in pending:
+                    other.cancel()
+                break
+            recording_id, start_ts, end_ts = pending[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"Motion search failed on recording {recording_id}: {e}")
+                result = None
+            if result is None:
+                self.segments_done += 1
+                continue
+            times, scores = result
+            if end_ts is not None:
+                # Only closed segments: the open one is still growing
+                recordings_db.submit("INSERT OR REPLACE INTO motion_search_cache "
+                                     "(recording_id, roi, sample_fps, times, scores) VALUES (?, ?, ?, ?, ?)",
+                                     (recording_id, self.roi_key, self.sample_fps, times.tobytes(), scores.tobytes()))
+            self.add_scores(start_ts, times, scores)
+        self.results.put(None)
+    
+    def add_scores(self, start_ts, times, scores):
+        timestamps = start_ts + times.astype(np.float64)
+        in_range = (timestamps >= self.start_ts) & (timestamps < self.end_ts)
+        self.results.put(find_hits(timestamps[in_range], scores[in_range], self.threshold, self.HIT_GAP))
+        self.segments_done += 1
+    
+    def cancel(self):
+        self.cancelled.set()
+
+# Recording Manager Class
+class RecordingManager:
+    OVERFLOW_POLICIES = ('block', 'drop_oldest', 'drop_newest')
+    RECORDING_MODES = ('continuous', 'motion')
+    PREOPEN_SECONDS = 5  # open the next segment's writer this long before rollover
+    WRITER_FPS = 20.0  # fallback when the camera does not report its frame rate
+    PREROLL_JPEG_QUALITY = 80
+    MAX_GAP_SECONDS = 2  # longer capture stalls start a new segment instead of repeating frames
+    THUMBNAIL_INTERVAL = 5  # seconds
+    THUMBNAIL_WIDTH = 160
+    THUMBNAIL_QUALITY = 80  # JPEG quality; about 3 KB per thumbnail
+    
+    def __init__(self, camera_id, recording_folder, recording_duration_min,
+                 queue_size=60, overflow_policy='drop_oldest', recording_mode='continuous',
+                 motion_threshold=0.01, preroll_seconds=5, postroll_seconds=10, fps=None):
+        self.camera_id = camera_id
+        self.recording_folder = recording_folder
+        self.fps = fps or self.WRITER_FPS  # segments are written at this constant rate
+        self.frame_size = None
+        self.recording_duration = recording_duration_min * 60  # convert to seconds
+        self.recording_start = None
+        self.video_writer = None
+        self.file_path = None
+        
+        # Metadata of the open segment, written back when it closes
+        self.segment_frames = 0
+        self.segment_first_ts = None
+        self.segment_last_ts = None
+        self.segment_motion = False
+        self.segment_fps = None
+        self.on_segment_closed = None  # callable(camera_id, size_bytes, end_ts)
+        
+        # Thumbnails every THUMBNAIL_INTERVAL seconds into the segment's sprite file
+        self.thumb_file = None
+        self.thumb_size = None
+        self.thumb_slot = 0
+        self.last_thumb_ts = None
+        
+        # Pre-opened writer for the following segment
+        self.next_start = None
+        self.next_writer = None
+        self.next_file_path = None
+        
+        # Frames are copied into pooled buffers and encoded on a worker thread
+        self.overflow_policy = overflow_policy
+        self.frame_queue = queue.Queue(maxsize=queue_size)
+        self.buffer_pool = []
+        self.pool_lock = threading.Lock()
+        self.frames_dropped = 0
+        self.worker = None
+        self.worker_lock = threading.Lock()
+        self.stopping = False  # set once by stop_recording; late frames are then dropped
+        
+        # Encoder telemetry: time spent in the writer, capture-to-encode delay and backlog
+        self.encode_histogram = telemetry.histogram(camera_id, 'encode')
+        self.encode_latency_histogram = telemetry.histogram(camera_id, 'encode_latency')
+        self.queue_histogram = telemetry.histogram(camera_id, 'queue_depth')
+        
+        # Motion detection runs in every mode; in motion mode it also gates the writer
+        self.recording_mode = recording_mode
+        self.motion_detector = MotionDetector()
+        self.motion_threshold = motion_threshold
+        self.postroll_seconds = postroll_seconds
+        self.preroll_seconds = preroll_seconds
+        self.preroll = deque(maxlen=max(1, int(preroll_seconds * self.fps)))
+        self.event_start = None
+        self.event_end = None
+        self.event_peak = 0.0
+        self.event_file_path = None
+    
+    def record_frame(self, frame, timestamp=None):
+        if self.stopping:
+            return
+        if self.worker is None:
+            with self.worker_lock:
+                if self.stopping:
+                    return
+                if self.worker is None:
+                    self.worker = threading.Thread(target=self.encode_loop, daemon=True)
+                    self.worker.start()
+        
+        if timestamp is None:
+            timestamp = time.time()
+        buffer = self.acquire_buffer(frame)
+        item = (timestamp, buffer)
+        
+        if self.overflow_policy == 'block':
+            # Bounded waits, so a frame arriving during shutdown cannot block forever
+            while True:
+                try:
+                    self.frame_queue.put(item, timeout=0.5)
+                    return
+                except queue.Full:
+                    if self.stopping:
+                        self.release_buffer(buffer)
+                        return
+        try:
+            self.frame_queue.put_nowait(item)
+        except queue.Full:
+            self.frames_dropped += 1
+            if self.overflow_policy == 'drop_newest':
+                self.release_buffer(buffer)
+                return
+            # drop_oldest: make room by discarding the frame at the head of the queue
+            try:
+                oldest = self.frame_queue.get_nowait()
+            except queue.Empty:
+                oldest = ()
+            if oldest is None:
+                # The stop sentinel: put it back and drop this frame instead
+                self.frame_queue.put_nowait(None)
+                self.release_buffer(buffer)
+                return
+            if oldest:
+                self.release_buffer(oldest[1])
+            try:
+                self.frame_queue.put_nowait(item)
+            except queue.Full:
+                self.release_buffer(buffer)
+    
+    def acquire_buffer(self, frame):
+        with self.pool_lock:
+            while self.buffer_pool:
+                buffer = self.buffer_pool.pop()
+                if buffer.shape == frame.shape and buffer.dtype == frame.dtype:
+                    np.copyto(buffer, frame)
+                    return buffer
+        return frame.copy()
+    
+    def release_buffer(self, buffer):
+        with self.pool_lock:
+            self.buffer_pool.append(buffer)
+    
+    def encode_loop(self):
+        while True:
+            item = self.frame_queue.get()
+            if item is None:
+                break
+            timestamp, frame = item
+            self.encode_latency_histogram.add(time.time() - timestamp)
+            self.queue_histogram.add(self.frame_queue.qsize())
+            frame_time = datetime.fromtimestamp(timestamp)
+            in_event = self.detect_motion(frame, frame_time)
+            
+            # A resolution change or capture stall ends the segment
+            frame_size = frame.shape[1::-1]
+            if self.video_writer is not None and (frame_size != self.frame_size or self.fps != self.segment_fps or (
+                    self.segment_last_ts is not None and timestamp - self.segment_last_ts > self.MAX_GAP_SECONDS)):
+                self.close_writers()
+            self.frame_size = frame_size
+            
+            if self.recording_mode == 'motion':
+                if not in_event:
+                    # Idle: close a finished clip and keep a compressed pre-roll
+                    if self.video_writer is not None:
+                        self.close_writers()
+                    self.buffer_preroll(timestamp, frame)
+                    self.release_buffer(frame)
+                    continue
+                if self.video_writer is None:
+                    clip_start = datetime.fromtimestamp(self.preroll[0][0]) if self.preroll else frame_time
+                    self.start_recording(clip_start)
+                    self.flush_preroll()
+            if in_event and self.event_file_path is None:
+                self.event_file_path = self.file_path
+            if in_event:
+                self.segment_motion = True
+            
+            # Check if new recording should be started
+            if self.recording_start is None:
+                self.start_recording(frame_time)
+            else:
+                elapsed = (frame_time - self.recording_start).total_seconds()
+                if self.next_writer is None and elapsed > self.recording_duration - self.PREOPEN_SECONDS:
+                    self.preopen_next_segment()
+                if elapsed > self.recording_duration:
+                    self.rollover(frame_time)
+            
+            # Write frame
+            if self.video_writer is not None:
+                self.write_frame(frame, timestamp)
+            self.release_buffer(frame)
+        
+        if self.event_start is not None:
+            self.finish_motion_event()
+        self.close_writers()
+        self.preroll.clear()
+    
+    def detect_motion(self, frame, frame_time):
+        # Tracks the current motion event; True from first motion until post-roll ends
+        score = self.motion_detector.update(frame)
+        if score >= self.motion_threshold:
+            if self.event_start is None:
+                self.event_start = frame_time
+                self.event_peak = 0.0
+                self.event_file_path = None
+            self.event_end = frame_time
+            self.event_peak = max(self.event_peak, score)
+        elif self.event_start is not None and \
+                (frame_time - self.event_end).total_seconds() > self.postroll_seconds:
+            self.finish_motion_event()
+        return self.event_start is not None
+    
+    def finish_motion_event(self):
+        self.save_motion_event(self.event_start, self.event_end, self.event_peak, self.event_file_path)
+        self.event_start = None
+        self.event_file_path = None
+    
+    def set_fps(self, fps):
+        # Takes effect at the next frame, which also starts a new segment at the new rate
+        self.fps = fps or self.WRITER_FPS
+        self.set_preroll_seconds(self.preroll_seconds)
+    
+    def set_preroll_seconds(self, seconds):
+        self.preroll_seconds = seconds
+        maxlen = max(1, int(seconds * self.fps))
+        if maxlen != self.preroll.maxlen:
+            self.preroll = deque(self.preroll, maxlen=maxlen)
+    
+    def buffer_preroll(self, timestamp, frame):
+        ok, encoded = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.PREROLL_JPEG_QUALITY])
+        if ok:
+            self.preroll.append((timestamp, encoded))
+    
+    def flush_preroll(self):
+        while self.preroll:
+            timestamp, encoded = self.preroll.popleft()
+            self.write_frame(cv2.imdecode(encoded, cv2.IMREAD_COLOR), timestamp)
+    
+    def write_frame(self, frame, timestamp):
+        # Constant frame rate: frame n of the file shows first_ts + n / fps, so capture
+        # jitter is absorbed by repeating or skipping frames
+        if self.segment_first_ts is None:
+            self.segment_first_ts = timestamp
+        due = round((timestamp - self.segment_first_ts) * self.fps) + 1 - self.segment_frames
+        if due <= 0:
+            return
+        encode_start = time.perf_counter()
+        for _ in range(due):
+            self.video_writer.write(frame)
+        self.encode_histogram.add(time.perf_counter() - encode_start)
+        self.segment_frames += due
+        self.segment_last_ts = timestamp
+        if self.last_thumb_ts is None or timestamp - self.last_thumb_ts >= self.THUMBNAIL_INTERVAL:
+            self.write_thumbnail(frame, timestamp)
+    
+    def write_thumbnail(self, frame, timestamp):
+        self.last_thumb_ts = timestamp
+        # Rows are resolved by the DB writer: the segment's INSERT is queued before any of these
+        if self.thumb_file is None:
+            height, width = frame.shape[:2]
+            self.thumb_size = (self.THUMBNAIL_WIDTH, max(2, round(self.THUMBNAIL_WIDTH * height / width / 2) * 2))
+            self.thumb_file = open(thumbnail_path(self.file_path), 'wb')
+            recordings_db.submit("UPDATE recordings SET thumb_width=?, thumb_height=? "
+                                 "WHERE id=(SELECT MAX(id) FROM recordings WHERE file_path=?)",
+                                 (self.thumb_size[0], self.thumb_size[1], self.file_path))
+        thumbnail = cv2.resize(frame, self.thumb_size, interpolation=cv2.INTER_AREA)
+        ok, encoded = cv2.imencode('.jpg', thumbnail, (cv2.IMWRITE_JPEG_QUALITY, self.THUMBNAIL_QUALITY))
+        if not ok:
+            return
+        byte_offset = self.thumb_file.tell()
+        self.thumb_file.write(encoded.tobytes())
+        self.thumb_file.flush()  # readable by hover previews while the segment is still open
+        recordings_db.submit("INSERT INTO thumbnails (recording_id, camera_id, ts, slot, byte_offset, byte_length) "
+                             "SELECT MAX(id), ?, ?, ?, ?, ? FROM recordings WHERE file_path=?",
+                             (self.camera_id, int(timestamp), self.thumb_slot, byte_offset, len(encoded),
+                              self.file_path))
+        self.thumb_slot += 1
+    
+    def open_writer(self, start_time):
+        file_name = f"camera_{self.camera_id}_{start_time.strftime('%Y%m%d_%H%M%S')}.avi"
+        file_path = os.path.join(self.recording_folder, file_name)
+        
+        fourcc = cv2.VideoWriter_fourcc(*'XVID')
+        return file_path, cv2.VideoWriter(file_path, fourcc, self.fps, self.frame_size)
+    
+    def save_recording(self, start_time, file_path):
+        # Save to database (batched by the writer thread, never waited on here)
+        return recordings_db.submit("INSERT INTO recordings (camera_id, start_time, start_ts, file_path) VALUES (?, ?, ?, ?)",
+                             (self.camera_id, start_time.strftime("%Y-%m-%d %H:%M:%S"),
+                              int(start_time.timestamp()), file_path))
+    
+    def save_motion_event(self, start_time, end_time, peak_score, file_path):
+        recordings_db.submit("INSERT INTO motion_events (camera_id, start_time, end_time, start_ts, end_ts, "
+                             "peak_score, file_path) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                             (self.camera_id, start_time.strftime("%Y-%m-%d %H:%M:%S"),
+                              end_time.strftime("%Y-%m-%d %H:%M:%S"), int(start_time.timestamp()),
+                              int(end_time.timestamp()), peak_score, file_path))
+    
+    def save_segment_metadata(self, start_time, frames, first_ts, file_path, motion):
+        fps = self.segment_fps
+        end_ts = first_ts + frames / fps
+        end_time = datetime.fromtimestamp(end_ts)
+        # The sprite file counts toward the segment, and so toward retention quotas
+        size_bytes = sum(os.path.getsize(path) for path in (file_path, thumbnail_path(file_path))
+                         if os.path.exists(path))
+        recordings_db.submit("UPDATE recordings SET end_time=?, end_ts=?, duration=?, size_bytes=?, "
+                             "frame_count=?, fps=?, motion=? "
+                             "WHERE id=(SELECT MAX(id) FROM recordings WHERE file_path=?)",
+                             (end_time.strftime("%Y-%m-%d %H:%M:%S"), math.ceil(end_ts),
+                              end_ts - start_time.timestamp(), size_bytes, frames, fps, int(motion),
+                              file_path))
+        if self.on_segment_closed is not None:
+            self.on_segment_closed(self.camera_id, size_bytes, end_ts)
+    
+    def begin_segment(self, start_time, file_path, writer):
+        self.recording_start = start_time
+        self.file_path, self.video_writer = file_path, writer
+        self.save_recording(start_time, file_path)
+        self.segment_frames = 0
+        self.segment_first_ts = None
+        self.segment_last_ts = None
+        self.segment_motion = self.event_start is not None
+        self.segment_fps = self.fps
+        self.thumb_slot = 0
+        self.last_thumb_ts = None
+    
+    def finish_segment(self):
+        if self.video_writer is None:
+            return
+        self.video_writer.release()
+        self.video_writer = None
+        if self.thumb_file is not None:
+            self.thumb_file.close()
+            self.thumb_file = None
+        if self.segment_frames:
+            self.save_segment_metadata(self.recording_start, self.segment_frames,
+                                       self.segment_first_ts, self.file_path, self.segment_motion)
+    
+    def start_recording(self, start_time):
+        file_path, writer = self.open_writer(start_time)
+        self.begin_segment(start_time, file_path, writer)
+    
+    def preopen_next_segment(self):
+        self.next_start = self.recording_start + timedelta(seconds=self.recording_duration)
+        self.next_file_path, self.next_writer = self.open_writer(self.next_start)
+    
+    def rollover(self, frame_time):
+        self.finish_segment()
+        
+        if self.next_writer is not None and (frame_time - self.next_start).total_seconds() < self.recording_duration:
+            # Swap in the pre-opened writer so the new segment starts on this frame; the row
+            # gets this frame's time, the nominal start is only in the file name
+            self.begin_segment(frame_time, self.next_file_path, self.next_writer)
+            self.next_writer = None
+        else:
+            # No usable pre-opened writer (e.g. after a capture gap): open one now
+            self.discard_next_segment()
+            self.start_recording(frame_time)
+    
+    def discard_next_segment(self):
+        if self.next_writer is not None:
+            self.next_writer.release()
+            self.next_writer = None
+            if os.path.exists(self.next_file_path):
+                os.remove(self.next_file_path)
+    
+    def close_writers(self):
+        self.finish_segment()
+        self.discard_next_segment()
+        self.recording_start = None
+    
+    def stop_recording(self):
+        # Final: record_frame never starts another worker on this queue afterwards
+        with self.worker_lock:
+            self.stopping = True
+            worker = self.worker
+        if worker is not None:
+            # Drain queued frames, then close the current segment
+            self.frame_queue.put(None)
+            worker.join()
+
+# Retention Manager Class (disk quotas by bytes and age, oldest first)
+class RetentionManager(threading.Thread):
+    GB = 1024 ** 3
+    
+    def __init__(self, recording_folder, max_bytes=None, max_age_days=None, camera_max_bytes=None,
+                 camera_max_age_days=None, motion_keep_factor=2.0, min_free_bytes=GB,
+                 check_interval=60, batch_size=100):
+        super().__init__(daemon=True)
+        self.recording_folder = recording_folder
+        
+        # Global and per-camera quotas; None means unlimited. Per-camera values may be
+        # a single number for every camera or a {camera_id: value} dict.
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self.camera_max_bytes = camera_max_bytes
+        self.camera_max_age_days = camera_max_age_days
+        
+        # Motion segments count as this many times younger when ageing out or evicting
+        self.motion_keep_factor = motion_keep_factor
+        self.min_free_bytes = min_free_bytes
+        self.check_interval = check_interval
+        self.batch_size = batch_size
+        
+        # Usage is loaded once and then tracked from segment-closed notifications
+        self.lock = threading.Lock()
+        self.camera_bytes = {}
+        self.digest_bytes = {}  # digests and their pending parts
+        self.recent_writes = deque()  # (time, bytes) over the last hour, for the write rate
+        self.bytes_evicted = 0
+        self.wake = threading.Event()
+        self.running = True
+    
+    def load_usage(self):
+        rows = recordings_db.query("SELECT camera_id, COALESCE(SUM(size_bytes), 0) FROM recordings GROUP BY camera_id")
+        digest_rows = recordings_db.query(
+            "SELECT camera_id, SUM(size) FROM "
+            "(SELECT camera_id, COALESCE(size_bytes, 0) AS size FROM digests UNION ALL "
+            "SELECT d.camera_id, COALESCE(p.size_bytes, 0) FROM digest_parts p JOIN digests d ON d.id = p.digest_id "
+            "WHERE p.part_path IS NOT NULL) GROUP BY camera_id")
+        with self.lock:
+            self.camera_bytes = {camera_id: total for camera_id, total in rows}
+            self.digest_bytes = {camera_id: total for camera_id, total in digest_rows}
+    
+    def add_segment(self, camera_id, size_bytes, end_ts):
+        # Called by RecordingManager workers when a segment closes
+        with self.lock:
+            self.camera_bytes[camera_id] = self.camera_bytes.get(camera_id, 0) + size_bytes
+            self.recent_writes.append((time.time(), size_bytes))
+    
+    def add_digest_bytes(self, camera_id, delta_bytes):
+        # Called by the digest scheduler as parts are written, digests (re)assembled and parts removed
+        with self.lock:
+            self.digest_bytes[camera_id] = self.digest_bytes.get(camera_id, 0) + delta_bytes
+    
+    def camera_quota(self, quota, camera_id):
+        if isinstance(quota, dict):
+            return quota.get(camera_id)
+        return quota
+    
+    def run(self):
+        self.load_usage()
+        while self.running:
+            try:
+                self.enforce()
+            except Exception as e:
+                print(f"Retention error: {e}")
+            self.wake.wait(self.check_interval)
+            self.wake.clear()
+    
+    def stop(self):
+        self.running = False
+        self.wake.set()
+        if self.is_alive():
+            self.join(timeout=5)
+    
+    def enforce(self):
+        now = time.time()
+        
+        # Age limits (global, then per camera)
+        if self.max_age_days is not None:
+            self.evict_older_than(now - self.max_age_days * 86400)
+            self.evict_digests_older_than(now - self.max_age_days * 86400)
+        with self.lock:
+            camera_ids = list(set(self.camera_bytes).union(self.digest_bytes))
+        for camera_id in camera_ids:
+            max_age_days = self.camera_quota(self.camera_max_age_days, camera_id)
+            if max_age_days is not None:
+                self.evict_older_than(now - max_age_days * 86400, camera_id)
+        
+        # Byte quotas and free-space floor
+        for camera_id in camera_ids:
+            max_bytes = self.camera_quota(self.camera_max_bytes, camera_id)
+            while max_bytes is not None and self.camera_used_bytes(camera_id) > max_bytes:
+                if not self.evict_oldest(camera_id):
+                    break
+        while self.over_global_quota():
+            if not self.evict_oldest():
+                break
+    
+    def over_global_quota(self):
+        if self.max_bytes is not None and self.used_bytes() > self.max_bytes:
+            return True
+        return self.free_bytes() < self.min_free_bytes
+    
+    def motion_bonus(self, max_age_days):
+        # Extra seconds of life for motion segments when ordering by age
+        if max_age_days is None:
+            max_age_days = self.max_age_days or 30
+        return max_age_days * 86400 * (self.motion_keep_factor - 1)
+    
+    def evict_older_than(self, cutoff_ts, camera_id=None):
+        camera_clause = "" if camera_id is None else "AND camera_id=? "
+        params = () if camera_id is None else (camera_id,)
+        motion_cutoff = cutoff_ts - self.motion_bonus(None if camera_id is None else
+                                                      self.camera_quota(self.camera_max_age_days, camera_id))
+        while self.running:
+            rows = recordings_db.query(
+                "SELECT id, camera_id, file_path, size_bytes FROM recordings "
+                f"WHERE end_ts IS NOT NULL AND start_ts < ? {camera_clause}"
+                "AND (COALESCE(motion, 0) = 0 OR start_ts < ?) ORDER BY start_ts LIMIT ?",
+                (cutoff_ts,) + params + (motion_cutoff, self.batch_size))
+            if not rows:
+                return
+            self.delete_segments(rows)
+    
+    def evict_oldest(self, camera_id=None):
+        # Segments and complete digests compete by age; a digest counts as young as a
+        # motion segment from the end of its period, so it outlives the footage it covers
+        camera_clause = "" if camera_id is None else "AND camera_id=? "
+        params = () if camera_id is None else (camera_id,)
+        bonus = self.motion_bonus(None)
+        digest = recordings_db.query(
+            "SELECT id, camera_id, file_path, size_bytes, period_end_ts + ? FROM digests "
+            f"WHERE complete = 1 {camera_clause}ORDER BY period_end_ts LIMIT 1",
+            (bonus,) + params, one=True)
+        age_clause = "" if digest is None else "AND start_ts + COALESCE(motion, 0) * ? < ? "
+        age_params = () if digest is None else (bonus, digest[4])
+        rows = recordings_db.query(
+            "SELECT id, camera_id, file_path, size_bytes FROM recordings "
+            f"WHERE end_ts IS NOT NULL {camera_clause}{age_clause}"
+            "ORDER BY start_ts + COALESCE(motion, 0) * ? LIMIT ?",
+            params + age_params + (bonus, self.batch_size))
+        if rows:
+            self.delete_segments(rows)
+        elif digest is not None:
+            return self.delete_digests([digest[:4]]) > 0
+        else:
+            return False
+        return True
+    
+    def delete_segments(self, rows):
+        # Remove the files, then their rows in one transaction
+        for _, _, file_path, _ in rows:
+            for path in (file_path, thumbnail_path(file_path)):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    print(f"Could not delete {path}: {e}")
+        ids = [(recording_id,) for recording_id, _, _, _ in rows]
+        file_paths = [(file_path,) for _, _, file_path, _ in rows]
+        
+        def delete_rows(conn):
+            conn.executemany("DELETE FROM thumbnails WHERE recording_id=?", ids)
+            conn.executemany("DELETE FROM motion_search_cache WHERE recording_id=?", ids)
+            conn.executemany("DELETE FROM motion_events WHERE file_path=?", file_paths)
+            # Digest parts still waiting to be joined stay until their digest is complete
+            conn.executemany("DELETE FROM digest_parts WHERE recording_id=? AND part_path IS NULL", ids)
+            conn.executemany("DELETE FROM recordings WHERE id=?", ids)
+        
+        recordings_db.submit(delete_rows).result()  # one transaction: no dangling rows after a crash
+        with self.lock:
+            for _, camera_id, _, size_bytes in rows:
+                self.camera_bytes[camera_id] = self.camera_bytes.get(camera_id, 0) - (size_bytes or 0)
+                self.bytes_evicted += size_bytes or 0
+    
+    def evict_digests_older_than(self, cutoff_ts):
+        # Digests outlive their segments, but not the global age limit
+        rows = recordings_db.query("SELECT id, camera_id, file_path, size_bytes FROM digests "
+                                   "WHERE complete = 1 AND period_end_ts < ?", (cutoff_ts,))
+        if rows:
+            self.delete_digests(rows)
+    
+    def delete_digests(self, rows):
+        # A digest whose file could not be removed keeps its row and is retried on a later pass;
+        # returns how many were deleted
+        ids = []
+        for digest_id, camera_id, file_path, size_bytes in rows:
+            try:
+                os.remove(file_path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"Could not delete {file_path}: {e}")
+                continue
+            ids.append((digest_id,))
+            with self.lock:
+                self.digest_bytes[camera_id] = self.digest_bytes.get(camera_id, 0) - (size_bytes or 0)
+                self.bytes_evicted += size_bytes or 0
+        if not ids:
+            return 0
+        
+        def delete_rows(conn):
+            # Rows of segments that still exist (kept longer for motion) stay, so they are not digested again
+            conn.executemany("DELETE FROM digest_parts WHERE digest_id=? AND recording_id NOT IN "
+                             "(SELECT id FROM recordings)", ids)
+            conn.executemany("DELETE FROM digests WHERE id=?", ids)
+        
+        recordings_db.submit(delete_rows).result()
+        return len(ids)
+    
+    def camera_used_bytes(self, camera_id):
+        with self.lock:
+            return self.camera_bytes.get(camera_id, 0) + self.digest_bytes.get(camera_id, 0)
+    
+    def used_bytes(self):
+        with self.lock:
+            return sum(self.camera_bytes.values()) + sum(self.digest_bytes.values())
+    
+    def free_bytes(self):
+        try:
+            return shutil.disk_usage(self.recording_folder).free
+        except OSError:
+            return 0
+    
+    def write_rate(self):
+        # Bytes per second written over the last hour
+        with self.lock:
+            cutoff = time.time() - 3600
+            while self.recent_writes and self.recent_writes[0][0] < cutoff:
+                self.recent_writes.popleft()
+            if not self.recent_writes:
+                return 0.0
+            span = max(time.time() - self.recent_writes[0][0], 60)
+            return sum(size for _, size in self.recent_writes) / span
+    
+    def status(self):
+        used = self.used_bytes()
+        free = self.free_bytes()
+        rate = self.write_rate()
+        capacity = used + max(free - self.min_free_bytes, 0)
+        if self.max_bytes is not None:
+            capacity = min(capacity, self.max_bytes)
+        projected_days = capacity / rate / 86400 if rate > 0 else None
+        if self.max_age_days is not None and projected_days is not None:
+            projected_days = min(projected_days, self.max_age_days)
+        return {'used_bytes': used,
+                'free_bytes': free,
+                'write_rate': rate,
+                'projected_days': projected_days,
+                'evicted_bytes': self.bytes_evicted}
+
+def format_storage_status(status):
+    gb = RetentionManager.GB
+    days = status['projected_days']
+    projection = "n/a" if days is None else f"~{days:.1f} days"
+    return f"Disk: {status['free_bytes'] / gb:.1f} GB free, {status['used_bytes'] / gb:.1f} GB used, {projection}"
+
+# Shared-memory frame bus: one writer per camera stream, any number of local reader processes.
+# Layout: HEADER, slot_count SLOT_META records, then slot_count frame slots of slot_size bytes.
+# A slot's meta sequence is zeroed while it is rewritten, so readers can tell a torn frame.
+BUS_MAGIC = 0x47484246
+BUS_LIVE, BUS_CLOSED = 1, 0
+BUS_HEADER = struct.Struct('<IIIIQI')  # magic, state, slot_count, slot_size, latest seq, owner pid
+BUS_SEQ_OFFSET = 16
+BUS_HEADER_SIZE = 64
+BUS_SLOT_META = struct.Struct('<QdIII')  # seq, timestamp, height, width, channels
+BUS_SLOT_META_SIZE = 32
+
+# Time-lapse digests: closed segments are sampled into small part clips in low-priority worker
+# processes, then the parts of each camera's period are joined into one digest video
+DIGEST_ANCHOR_HOUR = 6  # periods are counted from 06:00 local, so a 12 h digest covers one night
+
+def lower_priority():
+    # Worker initializer: only CPU time that capture and recording leave idle
+    try:
+        os.nice(19)
+    except (AttributeError, OSError):
+        pass
+    try:
+        os.sched_setscheduler(0, os.SCHED_IDLE, os.sched_param(0))
+    except (AttributeError, OSError):
+        pass
+    cv2.setNumThreads(1)
+
+def digest_period(timestamp, period_hours):
+    # (start_ts, end_ts) of the digest period holding timestamp; period_hours divides 24
+    shifted = datetime.fromtimestamp(timestamp) - timedelta(hours=DIGEST_ANCHOR_HOUR)
+    start = shifted.replace(hour=shifted.hour - shifted.hour % period_hours, minute=0, second=0, microsecond=0)
+    start += timedelta(hours=DIGEST_ANCHOR_HOUR)
+    return int(start.timestamp()), int((start + timedelta(hours=period_hours)).timestamp())
+
+def digest_folder(recording_folder, camera_id):
+    # A camera's digests, with their parts in a 'parts' subfolder until they are complete
+    return os.path.join(recording_folder, 'digests', f"camera_{camera_id}")
+
+def digest_segment(file_path, part_path, stride, threshold, height, fps):
+    # Worker process: one frame every stride seconds, optionally only those that changed by
+    # threshold since the previous sample; returns the number of frames written to part_path
+    capture = cv2.VideoCapture(file_path)
+    if not capture.isOpened():
+        return None
+    step = max(1, round((capture.get(cv2.CAP_PROP_FPS) or RecordingManager.WRITER_FPS) * stride))
+    writer = None
+    previous = None
+    written = 0
+    index = 0
+    while True:
+        if index % step:
+            if not capture.grab():  # skipped frames are never converted
+                break
+            index += 1
+            continue
+        ret, frame = capture.read()
+        if not ret:
+            break
+        index += 1
+        h, w = frame.shape[:2]
+        if threshold is not None:
+            # Scored like the motion search: small blurred grey frames against the last sample
+            small = cv2.resize(frame, (SEARCH_WIDTH, max(1, h * SEARCH_WIDTH // w)), interpolation=cv2.INTER_AREA)
+            gray = cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+            score = 0.0 if previous is None else np.count_nonzero(cv2.absdiff(gray, previous) > SEARCH_PIXEL_THRESHOLD) / gray.size
+            previous = gray
+            if score < threshold:
+                continue
+        size = (w, h) if h <= height else (max(2, round(w * height / h / 2) * 2), height)
+        if writer is None:
+            writer = cv2.VideoWriter(part_path, cv2.VideoWriter_fourcc(*'XVID'), fps, size)
+        writer.write(frame if size == (w, h) else cv2.resize(frame, size, interpolation=cv2.INTER_AREA))
+        written += 1
+    capture.release()
+    if writer is not None:
+        writer.release()
+    return written
+
+def assemble_digest(part_paths, digest_path, fps):
+    # Worker process: parts joined in order into a new file that then replaces the digest
+    temp_path = os.path.splitext(digest_path)[0] + '.partial.avi'
+    writer = None
+    size = None
+    frames = 0
+    for part_path in part_paths:
+        capture = cv2.VideoCapture(part_path)
+        while True:
+            ret, frame = capture.read()
+            if not ret:
+                break
+            if writer is None:
+                size = frame.shape[1::-1]
+                writer = cv2.VideoWriter(temp_path, cv2.VideoWriter_fourcc(*'XVID'), fps, size)
+            if frame.shape[1::-1] != size:
+                frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)  # record resolution changed
+            writer.write(frame)
+            frames += 1
+        capture.release()
+    if writer is None:
+        return 0
+    writer.release()
+    os.replace(temp_path, digest_path)
+    return frames
+
+class DigestScheduler(threading.Thread):
+    WORKERS = max(1, (os.cpu_count() or 2) // 2)
+    BATCH_SIZE = 32  # segments submitted at a time, between checks on the recorders
+    BUSY_WAIT = 30  # seconds to hold off while the recorders are dropping frames
+    STARTUP_DELAY = 60  # seconds; cameras and viewers come up before any worker is spawned
+    
+    def __init__(self, service):
+        super().__init__(daemon=True)
+        self.service = service
+        self.config = None
+        self.recording_folder = service.recording_folder
+        self.interval = None  # minutes between runs; None disables
+        self.stride = 10.0
+        self.activity_threshold = None
+        self.period_hours = 12
+        self.fps = 15.0
+        self.height = 360
+        self.pool = None  # spawned for each run and shut down after it, so idle workers hold no memory
+        self.on_digest_bytes = None  # callable(camera_id, delta_bytes), called as files are written or removed
+        self.frames_dropped = 0
+        self.wake = threading.Event()
+        self.stopped = threading.Event()
+    
+    def run(self):
+        self.stopped.wait(self.STARTUP_DELAY)
+        while not self.stopped.is_set():
+            if self.interval is not None:
+                try:
+                    self.run_once()
+                except Exception as e:
+                    print(f"Digest error: {e}")
+                finally:
+                    if self.pool is not None:
+                        self.pool.shutdown(cancel_futures=True)
+                        self.pool = None
+            self.wake.wait(None if self.interval is None else self.interval * 60)
+            self.wake.clear()
+    
+    def configure(self, recording_folder, interval, stride, activity_threshold, period_hours, fps, height):
+        # Read by the next run; a run already in progress finishes with the old values
+        self.config = (recording_folder, interval, stride, activity_threshold, period_hours, fps, height)
+        self.recording_folder = recording_folder
+        self.interval = interval
+        self.stride = stride
+        self.activity_threshold = activity_threshold
+        self.period_hours = period_hours
+        self.fps = fps
+        self.height = height
+        self.wake.set()
+    
+    def stop(self):
+        self.stopped.set()
+        self.wake.set()
+        if self.is_alive():
+            self.join(timeout=5)
+    
+    def report_bytes(self, camera_id, delta_bytes):
+        if delta_bytes and self.on_digest_bytes is not None:
+            self.on_digest_bytes(camera_id, delta_bytes)
+    
+    def executor(self):
+        if self.pool is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            self.pool = ProcessPoolExecutor(max_workers=self.WORKERS, initializer=lower_priority,
+                                            mp_context=multiprocessing.get_context('spawn'))
+        return self.pool
+    
+    def wait_for_recorders(self):
+        # Live recording comes first: wait while any encoder queue is overflowing
+        while not self.stopped.is_set():
+            dropped = sum(manager.frames_dropped for manager in list(self.service.recording_managers))
+            busy = dropped > self.frames_dropped
+            self.frames_dropped = dropped
+            if not busy:
+                return
+            self.stopped.wait(self.BUSY_WAIT)
+    
+    def run_once(self):
+        # Incremental: only closed segments that no earlier run has sampled, oldest first
+        rows = recordings_db.query(
+            "SELECT r.id, r.camera_id, r.file_path, r.start_ts FROM recordings r "
+            "LEFT JOIN digest_parts p ON p.recording_id = r.id "
+            "WHERE r.end_ts IS NOT NULL AND p.recording_id IS NULL ORDER BY r.start_ts")
+        digests = {}  # (camera_id, period_start_ts) -> (digest_id, parts folder)
+        touched = set()
+        written = None
+        for batch_start in range(0, len(rows), self.BATCH_SIZE):
+            self.wait_for_recorders()
+            if self.stopped.is_set():
+                return
+            pending = {}
+            for recording_id, camera_id, file_path, start_ts in rows[batch_start:batch_start + self.BATCH_SIZE]:
+                digest_id, parts_folder = self.digest_for(camera_id, start_ts, digests)
+                part_path = os.path.join(parts_folder, f"{recording_id}.avi")
+                future = self.executor().submit(digest_segment, file_path, part_path, self.stride,
+                                                self.activity_threshold, self.height, self.fps)
+                pending[future] = (recording_id, camera_id, digest_id, start_ts, part_path)
+            for future in as_completed(pending):
+                if self.stopped.is_set():
+                    return
+                recording_id, camera_id, digest_id, start_ts, part_path = pending[future]
+                try:
+                    frames = future.result()
+                except Exception as e:
+                    print(f"Digest failed on recording {recording_id}: {e}")
+                    frames = None
+                size_bytes = None
+                if frames:
+                    try:
+                        size_bytes = os.path.getsize(part_path)
+                    except OSError:
+                        size_bytes = 0
+                # Recorded even when unreadable or empty, so it is not retried every run
+                written = recordings_db.submit("INSERT OR REPLACE INTO digest_parts "
+                                               "(recording_id, digest_id, start_ts, part_path, frame_count, size_bytes) "
+                                               "VALUES (?, ?, ?, ?, ?, ?)",
+                                               (recording_id, digest_id, start_ts, part_path if frames else None,
+                                                frames or 0, size_bytes))
+                self.report_bytes(camera_id, size_bytes or 0)
+                touched.add(digest_id)
+        
+        if written is not None:
+            written.result()  # writes commit in order: every part is in before the digests are joined
+        
+        # Digests with new parts, and open ones whose period has ended since
+        ended = recordings_db.query("SELECT id FROM digests WHERE complete = 0 AND period_end_ts <= ?",
+                                    (int(time.time()),))
+        self.assemble(touched.union(digest_id for (digest_id,) in ended))
+    
+    def digest_for(self, camera_id, timestamp, digests):
+        period_start, period_end = digest_period(timestamp, self.period_hours)
+        if (camera_id, period_start) not in digests:
+            folder = digest_folder(self.recording_folder, camera_id)
+            file_path = os.path.join(folder, datetime.fromtimestamp(period_start).strftime('%Y%m%d_%H%M') + '.avi')
+            os.makedirs(os.path.join(folder, 'parts'), exist_ok=True)
+            recordings_db.execute("INSERT OR IGNORE INTO digests (camera_id, period_start_ts, period_end_ts, file_path) "
+                                  "VALUES (?, ?, ?, ?)", (camera_id, period_start, period_end, file_path))
+            digest_id = recordings_db.query("SELECT id FROM digests WHERE camera_id=? AND period_start_ts=?",
+                                            (camera_id, period_start), one=True)[0]
+            digests[(camera_id, period_start)] = (digest_id, os.path.join(folder, 'parts'))
+        return digests[(camera_id, period_start)]
+    
+    def assemble(self, digest_ids):
+        pending = {}
+        for digest_id in digest_ids:
+            row = recordings_db.query("SELECT camera_id, period_start_ts, period_end_ts, file_path, size_bytes "
+                                      "FROM digests WHERE id=?", (digest_id,), one=True)
+            parts = recordings_db.query("SELECT part_path FROM digest_parts WHERE digest_id=? AND part_path IS NOT NULL "
+                                        "ORDER BY start_ts", (digest_id,))
+            future = self.executor().submit(assemble_digest, [part_path for (part_path,) in parts], row[3], self.fps)
+            pending[future] = (digest_id,) + row
+        for future in as_completed(pending):
+            digest_id, camera_id, period_start, period_end, file_path, old_size = pending[future]
+            try:
+                frames = future.result()
+            except Exception as e:
+                print(f"Digest {digest_id} not assembled: {e}")
+                continue
+            try:
+                size_bytes = os.path.getsize(file_path)
+            except OSError:
+                size_bytes = 0  # no part had any frames yet
+            self.report_bytes(camera_id, size_bytes - (old_size or 0))
+            # Complete once the period is over and none of its segments is still open or unsampled
+            unsampled = recordings_db.query(
+                "SELECT COUNT(*) FROM recordings r LEFT JOIN digest_parts p ON p.recording_id = r.id "
+                "WHERE r.camera_id=? AND r.start_ts >= ? AND r.start_ts < ? AND p.recording_id IS NULL",
+                (camera_id, period_start, period_end), one=True)[0]
+            complete = period_end <= time.time() and unsampled == 0
+            recordings_db.execute(
+                "UPDATE digests SET frame_count=?, segment_count=(SELECT COUNT(*) FROM digest_parts WHERE digest_id=?), "
+                "complete=?, updated_ts=?, size_bytes=? WHERE id=?",
+                (frames, digest_id, int(complete), int(time.time()), size_bytes, digest_id))
+            if complete:
+                # Nothing more can join this digest, so its parts are no longer needed
+                removed = 0
+                for part_path, part_size in recordings_db.query("SELECT part_path, size_bytes FROM digest_parts "
+                                                                "WHERE digest_id=? AND part_path IS NOT NULL",
+                                                                (digest_id,)):
+                    try:
+                        os.remove(part_path)
+                    except OSError:
+                        pass
+                    removed += part_size or 0
+                recordings_db.execute("UPDATE digest_parts SET part_path=NULL, size_bytes=NULL WHERE digest_id=?",
+                                      (digest_id,))
+                self.report_bytes(camera_id, -removed)
+
+def frame_bus_name(prefix, camera_id, stream):
+    # Namespaced per user, so another user's recorder never opens or replaces these segments
+    uid = os.getuid() if hasattr(os, 'getuid') else 0
+    return f"{prefix}_{uid}_{camera_id}_{stream}"
+
+def attach_shared_memory(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 attaching registers the segment for unlinking at our exit
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        except (ImportError, AttributeError, KeyError):
+            pass
+        return shm
+
+def process_alive(pid):
+    if os.name == 'nt':
+        return True  # os.kill would terminate it; Windows frees a segment with its last handle anyway
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def bus_data_offset(slot_count):
+    return (BUS_HEADER_SIZE + slot_count * BUS_SLOT_META_SIZE + 63) // 64 * 64
+
+class SharedFrameBus:
+    TAKEOVER_RETRY = 5.0  # seconds between attempts while another live process owns the name
+    
+    def __init__(self, name, slot_count=4):
+        self.name = name
+        self.slot_count = slot_count
+        self.shm = None
+        self.slots = []
+        self.slot_size = 0
+        self.seq = 0
+        self.retry_at = 0.0
+        self.condition = threading.Condition()  # wakes the daemon's notify connections
+    
+    def allocate(self, slot_size):
+        self.close()
+        try:
+            existing = attach_shared_memory(self.name)
+        except FileNotFoundError:
+            pass
+        else:
+            header = BUS_HEADER.unpack_from(existing.buf, 0) if existing.size >= BUS_HEADER.size else (0,) * 6
+            magic, state, _, _, _, owner = header
+            existing.close()
+            if magic == BUS_MAGIC and state == BUS_LIVE and owner != os.getpid() and owner and process_alive(owner):
+                raise FileExistsError(f"Frame bus {self.name} is in use by process {owner}")
+            try:
+                stale = shared_memory.SharedMemory(name=self.name)  # left behind by a crashed writer
+                stale.close()
+                stale.unlink()
+            except FileNotFoundError:
+                pass
+        data_offset = bus_data_offset(self.slot_count)
+        self.shm = shared_memory.SharedMemory(name=self.name, create=True,
+                                              size=data_offset + self.slot_count * slot_size)
+        self.slot_size = slot_size
+        self.slots = [np.ndarray((slot_size,), dtype=np.uint8, buffer=self.shm.buf,
+                                 offset=data_offset + i * slot_size) for i in range(self.slot_count)]
+        BUS_HEADER.pack_into(self.shm.buf, 0, BUS_MAGIC, BUS_LIVE, self.slot_count, slot_size, self.seq, os.getpid())
+    
+    def publish(self, frame, timestamp):
+        # Called on the capture thread: one copy into shared memory, readers map it in place
+        if self.shm is None or frame.nbytes > self.slot_size:
+            if time.monotonic() < self.retry_at:
+                return
+            try:
+                self.allocate(frame.nbytes)
+            except FileExistsError as e:
+                if not self.retry_at:
+                    print(f"{e}; not publishing until it exits")
+                self.retry_at = time.monotonic() + self.TAKEOVER_RETRY
+                return
+        seq = self.seq + 1
+        index = seq % self.slot_count
+        meta_offset = BUS_HEADER_SIZE + index * BUS_SLOT_META_SIZE
+        channels = frame.shape[2] if frame.ndim == 3 else 1
+        BUS_SLOT_META.pack_into(self.shm.buf, meta_offset, 0, 0.0, 0, 0, 0)
+        np.copyto(self.slots[index][:frame.nbytes], frame.reshape(-1))
+        BUS_SLOT_META.pack_into(self.shm.buf, meta_offset, seq, timestamp, frame.shape[0], frame.shape[1], channels)
+        struct.pack_into('<Q', self.shm.buf, BUS_SEQ_OFFSET, seq)
+        self.seq = seq
+        with self.condition:
+            self.condition.notify_all()
+    
+    def wait(self, seq, timeout=None):
+        # Newest sequence once it differs from seq (or seq again on timeout)
+        with self.condition:
+            if self.seq == seq:
+                self.condition.wait(timeout)
+            return self.seq
+    
+    def close(self):
+        if self.shm is None:
+            return
+        struct.pack_into('<I', self.shm.buf, 4, BUS_CLOSED)  # readers re-attach
+        self.slots = []
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass  # already removed, e.g. by hand or a cleanup script
+        self.shm = None
+
+class SharedFrameReader:
+    def __init__(self, name):
+        self.name = name
+        self.shm = None
+        self.slot_count = 0
+        self.slot_size = 0
+        self.data_offset = 0
+    
+    def attach(self):
+        shm = attach_shared_memory(self.name)
+        magic, state, slot_count, slot_size, _, _ = BUS_HEADER.unpack_from(shm.buf, 0)
+        if magic != BUS_MAGIC or state != BUS_LIVE:
+            shm.close()
+            raise FileNotFoundError(f"No live frame bus {self.name}")
+        self.shm = shm
+        self.slot_count = slot_count
+        self.slot_size = slot_size
+        self.data_offset = bus_data_offset(slot_count)
+    
+    def latest(self):
+        # (seq, frame, timestamp) with frame a read-only view into shared memory, or (0, None, 0.0)
+        if self.shm is None or struct.unpack_from('<I', self.shm.buf, 4)[0] != BUS_LIVE:
+            self.detach()
+            try:
+                self.attach()
+            except FileNotFoundError:
+                return 0, None, 0.0
+        seq = struct.unpack_from('<Q', self.shm.buf, BUS_SEQ_OFFSET)[0]
+        if seq == 0:
+            return 0, None, 0.0
+        index = seq % self.slot_count
+        slot_seq, timestamp, height, width, channels = BUS_SLOT_META.unpack_from(
+            self.shm.buf, BUS_HEADER_SIZE + index * BUS_SLOT_META_SIZE)
+        if slot_seq != seq:
+            return 0, None, 0.0  # being rewritten
+        shape = (height, width, channels) if channels > 1 else (height, width)
+        frame = np.ndarray(shape, dtype=np.uint8, buffer=self.shm.buf,
+                           offset=self.data_offset + index * self.slot_size)
+        frame.flags.writeable = False
+        return seq, frame, timestamp
+    
+    def valid(self, seq):
+        # Still the same frame after reading it, i.e. the writer did not lap the reader
+        if self.shm is None:
+            return False
+        index = seq % self.slot_count
+        return BUS_SLOT_META.unpack_from(self.shm.buf, BUS_HEADER_SIZE + index * BUS_SLOT_META_SIZE)[0] == seq
+    
+    def detach(self):
+        if self.shm is not None:
+            try:
+                self.shm.close()
+            except BufferError:
+                pass  # a caller still holds a frame view; the mapping goes with it
+            self.shm = None
+
+# Recorder service (capture, recording, motion detection and retention, with or without the GUI)
+class RecorderService:
+    # Settings that restart the capture threads when they change
+    CAMERA_SETTINGS = ('camera_count', 'camera_sources', 'stream_profiles', 'record_height', 'record_fps',
+                       'dual_stream', 'sub_stream_height', 'sub_stream_sources', 'frame_bus', 'bus_prefix')
+    SETTINGS = CAMERA_SETTINGS + ('recording_duration', 'recording_folder', 'encoder_overflow_policy',
+                                  'recording_mode', 'motion_threshold', 'preroll_seconds', 'postroll_seconds',
+                                  'retention_max_gb', 'retention_max_days', 'retention_camera_max_gb',
+                                  'retention_camera_max_days', 'metrics_file', 'metrics_port', 'metrics_host',
+                                  'metrics_interval', 'privacy_masks', 'camera_names', 'burn_in', 'digest_interval',
+                                  'digest_stride', 'digest_activity_threshold', 'digest_period_hours', 'digest_fps',
+                                  'digest_height')
+    # {camera_id: ...} settings; their keys arrive as strings over JSON
+    CAMERA_KEYED_SETTINGS = ('camera_sources', 'stream_profiles', 'sub_stream_sources', 'privacy_masks', 'camera_names')
+    
+    def __init__(self):
+        self.capture_threads = []
+        self.recording_managers = []
+        self.frame_buses = {}  # (camera_id, 'main' or 'sub') -> SharedFrameBus
+        self.retention_manager = None
+        self.digest_scheduler = None
+        self.metrics_exporter = None
+        self.lock = threading.RLock()
+        self.generation = 0  # bumped every time the cameras are restarted
+        
+        # Camera configuration
+        self.camera_count = 4
+        self.camera_sources = {}  # camera_id -> device, URL, video file or "synthetic:..."; default device camera_id
+        self.stream_profiles = {}  # camera_id -> requested {'width', 'height', 'fps', 'fourcc'}
+        self.dual_stream = True  # grid tiles show a low-res sub stream, focused tiles the main stream
+        self.sub_stream_height = 360
+        self.sub_stream_sources = {}  # camera_id -> second device/URL; otherwise derived from the main stream
+        self.frame_bus = True  # publish every stream to shared memory for other local viewers
+        self.bus_prefix = "ghost_iron"
+        
+        # Recording settings
+        self.recording_duration = 10  # minutes
+        self.recording_folder = "recordings"
+        self.record_height = None  # downsample recordings to this height; None records natively
+        self.record_fps = None  # recorded frame rate; None uses the camera's negotiated FPS
+        self.encoder_overflow_policy = 'drop_oldest'
+        
+        # Drawn into every frame before fan-out; masks and names are kept in the recordings DB
+        self.privacy_masks = {}  # camera_id -> [{'points': [[x, y], ...] normalised, 'mode': 'black' or 'blur'}]
+        self.camera_names = {}  # camera_id -> burn-in name; default "Camera N"
+        self.burn_in = True  # camera name and time in the top left corner of every frame
+        
+        # Motion-triggered recording settings
+        self.recording_mode = 'continuous'
+        self.motion_threshold = 0.01  # fraction of changed pixels
+        self.preroll_seconds = 5
+        self.postroll_seconds = 10
+        
+        # Retention settings (None means unlimited)
+        self.retention_max_gb = None
+        self.retention_max_days = None
+        self.retention_camera_max_gb = None
+        self.retention_camera_max_days = None
+        
+        # Time-lapse digests of each camera's recordings, built in low-priority worker processes
+        self.digest_interval = 60  # minutes between runs; None disables
+        self.digest_stride = 10.0  # seconds of recording per digest frame
+        self.digest_activity_threshold = None  # keep only samples with this fraction of changed pixels; None keeps all
+        self.digest_period_hours = 12  # one digest per camera per period, counted from 06:00; divides 24
+        self.digest_fps = 15.0
+        self.digest_height = 360
+        
+        # Telemetry export (None disables): JSON snapshot file and Prometheus text endpoint
+        self.metrics_file = None
+        self.metrics_port = None
+        self.metrics_host = "127.0.0.1"
+        self.metrics_interval = 10  # seconds between metrics file updates
+    
+    def start(self):
+        with self.lock:
+            os.makedirs(self.recording_folder, exist_ok=True)
+            if recordings_db is not None:
+                self.camera_names, self.privacy_masks = load_camera_overlays()
+                # No recorder is running yet, so any open segment was left by a crash
+                closed = recordings_db.submit(close_open_segments).result()
+                if closed:
+                    print(f"Closed {closed} segments left open by an earlier run")
+            # Start retention before the recorders so it sees every closed segment
+            self.start_retention_manager()
+            self.start_cameras()
+            self.start_digest_scheduler()
+            self.apply_metrics_settings()
+    
+    def start_cameras(self):
+        # Devices open in parallel on their own capture threads; nothing here waits for them
+        self.stop_cameras()
+        for i in range(self.camera_count):
+            self.add_camera(i)
+        self.generation += 1
+    
+    def set_camera_count(self, count):
+        # Hot add/remove: cameras that stay keep their devices, recorders and frame buses
+        while len(self.capture_threads) > count:
+            self.remove_camera(len(self.capture_threads) - 1)
+        for i in range(len(self.capture_threads), count):
+            self.add_camera(i)
+        self.generation += 1
+    
+    def add_camera(self, camera_id):
+        capture_thread = CaptureThread(camera_id, self.camera_sources.get(camera_id, camera_id),
+                                       requested=self.stream_profiles.get(camera_id),
+                                       record_height=self.record_height)
+        if self.dual_stream:
+            capture_thread.enable_sub_stream(self.sub_stream_height, self.sub_stream_sources.get(camera_id))
+        if self.frame_bus:
+            self.start_frame_buses(capture_thread)
+        self.recording_managers.append(self.create_recording_manager(capture_thread))
+        self.apply_overlay_settings(capture_thread)
+        self.capture_threads.append(capture_thread)
+        capture_thread.start()
+    
+    def remove_camera(self, camera_id):
+        capture_thread = self.capture_threads.pop(camera_id)
+        recording_manager = self.recording_managers.pop(camera_id)
+        capture_thread.broadcaster.unsubscribe(recording_manager.record_frame)  # no frames after the stop
+        capture_thread.stop()
+        recording_manager.stop_recording()
+        for stream in ('main', 'sub'):
+            bus = self.frame_buses.pop((camera_id, stream), None)
+            if bus is not None:
+                bus.close()
+    
+    def start_frame_buses(self, capture_thread):
+        streams = [('main', capture_thread.broadcaster)]
+        if capture_thread.sub_broadcaster is not None:
+            streams.append(('sub', capture_thread.sub_broadcaster))
+        for stream, broadcaster in streams:
+            bus = SharedFrameBus(frame_bus_name(self.bus_prefix, capture_thread.camera_id, stream))
+            broadcaster.subscribe(bus.publish)
+            self.frame_buses[(capture_thread.camera_id, stream)] = bus
+    
+    def create_recording_manager(self, capture_thread):
+        recording_manager = RecordingManager(capture_thread.camera_id, self.recording_folder, self.recording_duration,
+                                             fps=self.record_fps,
+                                             overflow_policy=self.encoder_overflow_policy,
+                                             recording_mode=self.recording_mode,
+                                             motion_threshold=self.motion_threshold,
+                                             preroll_seconds=self.preroll_seconds,
+                                             postroll_seconds=self.postroll_seconds)
+        if self.retention_manager is not None:
+            recording_manager.on_segment_closed = self.retention_manager.add_segment
+        # The native frame rate is only known once the device has opened
+        capture_thread.on_opened = lambda profile: recording_manager.set_fps(self.record_fps or profile.get('fps'))
+        capture_thread.broadcaster.subscribe(recording_manager.record_frame)
+        return recording_manager
+    
+    def stop_cameras(self):
+        # Capture first, so the recorders drain their queues and close their segments
+        for capture_thread, recording_manager in zip(self.capture_threads, self.recording_managers):
+            capture_thread.broadcaster.unsubscribe(recording_manager.record_frame)
+            capture_thread.stop(wait=False)
+        for capture_thread in self.capture_threads:
+            capture_thread.stop()
+        self.capture_threads = []
+        for recording_manager in self.recording_managers:
+            recording_manager.stop_recording()
+        self.recording_managers = []
+        for bus in self.frame_buses.values():
+            bus.close()
+        self.frame_buses = {}
+    
+    def start_retention_manager(self):
+        self.retention_manager = RetentionManager(self.recording_folder)
+        self.apply_retention_settings()
+        self.retention_manager.start()
+    
+    def apply_retention_settings(self):
+        retention = self.retention_manager
+        if retention is None:
+            return
+        gb = RetentionManager.GB
+        retention.recording_folder = self.recording_folder
+        retention.max_bytes = None if self.retention_max_gb is None else self.retention_max_gb * gb
+        retention.max_age_days = self.retention_max_days
+        retention.camera_max_bytes = None if self.retention_camera_max_gb is None else self.retention_camera_max_gb * gb
+        retention.camera_max_age_days = self.retention_camera_max_days
+        retention.wake.set()
+    
+    def start_digest_scheduler(self):
+        self.digest_scheduler = DigestScheduler(self)
+        if self.retention_manager is not None:
+            self.digest_scheduler.on_digest_bytes = self.retention_manager.add_digest_bytes
+        self.apply_digest_settings()
+        self.digest_scheduler.start()
+    
+    def apply_digest_settings(self):
+        digests = self.digest_scheduler
+        if digests is None:
+            return
+        config = (self.recording_folder, self.digest_interval, self.digest_stride, self.digest_activity_threshold,
+                  self.digest_period_hours, self.digest_fps, self.digest_height)
+        if digests.config != config:
+            digests.configure(*config)  # wakes it, so a changed schedule takes effect now
+    
+    def apply_metrics_settings(self):
+        config = (self.metrics_file, self.metrics_port, self.metrics_host, self.metrics_interval)
+        if self.metrics_exporter is not None:
+            if self.metrics_exporter.config == config:
+                return
+            self.metrics_exporter.stop()
+            self.metrics_exporter = None
+        if self.metrics_file is not None or self.metrics_port is not None:
+            self.metrics_exporter = MetricsExporter(self, *config)
+            self.metrics_exporter.start()
+    
+    def apply_recording_settings(self):
+        os.makedirs(self.recording_folder, exist_ok=True)
+        for manager in self.recording_managers:
+            manager.recording_folder = self.recording_folder
+            manager.recording_duration = self.recording_duration * 60
+            manager.overflow_policy = self.encoder_overflow_policy
+            manager.recording_mode = self.recording_mode
+            manager.motion_threshold = self.motion_threshold
+            manager.postroll_seconds = self.postroll_seconds
+            manager.set_preroll_seconds(self.preroll_seconds)
+    
+    def camera_name(self, camera_id):
+        return self.camera_names.get(camera_id) or f"Camera {camera_id + 1}"
+    
+    def apply_overlay_settings(self, capture_thread):
+        camera_id = capture_thread.camera_id
+        config = (self.privacy_masks.get(camera_id, ()), self.camera_name(camera_id), self.burn_in)
+        capture_thread.overlay.configure(*config)
+        if capture_thread.sub_thread is not None:
+            capture_thread.sub_thread.overlay.configure(*config)
+    
+    def configure(self, **settings):
+        # Applies changed settings to the running service; returns True if the set of cameras changed
+        changed = set()
+        with self.lock:
+            for name, value in settings.items():
+                if name not in self.SETTINGS:
+                    raise ValueError(f"Unknown setting: {name}")
+                if name == 'privacy_masks':
+                    value = check_privacy_masks(value)
+                elif name in self.CAMERA_KEYED_SETTINGS:
+                    value = {int(camera_id): entry for camera_id, entry in value.items()}  # JSON keys are strings
+                elif name == 'digest_period_hours' and (not 0 < value <= 24 or 24 % value):
+                    raise ValueError("Digest period must divide 24 hours")
+                if getattr(self, name) != value:
+                    setattr(self, name, value)
+                    changed.add(name)
+            self.apply_recording_settings()
+            self.apply_retention_settings()
+            self.apply_digest_settings()
+            self.apply_metrics_settings()
+            if changed.intersection(('privacy_masks', 'camera_names')) and recordings_db is not None:
+                save_camera_overlays(self.camera_names, self.privacy_masks)
+            for capture_thread in self.capture_threads:
+                self.apply_overlay_settings(capture_thread)
+            camera_changes = changed.intersection(self.CAMERA_SETTINGS)
+            if camera_changes == {'camera_count'}:
+                self.set_camera_count(self.camera_count)
+            elif camera_changes:
+                self.start_cameras()
+        return bool(camera_changes)
+    
+    def settings(self):
+        return {name: getattr(self, name) for name in self.SETTINGS}
+    
+    def camera_available(self, camera_id):
+        # Configured cameras are always available; a device that is down is reconnected in place
+        return camera_id < len(self.capture_threads)
+    
+    def live_feed(self, camera_id, full_resolution=False):
+        if not self.camera_available(camera_id):
+            return None
+        return self.capture_threads[camera_id].live_broadcaster(full_resolution)
+    
+    def stats(self):
+        cameras = []
+        for capture_thread, recording_manager in zip(self.capture_threads, self.recording_managers):
+            stats = capture_thread.stats()
+            stats['recorder_dropped'] = recording_manager.frames_dropped
+            cameras.append(stats)
+        storage = self.retention_manager.status() if self.retention_manager is not None else None
+        return {'cameras': cameras, 'storage': storage}
+    
+    def metrics(self):
+        stats = self.stats()
+        stats['time'] = time.time()
+        stats['telemetry'] = telemetry.snapshot()
+        return stats
+    
+    def prometheus_text(self):
+        stats = self.stats()
+        lines = ["# TYPE ghost_iron_camera_up gauge",
+                 "# TYPE ghost_iron_camera_fps gauge",
+                 "# TYPE ghost_iron_frames_captured_total counter",
+                 "# TYPE ghost_iron_read_failures_total counter",
+                 "# TYPE ghost_iron_recorder_dropped_total counter",
+                 "# TYPE ghost_iron_camera_reconnects_total counter"]
+        for camera_id, camera in enumerate(stats['cameras']):
+            label = f'{{camera="{camera_id}"}}'
+            lines += [f"ghost_iron_camera_up{label} {int(camera['state'] == 'live')}",
+                      f"ghost_iron_camera_fps{label} {camera['fps']:.2f}",
+                      f"ghost_iron_frames_captured_total{label} {camera['captured']}",
+                      f"ghost_iron_read_failures_total{label} {camera['read_failures']}",
+                      f"ghost_iron_recorder_dropped_total{label} {camera['recorder_dropped']}",
+                      f"ghost_iron_camera_reconnects_total{label} {camera['reconnects']}"]
+        if stats['storage'] is not None:
+            lines += ["# TYPE ghost_iron_storage_free_bytes gauge",
+                      f"ghost_iron_storage_free_bytes {stats['storage']['free_bytes']}",
+                      "# TYPE ghost_iron_storage_used_bytes gauge",
+                      f"ghost_iron_storage_used_bytes {stats['storage']['used_bytes']}"]
+        return "\n".join(lines) + "\n" + telemetry.prometheus_text()
+    
+    def stop(self):
+        with self.lock:
+            if self.metrics_exporter is not None:
+                self.metrics_exporter.stop()
+                self.metrics_exporter = None
+            if self.digest_scheduler is not None:
+                self.digest_scheduler.stop()
+                self.digest_scheduler = None
+            self.stop_cameras()
+            if self.retention_manager is not None:
+                self.retention_manager.stop()
+                self.retention_manager = None
+
+# Telemetry export for dashboards: a JSON snapshot rewritten every interval and/or
+# Prometheus text format served over HTTP at any path
+class MetricsExporter(threading.Thread):
+    def __init__(self, service, metrics_file=None, port=None, host="127.0.0.1", interval=10):
+        super().__init__(daemon=True)
+        self.service = service
+        self.config = (metrics_file, port, host, interval)
+        self.metrics_file = metrics_file
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.server = None
+        if port is not None:
+            from http.server import ThreadingHTTPServer  # only needed when the endpoint is enabled
+            self.server = ThreadingHTTPServer((host, port), self.request_handler())
+            self.server.daemon_threads = True
+    
+    def request_handler(self):
+        from http.server import BaseHTTPRequestHandler
+        service = self.service
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = service.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                pass  # scrapes every few seconds would flood the console
+        
+        return Handler
+    
+    def run(self):
+        if self.server is not None:
+            threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        while True:
+            if self.metrics_file is not None:
+                self.write_metrics_file()
+            if self.stopped.wait(self.interval):
+                break
+    
+    def write_metrics_file(self):
+        # Written beside the target and renamed, so readers never see a partial file
+        temp_path = self.metrics_file + ".tmp"
+        try:
+            with open(temp_path, 'w') as f:
+                json.dump(self.service.metrics(), f)
+            os.replace(temp_path, self.metrics_file)
+        except OSError as e:
+            print(f"Metrics file error: {e}")
+    
+    def stop(self):
+        self.stopped.set()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+        if self.is_alive():
+            self.join(timeout=2)
+
+# Recorder daemon control channel: one JSON request line per connection, then a JSON reply
+# line or, for 'subscribe', a stream of FRAME_HEADER + raw frame bytes
+DEFAULT_CONTROL_SOCKET = "ghost_iron.sock"
+CONTROL_TCP_PORT = 47800
+CONTROL_TOKEN_FILE = "ghost_iron.token"  # per-install secret, readable only by the daemon's user
+FRAME_HEADER = struct.Struct('<dIII')  # timestamp, height, width, channels
+
+def control_address(path):
+    # Unix socket where the platform has one, loopback TCP elsewhere
+    if hasattr(socket, 'AF_UNIX'):
+        return path
+    return ('127.0.0.1', CONTROL_TCP_PORT)
+
+def control_token(create=False):
+    # Every request carries this token, over the Unix socket and the loopback TCP fallback alike
+    if create:
+        try:
+            fd = os.open(CONTROL_TOKEN_FILE, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            os.chmod(CONTROL_TOKEN_FILE, 0o600)
+        else:
+            with os.fdopen(fd, 'w') as f:
+                f.write(secrets.token_hex(32))
+    with open(CONTROL_TOKEN_FILE) as f:
+        return f.read().strip()
+
+def send_control_request(sock, request):
+    sock.sendall(json.dumps(dict(request, token=control_token())).encode() + b'\n')
+
+def is_admin(username, password):
+    user = personnel_db.query("SELECT authority FROM personnel WHERE username=? AND password=?",
+                              (username, password), one=True)
+    return user is not None and user[0] == 'admin'
+
+def connect_control(address, timeout=2.0):
+    family = socket.AF_INET if isinstance(address, tuple) else socket.AF_UNIX
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(address)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+def recv_exact(sock, view):
+    received = 0
+    while received < len(view):
+        count = sock.recv_into(view[received:])
+        if count == 0:
+            raise ConnectionError("connection closed")
+        received += count
+
+# Newest-frame handoff from a capture thread to a slower consumer; the producer never waits for it
+class FrameMailbox:
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.buffers = [None, None]
+        self.timestamps = [0.0, 0.0]
+        self.pending = None  # buffer holding the newest unsent frame
+        self.sending = None  # buffer the consumer is reading
+    
+    def put(self, frame, timestamp):
+        with self.condition:
+            index = 1 if self.sending == 0 else 0
+            buffer = self.buffers[index]
+            if buffer is None or buffer.shape != frame.shape:
+                buffer = self.buffers[index] = np.empty_like(frame)
+            np.copyto(buffer, frame)
+            self.timestamps[index] = timestamp
+            self.pending = index
+            self.condition.notify()
+    
+    def take(self, timeout=None):
+        with self.condition:
+            if self.pending is None and not self.condition.wait(timeout):
+                return None
+            self.sending, self.pending = self.pending, None
+            return self.buffers[self.sending], self.timestamps[self.sending]
+    
+    def done(self):
+        with self.condition:
+            self.sending = None
+
+class ControlServer(threading.Thread):
+    PATH_SETTINGS = ('recording_folder', 'metrics_file')
+    
+    def __init__(self, service, address, allowed_paths=()):
+        super().__init__(daemon=True)
+        self.service = service
+        self.address = address
+        self.token = control_token(create=True)
+        # Files the daemon may be told to write: the install directory, the recording
+        # folder it was started with, and any --allow-path given on the command line
+        self.allowed_paths = [os.path.realpath(path)
+                              for path in (os.getcwd(), service.recording_folder, *allowed_paths)]
+        self.running = True
+        self.listener = None
+    
+    def run(self):
+        if isinstance(self.address, tuple):
+            self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self.listener.bind(self.address)
+        else:
+            if os.path.exists(self.address):
+                os.remove(self.address)  # stale socket from a previous run
+            self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            old_umask = os.umask(0o117)  # the socket is 0660 from the moment it exists
+            try:
+                self.listener.bind(self.address)
+            finally:
+                os.umask(old_umask)
+        self.listener.listen(16)
+        self.listener.settimeout(0.5)
+        while self.running:
+            try:
+                conn, _ = self.listener.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            conn.settimeout(None)
+            threading.Thread(target=self.handle, args=(conn,), daemon=True).start()
+        self.listener.close()
+        if not isinstance(self.address, tuple) and os.path.exists(self.address):
+            os.remove(self.address)
+    
+    def handle(self, conn):
+        with conn:
+            try:
+                request = json.loads(conn.makefile('rb').readline())
+            except (OSError, ValueError):
+                return
+            token = str(request.get('token')) if isinstance(request, dict) else ''
+            if not hmac.compare_digest(token.encode(), self.token.encode()):
+                try:
+                    conn.sendall(json.dumps({'ok': False, 'error': "Not authorised"}).encode() + b'\n')
+                except OSError:
+                    pass
+                return
+            command = request.get('cmd')
+            if command == 'subscribe':
+                self.stream_frames(conn, int(request['camera_id']), bool(request.get('full_resolution')))
+                return
+            if command == 'notify':
+                self.stream_notifications(conn, int(request['camera_id']), request.get('stream', 'main'))
+                return
+            try:
+                if command == 'status':
+                    reply = dict(self.service.stats(), settings=self.service.settings())
+                elif command == 'configure':
+                    if not is_admin(request.get('username'), request.get('password')):
+                        raise PermissionError("Changing settings requires an admin login")
+                    self.check_paths(request['settings'])
+                    reply = {'restarted': self.service.configure(**request['settings'])}
+                else:
+                    raise ValueError(f"Unknown command: {command}")
+                reply['ok'] = True
+            except (ValueError, TypeError, KeyError, PermissionError) as e:
+                reply = {'ok': False, 'error': str(e)}
+            try:
+                conn.sendall(json.dumps(reply).encode() + b'\n')
+            except OSError:
+                pass
+    
+    def check_paths(self, settings):
+        for name in self.PATH_SETTINGS:
+            path = settings.get(name)
+            if path is None:
+                continue
+            path = os.path.realpath(str(path))
+            if not any(os.path.commonpath((path, allowed)) == allowed for allowed in self.allowed_paths):
+                raise PermissionError(f"{name} must be inside {', '.join(self.allowed_paths)}")
+    
+    def stream_frames(self, conn, camera_id, full_resolution):
+        # Each viewer only ever gets the newest frame; a slow viewer loses frames, never the recorder
+        mailbox = FrameMailbox()
+        feed = None
+        generation = None
+        try:
+            while self.running:
+                if generation != self.service.generation:
+                    # Cameras were restarted: follow the new capture thread
+                    with self.service.lock:
+                        if feed is not None:
+                            feed.unsubscribe(mailbox.put)
+                        generation = self.service.generation
+                        feed = self.service.live_feed(camera_id, full_resolution)
+                        if feed is not None:
+                            feed.subscribe(mailbox.put)
+                item = mailbox.take(timeout=1.0)
+                if item is None:
+                    continue
+                frame, timestamp = item
+                height, width = frame.shape[:2]
+                channels = frame.shape[2] if frame.ndim == 3 else 1
+                conn.sendall(FRAME_HEADER.pack(timestamp, height, width, channels))
+                conn.sendall(frame)
+                mailbox.done()
+        except OSError:
+            pass  # viewer went away
+        finally:
+            if feed is not None:
+                feed.unsubscribe(mailbox.put)
+    
+    def stream_notifications(self, conn, camera_id, stream):
+        # Frame bus readers block on this socket instead of polling shared memory
+        bus = None
+        seq = 0
+        generation = None
+        try:
+            while self.running:
+                if generation != self.service.generation:
+                    with self.service.lock:
+                        generation = self.service.generation
+                        bus = self.service.frame_buses.get((camera_id, stream))
+                if bus is None:
+                    time.sleep(1.0)
+                    continue
+                new_seq = bus.wait(seq, timeout=1.0)
+                if new_seq != seq:
+                    seq = new_seq
+                    conn.sendall(struct.pack('<Q', seq))
+        except OSError:
+            pass  # reader went away
+    
+    def stop(self):
+        self.running = False
+        if self.is_alive():
+            self.join(timeout=2)
+
+# One camera stream read from a shared-memory frame bus, with FrameBroadcaster's subscribe interface;
+# the daemon's notify connection wakes it, polling is the fallback without one
+class SharedFrameFeed:
+    POLL_INTERVAL = 0.005
+    
+    def __init__(self, name, camera_id, stream, address=None):
+        self.name = name
+        self.camera_id = camera_id
+        self.stream = stream
+        self.address = address
+        self.subscribers = ()
+        self.lock = threading.Lock()
+        self.thread = None
+        self.sock = None
+        self.stopped = None  # Event of the current reader thread
+        self.torn_frames = 0
+    
+    def subscribe(self, callback):
+        with self.lock:
+            if callback in self.subscribers:
+                return
+            self.subscribers = self.subscribers + (callback,)
+            if self.thread is None:
+                self.stopped = threading.Event()
+                self.thread = threading.Thread(target=self.run, args=(SharedFrameReader(self.name), self.stopped),
+                                               daemon=True)
+                self.thread.start()
+    
+    def unsubscribe(self, callback):
+        with self.lock:
+            self.subscribers = tuple(s for s in self.subscribers if s != callback)
+            if not self.subscribers:
+                self.close_locked()
+    
+    def close(self):
+        with self.lock:
+            self.subscribers = ()
+            self.close_locked()
+    
+    def close_locked(self):
+        if self.stopped is not None:
+            self.stopped.set()
+        self.thread = None
+        if self.sock is not None:
+            try:
+                self.sock.shutdown(socket.SHUT_RDWR)  # unblocks the notify wait
+            except OSError:
+                pass
+    
+    def run(self, reader, stopped):
+        last_seq = 0
+        while not stopped.is_set():
+            try:
+                sock = connect_control(self.address) if self.address is not None else None
+            except OSError:
+                sock = None
+            self.sock = sock
+            if sock is not None:
+                try:
+                    request = {'cmd': 'notify', 'camera_id': self.camera_id, 'stream': self.stream}
+                    send_control_request(sock, request)
+                    sock.settimeout(None)
+                    notification = bytearray(8)
+                    while not stopped.is_set():
+                        recv_exact(sock, memoryview(notification))
+                        last_seq = self.deliver(reader, last_seq)
+                except OSError:
+                    pass
+                finally:
+                    sock.close()
+            else:
+                # No daemon to wake us: poll the sequence number for a while, then retry the socket
+                deadline = time.monotonic() + RemoteFeed.RECONNECT_DELAY
+                while not stopped.is_set() and time.monotonic() < deadline:
+                    last_seq = self.deliver(reader, last_seq)
+                    time.sleep(self.POLL_INTERVAL)
+        reader.detach()
+    
+    def deliver(self, reader, last_seq):
+        seq, frame, timestamp = reader.latest()
+        if seq == last_seq or frame is None:
+            return last_seq
+        for callback in self.subscribers:
+            callback(frame, timestamp)
+        if not reader.valid(seq):
+            self.torn_frames += 1  # the writer lapped us while we were scaling
+        return seq
+
+# One camera stream received from the recorder daemon, with FrameBroadcaster's subscribe interface
+class RemoteFeed:
+    RECONNECT_DELAY = 1.0
+    
+    def __init__(self, address, camera_id, full_resolution):
+        self.address = address
+        self.camera_id = camera_id
+        self.full_resolution = full_resolution
+        self.subscribers = ()
+        self.lock = threading.Lock()
+        self.thread = None
+        self.sock = None
+        self.stopped = None  # Event of the current reader thread
+    
+    def subscribe(self, callback):
+        with self.lock:
+            if callback in self.subscribers:
+                return
+            self.subscribers = self.subscribers + (callback,)
+            if self.thread is None:
+                self.stopped = threading.Event()
+                self.thread = threading.Thread(target=self.run, args=(self.stopped,), daemon=True)
+                self.thread.start()
+    
+    def unsubscribe(self, callback):
+        with self.lock:
+            self.subscribers = tuple(s for s in self.subscribers if s != callback)
+            if not self.subscribers:
+                self.close_locked()
+    
+    def close(self):
+        with self.lock:
+            self.subscribers = ()
+            self.close_locked()
+    
+    def close_locked(self):
+        if self.stopped is not None:
+            self.stopped.set()
+        self.thread = None
+        if self.sock is not None:
+            try:
+                self.sock.shutdown(socket.SHUT_RDWR)  # unblocks the reader
+            except OSError:
+                pass
+    
+    def run(self, stopped):
+        while not stopped.is_set():
+            sock = None
+            try:
+                sock = self.sock = connect_control(self.address)
+                sock.settimeout(None)
+                self.receive_frames(sock, stopped)
+            except OSError:
+                pass
+            finally:
+                if sock is not None:
+                    sock.close()
+            stopped.wait(self.RECONNECT_DELAY)  # daemon restarting
+    
+    def receive_frames(self, sock, stopped):
+        request = {'cmd': 'subscribe', 'camera_id': self.camera_id, 'full_resolution': self.full_resolution}
+        send_control_request(sock, request)
+        header = bytearray(FRAME_HEADER.size)
+        frame = None
+        while not stopped.is_set():
+            recv_exact(sock, memoryview(header))
+            timestamp, height, width, channels = FRAME_HEADER.unpack(header)
+            shape = (height, width, channels) if channels > 1 else (height, width)
+            if frame is None or frame.shape != shape:
+                frame = np.empty(shape, dtype=np.uint8)
+            recv_exact(sock, memoryview(frame).cast('B'))
+            for callback in self.subscribers:
+                callback(frame, timestamp)
+
+# Thin-client view of a recorder daemon, with the RecorderService interface the GUI uses
+class RemoteRecorderService:
+    def __init__(self, address):
+        self.address = address
+        self.feeds = {}
+        self.status = {'cameras': [], 'storage': None}
+        self.credentials = (None, None)  # the logged-in user; the daemon only lets admins configure
+        self.refresh()
+    
+    def request(self, **request):
+        with connect_control(self.address) as sock:
+            send_control_request(sock, request)
+            line = sock.makefile('rb').readline()
+        if not line:
+            raise ConnectionError("recorder daemon closed the connection")
+        reply = json.loads(line)
+        if not reply.get('ok'):
+            raise ValueError(reply.get('error', "recorder daemon error"))
+        return reply
+    
+    def refresh(self):
+        self.status = self.request(cmd='status')
+        for name, value in self.status['settings'].items():
+            if name in RecorderService.CAMERA_KEYED_SETTINGS:
+                value = {int(camera_id): entry for camera_id, entry in value.items()}
+            setattr(self, name, value)
+        return self.status
+    
+    def configure(self, **settings):
+        layout = (self.dual_stream, self.frame_bus, self.bus_prefix)
+        username, password = self.credentials
+        restarted = self.request(cmd='configure', settings=settings, username=username, password=password)['restarted']
+        self.refresh()
+        if layout != (self.dual_stream, self.frame_bus, self.bus_prefix):
+            # Streams are mapped differently now; feeds are rebuilt on demand
+            self.stop()
+            self.feeds = {}
+        return restarted
+    
+    def settings(self):
+        return dict(self.status['settings'])
+    
+    def camera_available(self, camera_id):
+        cameras = self.status['cameras']
+        return camera_id < len(cameras) and cameras[camera_id] is not None
+    
+    def live_feed(self, camera_id, full_resolution=False):
+        key = (camera_id, bool(full_resolution))
+        if key not in self.feeds:
+            if self.frame_bus and not isinstance(self.address, tuple):
+                # Same machine: map the daemon's frame bus instead of receiving frames over the socket
+                stream = 'main' if full_resolution or not self.dual_stream else 'sub'
+                name = frame_bus_name(self.bus_prefix, camera_id, stream)
+                self.feeds[key] = SharedFrameFeed(name, camera_id, stream, self.address)
+            else:
+                self.feeds[key] = RemoteFeed(self.address, camera_id, bool(full_resolution))
+        return self.feeds[key]
+    
+    def stats(self):
+        return self.refresh()
+    
+    def stop(self):
+        # Only the viewer goes away; the daemon keeps recording
+        for feed in self.feeds.values():
+            feed.close()
+
+# Admin Panel
+class AdminPanel(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.parent = parent
+        self.service = parent.service
+        self.setWindowTitle("Admin Panel")
+        self.setFixedSize(600, 935)
+        
+        layout = QVBoxLayout()
+        
+        # Personnel Management
+        personnel_group = QGroupBox("Personnel Management")
+        personnel_layout = QVBoxLayout()
+        
+        # Personnel list
+        self.personnel_list = QListWidget()
+        self.personnel_list.itemClicked.connect(self.personnel_selected)
+        personnel_layout.addWidget(self.personnel_list)
+        
+        # Personnel details
+        detail_layout = QHBoxLayout()
+        
+        left_layout = QVBoxLayout()
+        self.username_input = QLineEdit()
+        self.username_input.setPlaceholderText("Username")
+        left_layout.addWidget(self.username_input)
+        
+        self.password_input = QLineEdit()
+        self.password_input.setPlaceholderText("Password")
+        self.password_input.setEchoMode(QLineEdit.Password)
+        left_layout.addWidget(self.password_input)
+        
+        self.authority_combo = QComboBox()
+        self.authority_combo.addItems(["security", "admin"])
+        left_layout.addWidget(self.authority_combo)
+        
+        detail_layout.addLayout(left_layout)
+        
+        right_layout = QVBoxLayout()
+        self.add_btn = QPushButton("Add New")
+        self.add_btn.clicked.connect(self.add_personnel)
+        right_layout.addWidget(self.add_btn)
+        
+        self.update_btn = QPushButton("Update")
+        self.update_btn.clicked.connect(self.update_personnel)
+        right_layout.addWidget(self.update_btn)
+        
+        self.delete_btn = QPushButton("Delete")
+        self.delete_btn.clicked.connect(self.delete_personnel)
+        right_layout.addWidget(self.delete_btn)
+        
+        detail_layout.addLayout(right_layout)
+        personnel_layout.addLayout(detail_layout)
+        personnel_group.setLayout(personnel_layout)
+        layout.addWidget(personnel_group)
+        
+        # Cameras: state and the capture mode each device actually granted
+        cameras_group = QGroupBox("Cameras")
+        cameras_layout = QVBoxLayout()
+        self.camera_table = QTableWidget(0, 4)
+        self.camera_table.setHorizontalHeaderLabels(["Camera", "State", "Capture mode", "FPS"])
+        self.camera_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.camera_table.verticalHeader().setVisible(False)
+        self.camera_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.camera_table.setMaximumHeight(140)
+        cameras_layout.addWidget(self.camera_table)
+        cameras_group.setLayout(cameras_layout)
+        layout.addWidget(cameras_group)
+        
+        # System Settings
+        settings_group = QGroupBox("System Settings")
+        settings_layout = QVBoxLayout()
+        
+        self.camera_count_input = QLineEdit()
+        self.camera_count_input.setPlaceholderText(f"Current Camera Count: {self.service.camera_count}")
+        settings_layout.addWidget(self.camera_count_input)
+        
+        self.recording_duration_input = QLineEdit()
+        self.recording_duration_input.setPlaceholderText(f"Recording Duration (min): {self.service.recording_duration}")
+        settings_layout.addWidget(self.recording_duration_input)
+        
+        overflow_layout = QHBoxLayout()
+        overflow_layout.addWidget(QLabel("Encoder queue overflow:"))
+        self.overflow_policy_combo = QComboBox()
+        self.overflow_policy_combo.addItems(RecordingManager.OVERFLOW_POLICIES)
+        self.overflow_policy_combo.setCurrentText(self.service.encoder_overflow_policy)
+        overflow_layout.addWidget(self.overflow_policy_combo)
+        settings_layout.addLayout(overflow_layout)
+        
+        # Motion-triggered recording
+        motion_layout = QHBoxLayout()
+        motion_layout.addWidget(QLabel("Recording mode:"))
+        self.recording_mode_combo = QComboBox()
+        self.recording_mode_combo.addItems(RecordingManager.RECORDING_MODES)
+        self.recording_mode_combo.setCurrentText(self.service.recording_mode)
+        motion_layout.addWidget(self.recording_mode_combo)
+        
+        self.motion_threshold_input = QLineEdit()
+        self.motion_threshold_input.setPlaceholderText(f"Motion threshold (%): {self.service.motion_threshold * 100:g}")
+        motion_layout.addWidget(self.motion_threshold_input)
+        
+        self.preroll_input = QLineEdit()
+        self.preroll_input.setPlaceholderText(f"Pre-roll (s): {self.service.preroll_seconds}")
+        motion_layout.addWidget(self.preroll_input)
+        
+        self.postroll_input = QLineEdit()
+        self.postroll_input.setPlaceholderText(f"Post-roll (s): {self.service.postroll_seconds}")
+        motion_layout.addWidget(self.postroll_input)
+        settings_layout.addLayout(motion_layout)
+        
+        # Record profile (applied in the capture threads, so it restarts the cameras)
+        profile_layout = QHBoxLayout()
+        profile_layout.addWidget(QLabel("Record resolution:"))
+        self.record_height_combo = QComboBox()
+        for height in CaptureThread.RECORD_HEIGHTS:
+            self.record_height_combo.addItem("Native" if height is None else f"{height}p", height)
+        self.record_height_combo.setCurrentIndex(CaptureThread.RECORD_HEIGHTS.index(self.service.record_height))
+        profile_layout.addWidget(self.record_height_combo)
+        self.record_fps_input = QLineEdit()
+        self.record_fps_input.setPlaceholderText(f"Record FPS: {self.service.record_fps or 'native'}")
+        profile_layout.addWidget(self.record_fps_input)
+        settings_layout.addLayout(profile_layout)
+        
+        self.dual_stream_checkbox = QCheckBox(f"Dual-stream live view ({self.service.sub_stream_height}p grid tiles)")
+        self.dual_stream_checkbox.setChecked(self.service.dual_stream)
+        settings_layout.addWidget(self.dual_stream_checkbox)
+        
+        overlay_layout = QHBoxLayout()
+        self.burn_in_checkbox = QCheckBox("Burn camera name and time into video")
+        self.burn_in_checkbox.setChecked(self.service.burn_in)
+        overlay_layout.addWidget(self.burn_in_checkbox)
+        self.privacy_masks_btn = QPushButton("Privacy Masks && Names")
+        self.privacy_masks_btn.clicked.connect(self.open_privacy_masks)
+        overlay_layout.addWidget(self.privacy_masks_btn)
+        settings_layout.addLayout(overlay_layout)
+        
+        # Time-lapse digests, built in the background from closed segments
+        digest_layout = QHBoxLayout()
+        self.digest_interval_input = QLineEdit()
+        self.digest_interval_input.setPlaceholderText(f"Digest every (min): {self.service.digest_interval or 'off'}")
+        digest_layout.addWidget(self.digest_interval_input)
+        self.digest_stride_input = QLineEdit()
+        self.digest_stride_input.setPlaceholderText(f"Digest stride (s): {self.service.digest_stride:g}")
+        digest_layout.addWidget(self.digest_stride_input)
+        threshold = self.service.digest_activity_threshold
+        self.digest_activity_input = QLineEdit()
+        self.digest_activity_input.setPlaceholderText(
+            f"Digest activity (%): {'all' if threshold is None else f'{threshold * 100:g}'}")
+        digest_layout.addWidget(self.digest_activity_input)
+        settings_layout.addLayout(digest_layout)
+        
+        self.recording_folder_btn = QPushButton("Change Recording Folder")
+        self.recording_folder_btn.clicked.connect(self.change_recording_folder)
+        settings_layout.addWidget(self.recording_folder_btn)
+        
+        self.save_settings_btn = QPushButton("Save Settings")
+        self.save_settings_btn.clicked.connect(self.save_settings)
+        settings_layout.addWidget(self.save_settings_btn)
+        
+        settings_group.setLayout(settings_layout)
+        layout.addWidget(settings_group)
+        
+        # Storage retention
+        storage_group = QGroupBox("Storage Retention")
+        storage_layout = QVBoxLayout()
+        
+        quota_layout = QHBoxLayout()
+        self.retention_inputs = []
+        for attribute, label in (('retention_max_gb', "Total quota (GB)"),
+                                 ('retention_max_days', "Max age (days)"),
+                                 ('retention_camera_max_gb', "Per-camera quota (GB)"),
+                                 ('retention_camera_max_days', "Per-camera max age (days)")):
+            current = getattr(self.service, attribute)
+            quota_input = QLineEdit()
+            quota_input.setPlaceholderText(f"{label}: {'unlimited' if current is None else current}")
+            quota_layout.addWidget(quota_input)
+            self.retention_inputs.append((attribute, quota_input))
+        storage_layout.addLayout(quota_layout)
+        
+        self.storage_status_label = QLabel()
+        storage_layout.addWidget(self.storage_status_label)
+        
+        storage_group.setLayout(storage_layout)
+        layout.addWidget(storage_group)
+        
+        self.setLayout(layout)
+        
+        if parent.last_stats is not None:
+            self.show_stats(parent.last_stats)
+        parent.stats_poller.stats_ready.connect(self.show_stats)
+        
+        # Update personnel list
+        self.update_personnel_list()
+    
+    def show_stats(self, stats):
+        if stats is None:
+            return
+        self.camera_table.setRowCount(len(stats['cameras']))
+        for camera_id, camera in enumerate(stats['cameras']):
+            name = self.service.camera_names.get(camera_id) or f"Camera {camera_id + 1}"
+            row = (name, camera['state'],
+                   format_profile(camera.get('profile')), f"{camera['fps']:.1f}")
+            for column, text in enumerate(row):
+                self.camera_table.setItem(camera_id, column, QTableWidgetItem(text))
+        if stats['storage'] is not None:
+            self.storage_status_label.setText(format_storage_status(stats['storage']))
+    
+    def update_personnel_list(self):
+        self.personnel_list.clear()
+        
+        personnel = personnel_db.query("SELECT * FROM personnel")
+        
+        for person in personnel:
+            item_text = f"{person[1]} ({person[3]})"
+            self.personnel_list.addItem(item_text)
+            self.personnel_list.item(self.personnel_list.count()-1).setData(Qt.UserRole, person[0])
+    
+    def personnel_selected(self, item):
+        person_id = item.data(Qt.UserRole)
+        
+        person = personnel_db.query("SELECT * FROM personnel WHERE id=?", (person_id,), one=True)
+        
+        if person:
+            self.username_input.setText(person[1])
+            self.password_input.setText(person[2])
+            self.authority_combo.setCurrentText(person[3])
+    
+    def add_personnel(self):
+        username = self.username_input.text()
+        password = self.password_input.text()
+        authority = self.authority_combo.currentText()
+        
+        if not username or not password:
+            QMessageBox.warning(self, "Error", "Username and password cannot be empty!")
+            return
+        
+        try:
+            personnel_db.execute("INSERT INTO personnel (username, password, authority) VALUES (?, ?, ?)",
+                                 (username, password, authority))
+            QMessageBox.information(self, "Success", "Personnel added successfully!")
+            self.update_personnel_list()
+        except sqlite3.IntegrityError:
+            QMessageBox.warning(self, "Error", "Username already exists!")
+    
+    def update_personnel(self):
+        current_item = self.personnel_list.currentItem()
+        if not current_item:
+            QMessageBox.warning(self, "Error", "Please select a personnel!")
+            return
+        
+        person_id = current_item.data(Qt.UserRole)
+        username = self.username_input.text()
+        password = self.password_input.text()
+        authority = self.authority_combo.currentText()
+        
+        if not username or not password:
+            QMessageBox.warning(self, "Error", "Username and password cannot be empty!")
+            return
+        
+        try:
+            personnel_db.execute("UPDATE personnel SET username=?, password=?, authority=? WHERE id=?",
+                                 (username, password, authority, person_id))
+            QMessageBox.information(self, "Success", "Personnel updated successfully!")
+            self.update_personnel_list()
+        except sqlite3.IntegrityError:
+            QMessageBox.warning(self, "Error", "Username already exists!")
+    
+    def delete_personnel(self):
+        current_item = self.personnel_list.currentItem()
+        if not current_item:
+            QMessageBox.warning(self, "Error", "Please select a personnel!")
+            return
+        
+        person_id = current_item.data(Qt.UserRole)
+        
+        # Check if admin
+        authority = personnel_db.query("SELECT authority FROM personnel WHERE id=?", (person_id,), one=True)[0]
+        
+        if authority == "admin":
+            QMessageBox.warning(self, "Error", "Admin account cannot be deleted!")
+            return
+        
+        reply = QMessageBox.question(self, 'Confirmation', 'Are you sure you want to delete this personnel?',
+                                    QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        
+        if reply == QMessageBox.Yes:
+            personnel_db.execute("DELETE FROM personnel WHERE id=?", (person_id,))
+            QMessageBox.information(self, "Success", "Personnel deleted successfully!")
+            self.update_personnel_list()
+    
+    def change_recording_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Select Recording Folder")
+        if folder:
+            self.recording_folder_btn.setEnabled(False)
+            self.folder_worker = ConfigureWorker(self.service, {'recording_folder': folder})
+            self.folder_worker.applied.connect(lambda restarted: self.recording_folder_changed(folder))
+            self.folder_worker.failed.connect(self.recording_folder_failed)
+            self.folder_worker.start()
+    
+    def recording_folder_changed(self, folder):
+        self.recording_folder_btn.setEnabled(True)
+        QMessageBox.information(self, "Success", f"Recording folder set to {folder}!")
+    
+    def recording_folder_failed(self, error):
+        self.recording_folder_btn.setEnabled(True)
+        QMessageBox.warning(self, "Error", f"Recording folder not changed: {error}")
+    
+    def open_privacy_masks(self):
+        self.privacy_mask_editor = PrivacyMaskEditor(self)
+        self.privacy_mask_editor.show()
+    
+    def save_settings(self):
+        # Validated changes are collected here and applied by the service in one go
+        settings = {}
+        
+        # Camera count
+        if self.camera_count_input.text():
+            try:
+                new_count = int(self.camera_count_input.text())
+                if new_count > 0:
+                    settings['camera_count'] = new_count
+                else:
+                    QMessageBox.warning(self, "Error", "Camera count must be greater than 0!")
+            except ValueError:
+                QMessageBox.warning(self, "Error", "Invalid camera count!")
+        
+        # Recording duration
+        if self.recording_duration_input.text():
+            try:
+                new_duration = int(self.recording_duration_input.text())
+                if new_duration > 0:
+                    settings['recording_duration'] = new_duration
+                else:
+                    QMessageBox.warning(self, "Error", "Recording duration must be greater than 0!")
+            except ValueError:
+                QMessageBox.warning(self, "Error", "Invalid recording duration!")
+        
+        # Encoder overflow policy
+        settings['encoder_overflow_policy'] = self.overflow_policy_combo.currentText()
+        
+        # Motion recording
+        settings['recording_mode'] = self.recording_mode_combo.currentText()
+        if self.motion_threshold_input.text():
+            try:
+                new_threshold = float(self.motion_threshold_input.text())
+                if 0 < new_threshold <= 100:
+                    settings['motion_threshold'] = new_threshold / 100
+                else:
+                    QMessageBox.warning(self, "Error", "Motion threshold must be between 0 and 100!")
+            except ValueError:
+                QMessageBox.warning(self, "Error", "Invalid motion threshold!")
+        for input_field, attribute in ((self.preroll_input, 'preroll_seconds'),
+                                       (self.postroll_input, 'postroll_seconds')):
+            if input_field.text():
+                try:
+                    new_seconds = int(input_field.text())
+                    if new_seconds >= 0:
+                        settings[attribute] = new_seconds
+                    else:
+                        QMessageBox.warning(self, "Error", "Pre/post-roll cannot be negative!")
+                except ValueError:
+                    QMessageBox.warning(self, "Error", "Invalid pre/post-roll!")
+        
+        # Record profile ("0" or "native" records at the camera's own rate)
+        settings['record_height'] = self.record_height_combo.currentData()
+        fps_text = self.record_fps_input.text().strip().lower()
+        if fps_text:
+            try:
+                new_fps = None if fps_text in ("0", "native") else float(fps_text)
+                if new_fps is None or new_fps > 0:
+                    settings['record_fps'] = new_fps
+                else:
+                    QMessageBox.warning(self, "Error", "Record FPS must be greater than 0!")
+            except ValueError:
+                QMessageBox.warning(self, "Error", "Invalid record FPS!")
+        settings['dual_stream'] = self.dual_stream_checkbox.isChecked()
+        settings['burn_in'] = self.burn_in_checkbox.isChecked()
+        
+        # Digests ("0" or "off" stops them; activity "0" or "all" keeps every sampled frame)
+        interval_text = self.digest_interval_input.text().strip().lower()
+        if interval_text:
+            try:
+                new_interval = None if interval_text in ("0", "off") else float(interval_text)
+                if new_interval is None or new_interval > 0:
+                    settings['digest_interval'] = new_interval
+                else:
+                    QMessageBox.warning(self, "Error", "Digest interval must be greater than 0!")
+            except ValueError:
+                QMessageBox.warning(self, "Error", "Invalid digest interval!")
+        if self.digest_stride_input.text():
+            try:
+                new_stride = float(self.digest_stride_input.text())
+                if new_stride > 0:
+                    settings['digest_stride'] = new_stride
+                else:
+                    QMessageBox.warning(self, "Error", "Digest stride must be greater than 0!")
+            except ValueError:
+                QMessageBox.warning(self, "Error", "Invalid digest stride!")
+        activity_text = self.digest_activity_input.text().strip().lower()
+        if activity_text:
+            try:
+                new_activity = None if activity_text in ("0", "all") else float(activity_text)
+                if new_activity is None or 0 < new_activity <= 100:
+                    settings['digest_activity_threshold'] = None if new_activity is None else new_activity / 100
+                else:
+                    QMessageBox.warning(self, "Error", "Digest activity must be between 0 and 100!")
+            except ValueError:
+                QMessageBox.warning(self, "Error", "Invalid digest activity!")
+        
+        # Retention quotas ("0" or "none" removes a limit)
+        for attribute, quota_input in self.retention_inputs:
+            text = quota_input.text().strip().lower()
+            if not text:
+                continue
+            if text in ("0", "none", "unlimited"):
+                settings[attribute] = None
+                continue
+            try:
+                value = float(text)
+                if value > 0:
+                    settings[attribute] = value
+                else:
+                    QMessageBox.warning(self, "Error", "Quotas must be greater than 0!")
+            except ValueError:
+                QMessageBox.warning(self, "Error", "Invalid retention quota!")
+        
+        self.save_settings_btn.setEnabled(False)
+        self.save_settings_btn.setText("Applying...")
+        self.settings_worker = ConfigureWorker(self.service, settings)
+        self.settings_worker.applied.connect(self.settings_applied)
+        self.settings_worker.failed.connect(self.settings_failed)
+        self.settings_worker.start()
+    
+    def settings_applied(self, cameras_restarted):
+        self.save_settings_btn.setEnabled(True)
+        self.save_settings_btn.setText("Save Settings")
+        if cameras_restarted:
+            self.parent.build_camera_grid()
+        
+        QMessageBox.information(self, "Success", "Settings saved successfully!")
+    
+    def settings_failed(self, error):
+        self.save_settings_btn.setEnabled(True)
+        self.save_settings_btn.setText("Save Settings")
+        QMessageBox.warning(self, "Error", f"Settings not applied: {error}")
+
+# Per-camera privacy masks and burn-in names, drawn over the camera's live tile
+class PrivacyMaskEditor(QWidget):
+    MODES = (("Black out", 'black'), ("Blur", 'blur'))
+    
+    def __init__(self, parent):
+        super().__init__(parent, Qt.Window)
+        self.camera_system = parent.parent
+        self.service = parent.service
+        self.setWindowTitle("Privacy Masks")
+        
+        # Edited here and applied together on save
+        self.masks = {camera_id: [dict(mask) for mask in masks]
+                      for camera_id, masks in self.service.privacy_masks.items()}
+        self.names = dict(self.service.camera_names)
+        
+        layout = QVBoxLayout()
+        
+        camera_layout = QHBoxLayout()
+        self.camera_combo = QComboBox()
+        for i in range(self.service.camera_count):
+            self.camera_combo.addItem(f"Camera {i + 1}", i)
+        camera_layout.addWidget(self.camera_combo)
+        self.name_input = QLineEdit()
+        self.name_input.textEdited.connect(self.name_edited)
+        camera_layout.addWidget(self.name_input)
+        self.mode_combo = QComboBox()
+        for label, mode in self.MODES:
+            self.mode_combo.addItem(label, mode)
+        self.mode_combo.currentIndexChanged.connect(self.mode_changed)
+        camera_layout.addWidget(self.mode_combo)
+        layout.addLayout(camera_layout)
+        
+        self.canvas = MaskCanvas()
+        self.canvas.setMinimumSize(640, 360)
+        layout.addWidget(self.canvas)
+        layout.addWidget(QLabel("Click to add points, double-click to close a polygon, right-click to undo"))
+        
+        button_layout = QHBoxLayout()
+        for label, slot in (("Refresh Frame", self.load_frame),
+                            ("Close Polygon", self.canvas.close_polygon),
+                            ("Undo", self.canvas.undo_point),
+                            ("Clear Camera", self.clear_camera),
+                            ("Save", self.save)):
+            button = QPushButton(label)
+            button.clicked.connect(slot)
+            button_layout.addWidget(button)
+        layout.addLayout(button_layout)
+        
+        self.setLayout(layout)
+        self.camera_combo.currentIndexChanged.connect(self.camera_changed)
+        self.camera_changed()
+    
+    def camera_changed(self):
+        camera_id = self.camera_combo.currentData()
+        self.canvas.close_polygon()
+        self.canvas.set_polygons(self.masks.setdefault(camera_id, []))
+        self.name_input.setText(self.names.get(camera_id, ""))
+        self.name_input.setPlaceholderText(f"Burn-in name: Camera {camera_id + 1}")
+        self.load_frame()
+    
+    def load_frame(self):
+        # The camera's latest live tile (already masked with the saved polygons)
+        camera_id = self.camera_combo.currentData()
+        widgets = self.camera_system.camera_widgets
+        widget = widgets[camera_id] if camera_id < len(widgets) else None
+        frame = None if widget is None or widget.front_buffer is None else widget.front_buffer.copy()
+        self.canvas.set_frame(frame)
+    
+    def name_edited(self, text):
+        self.names[self.camera_combo.currentData()] = text.strip()
+    
+    def mode_changed(self):
+        self.canvas.mode = self.mode_combo.currentData()
+    
+    def clear_camera(self):
+        self.canvas.points = []
+        self.canvas.polygons.clear()
+        self.canvas.update()
+    
+    def save(self):
+        self.canvas.close_polygon()
+        masks = {camera_id: polygons for camera_id, polygons in self.masks.items() if polygons}
+        names = {camera_id: name for camera_id, name in self.names.items() if name}
+        self.setEnabled(False)  # until the service has the new masks
+        self.worker = ConfigureWorker(self.service, {'privacy_masks': masks, 'camera_names': names})
+        self.worker.applied.connect(self.saved)
+        self.worker.failed.connect(self.save_failed)
+        self.worker.start()
+    
+    def saved(self):
+        self.setEnabled(True)
+        QMessageBox.information(self, "Success", "Privacy masks saved!")
+    
+    def save_failed(self, error):
+        self.setEnabled(True)
+        QMessageBox.warning(self, "Error", f"Privacy masks not saved: {error}")
+
+# Start application
+def configure_service(service, args):
+    if args.cameras:
+        service.camera_count = args.cameras
+    if args.folder:
+        service.recording_folder = args.folder
+    if args.synthetic:
+        service.camera_sources = {i: args.synthetic for i in range(service.camera_count)}
+    service.metrics_file = args.metrics_file
+    service.metrics_port = args.metrics_port
+    if args.digest_interval is not None:
+        service.digest_interval = args.digest_interval or None
+
+def start_backend(service):
+    # Databases and the in-process recorder come up while the login window is already showing
+    def run():
+        init_databases()
+        if isinstance(service, RecorderService):
+            service.start()
+    backend = threading.Thread(target=run, daemon=True)
+    backend.start()
+    return backend
+
+def run_gui(args, qt_args):
+    app = QApplication(sys.argv[:1] + qt_args)
+    app.setStyle('Fusion')
+    
+    # Attach to a running recorder daemon, otherwise capture and record in this process
+    try:
+        service = RemoteRecorderService(control_address(args.socket))
+    except (OSError, ValueError):
+        service = RecorderService()
+        configure_service(service, args)
+    
+    window = CameraSystem(service, start_backend(service))
+    exit_code = app.exec_()
+    window.wait_for_backend()
+    window.export_queue.stop()
+    window.stats_poller.stop()
+    close_search_pool()
+    service.stop()
+    close_databases()
+    return exit_code
+
+def run_headless(args):
+    # Recorder daemon: records whether or not anyone is logged into a viewer
+    init_databases()
+    service = RecorderService()
+    configure_service(service, args)
+    service.start()
+    server = ControlServer(service, control_address(args.socket), args.allow_path)
+    server.start()
+    
+    stop_event = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop_event.set())
+    print(f"Recording {service.camera_count} cameras to {service.recording_folder}, control socket {args.socket}")
+    while not stop_event.wait(1.0):
+        pass
+    
+    server.stop()
+    service.stop()
+    close_databases()
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Security camera system")
+    parser.add_argument('--headless', action='store_true', help="run only the recorder daemon, without the GUI")
+    parser.add_argument('--socket', default=DEFAULT_CONTROL_SOCKET, help="recorder daemon control socket")
+    # Recorder options apply to the daemon, or to the GUI when it records in-process
+    parser.add_argument('--cameras', type=int, help="number of cameras")
+    parser.add_argument('--folder', help="recording folder")
+    parser.add_argument('--synthetic', nargs='?', const=SyntheticCapture.SCHEME, metavar='SPEC',
+                        help="use generated test cameras, e.g. synthetic:1280x720@25;motion=5-10")
+    parser.add_argument('--metrics-file', help="write a JSON telemetry snapshot here")
+    parser.add_argument('--metrics-port', type=int, help="serve Prometheus metrics on this port")
+    parser.add_argument('--allow-path', action='append', default=[], metavar='DIR',
+                        help="let admins point the daemon's recording folder or metrics file here")
+    parser.add_argument('--digest-interval', type=float, metavar='MINUTES',
+                        help="build time-lapse digests this often (0 disables)")
+    args, qt_args = parser.parse_known_args()
+    if args.headless:
+        sys.exit(run_headless(args))
+    sys.exit(run_gui(args, qt_args))
\ No newline at end of file